@@ -1,8 +1,11 @@
+import json
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 
-DATABASE_URL = "sqlite:///pipeline/outputs/faculty.db"
+DB_PATH = "pipeline/outputs/faculty.db"
+DATABASE_URL = f"sqlite:///{DB_PATH}"
 
 
 engine = create_engine(
@@ -22,3 +25,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Columns stored as JSON text
+JSON_FIELDS = {
+    "phone",
+    "email",
+    "teaching",
+    "publications",
+    "website_links",
+}
+
+
+def parse_row(row: dict) -> dict:
+    """A faculty row as a dict, with its JSON columns (those present) decoded"""
+    data = dict(row)
+    for field in JSON_FIELDS:
+        if field not in data:
+            continue
+        value = data[field]
+        if value is None:
+            data[field] = None
+        else:
+            try:
+                data[field] = json.loads(value)
+            except Exception:
+                data[field] = None
+    return data
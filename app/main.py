@@ -1,83 +1,359 @@
-from fastapi import FastAPI, Depends, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from pydantic import Field
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from pipeline.recommender.loader import load_all
-from pipeline.recommender.search import search_faculty
+# The search stack (numpy, faiss, the encoder) is imported on first use, not
+# here, so the SQLite endpoints don't wait for it
+from pipeline.recommender import fts, metrics, readiness, settings as recommender_settings
+from pipeline.recommender.log import ROOT_LOGGER, get_logger
+from pipeline.recommender.startup import StartupTimer
 
 
-from typing import List
+from typing import Annotated, List, Optional, Union
 from enum import Enum
-import json
+import time
 
-from app.db import get_db
-from app.schemas import FacultyOut
+from app import snapshot
+from app.db import DB_PATH, get_db, parse_row
+from app.response_cache import CACHED_PATHS, ResponseCache, etag, etag_matches, request_key
+from app.schemas import (
+    FacultyMatchOut,
+    FacultyOut,
+    FacultySummaryMatchOut,
+    FacultySummaryOut,
+    RecommendBatchRequest,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
+startup_timer = StartupTimer("api")
+startup_timer.mark("imports")
+
+# Under the recommender's logger, for its handler and level
+logger = get_logger(f"{ROOT_LOGGER}.api")
+
 app = FastAPI(title="Faculty API")
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Per-stage search timings of this request in a Server-Timing header"""
+    if not recommender_settings.METRICS_ENABLED:
+        return await call_next(request)
+
+    start = time.perf_counter()
+    with metrics.request_timings() as timings:
+        response = await call_next(request)
+    response.headers["Server-Timing"] = metrics.server_timing(timings, time.perf_counter() - start)
+    return response
+
+
+response_cache = ResponseCache(
+    recommender_settings.RESPONSE_CACHE_SIZE,
+    int(recommender_settings.RESPONSE_CACHE_MAX_MB * 1024 ** 2),
+    recommender_settings.RESPONSE_CACHE_GZIP,
+)
+
+
+def data_version() -> str:
+    """Version of the faculty data the read endpoints serve: ETags and response cache entries"""
+    if recommender_settings.DATA_VERSION:
+        return recommender_settings.DATA_VERSION
+    snap = serving_snapshot()
+    return repr(snap.version if snap is not None else snapshot.file_version(DB_PATH))
+
+
+@app.middleware("http")
+async def cached_responses(request: Request, call_next):
+    """
+    Pre-encoded bodies of the faculty read endpoints, with an ETag per data
+    version and request: a matching If-None-Match is a 304, the endpoint
+    doesn't run. Registered after server_timing, so hits skip it too.
+    """
+    if (not recommender_settings.RESPONSE_CACHE or request.method != "GET"
+            or not CACHED_PATHS.match(request.url.path)):
+        return await call_next(request)
+
+    version = data_version()
+    key = request_key(request.url.path, request.query_params.multi_items())
+    headers = {"ETag": etag(version, key), "Vary": "Accept-Encoding"}
+
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.get(version, key)
+    if entry is None:
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        entry = response_cache.set(version, key, body, response.headers)
+        if entry is None:
+            # Too large to keep: this response only
+            return Response(body, status_code=200, headers={**response.headers, **headers})
+
+    return entry.response(request.headers.get("accept-encoding"), headers)
+
+
+def check_fast_json():
+    """
+    RECOMMENDER_FAST_JSON needs orjson. Without it every list request would
+    fail, so the endpoints keep validating their rows instead (same bodies).
+    """
+    if not recommender_settings.FAST_JSON:
+        return
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        logger.warning("RECOMMENDER_FAST_JSON is set but orjson is not installed (pip install orjson), "
+                       "serving validated responses")
+        recommender_settings.FAST_JSON = False
+
+
 @app.on_event("startup")
 def startup_event():
-    load_all()
+    check_fast_json()
 
+    if recommender_settings.SNAPSHOT:
+        if recommender_settings.FAST_START:
+            # Served from SQLite until the snapshot is in
+            snapshot.start_load()
+        else:
+            snapshot.load()
+        startup_timer.mark("snapshot")
 
-JSON_FIELDS = {
-    "phone",
-    "email",
-    "teaching",
-    "publications",
-    "website_links",
-}
+    if recommender_settings.FAST_START:
+        # Serve right away; the recommender loads in a background thread
+        readiness.start_warmup()
+        startup_timer.mark("warmup_started")
+    else:
+        from pipeline.recommender.loader import load_all
+        load_all()
+        startup_timer.mark("load_all")
+    startup_timer.report()
 
 
-def parse_row(row: dict) -> dict:
-    data = dict(row)
-    for field in JSON_FIELDS:
-        value = data.get(field)
-        if value is None:
-            data[field] = None
-        else:
-            try:
-                data[field] = json.loads(value)
-            except Exception:
-                data[field] = None
-    return data
+def warming_response():
+    """
+    None once the recommender has loaded. Otherwise wait up to
+    WARMUP_WAIT_S for it, then return a 503 "warming" response.
+    """
+    if readiness.wait_loaded(recommender_settings.WARMUP_WAIT_S):
+        return None
+
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "5"},
+        content={
+            "status": "warming",
+            "detail": "Recommender is still loading, retry shortly",
+            "components": readiness.status(),
+        },
+    )
+
+
+# Fields of each response model, in its output order. FacultyOut lists the
+# columns of the faculty table; the *MatchOut models add the keyword
+# search's snippet.
+FACULTY_FIELDS = tuple(FacultyOut.model_fields)
+MATCH_FIELDS = tuple(FacultyMatchOut.model_fields)
+SUMMARY_FIELDS = tuple(FacultySummaryOut.model_fields)
+SUMMARY_MATCH_FIELDS = tuple(FacultySummaryMatchOut.model_fields)
+
+# view=summary answers with the summary models (fields= with a subset of
+# either). Only full rows are validated, and those match the first member:
+# left_to_right stops there instead of also trying the summary model.
+FacultyList = Annotated[Union[List[FacultyOut], List[FacultySummaryOut]], Field(union_mode="left_to_right")]
+FacultyMatchList = Annotated[
+    Union[List[FacultyMatchOut], List[FacultySummaryMatchOut]], Field(union_mode="left_to_right")
+]
+
+MAX_PAGE_SIZE = 1000
+
+
+class View(str, Enum):
+    full = "full"
+    summary = "summary"
+
+
+class ListParams:
+    """
+    Paging and projection of the faculty list endpoints:
+    - limit: page size (default: every row)
+    - after_id: keyset cursor, the last id of the previous page; a full
+      page links to the next one in a Link header
+    - fields: comma-separated columns to return (id always is); only these
+      are read from the database and JSON-decoded
+    - view=summary: the FacultySummaryOut fields, plus the snippet on the
+      keyword search (ignored with fields)
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after_id: Optional[int] = None,
+        fields: Optional[str] = None,
+        view: View = View.full,
+    ):
+        self.limit = limit
+        self.after_id = after_id
+        self.summary = False
+
+        # None: every column, validated through the endpoint's response_model
+        self.fields = None
+        if fields is not None:
+            requested = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = sorted(set(requested) - set(FACULTY_FIELDS))
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            self.fields = ("id",) + tuple(dict.fromkeys(field for field in requested if field != "id"))
+        elif view == View.summary:
+            self.summary = True
+            self.fields = SUMMARY_FIELDS
+
+    def columns(self, table: str = "faculty") -> str:
+        return ", ".join(f"{table}.{field}" for field in self.fields) if self.fields else f"{table}.*"
+
+
+def serving_snapshot():
+    """The faculty snapshot to answer from, None when reads go to SQLite"""
+    return snapshot.current() if recommender_settings.SNAPSHOT else None
+
+
+def snapshot_items(rows, page: ListParams) -> list:
+    # Snapshot rows are shared and read-only: every response gets new dicts
+    if page.fields is None:
+        return [dict(row) for row in rows]
+    return [{field: row[field] for field in page.fields} for row in rows]
+
+
+def select_page(db: Session, page: ListParams, where: str = "", params: dict = None) -> list:
+    """The page's faculty rows matching `where`, by id, JSON columns decoded"""
+    params = dict(params or {})
+    conditions = [where] if where else []
+    if page.after_id is not None:
+        conditions.append("id > :after_id")
+        params["after_id"] = page.after_id
+
+    sql = f"SELECT {page.columns()} FROM faculty"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY id"
+    if page.limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = page.limit
+
+    return [parse_row(row) for row in db.execute(text(sql), params).mappings()]
 
 
-@app.get("/faculty", response_model=List[FacultyOut])
-def get_all_faculty(db: Session = Depends(get_db)):
-    result = db.execute(text("SELECT * FROM faculty"))
-    rows = result.mappings().all()
-    return [parse_row(row) for row in rows]
+class FastJSONResponse(Response):
+    """JSON encoded by orjson (RECOMMENDER_FAST_JSON)"""
+
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        import orjson
+        return orjson.dumps(content)
+
+
+def model_row(row, model_fields: tuple = FACULTY_FIELDS) -> dict:
+    # What the response_model would output for a valid row: its fields, in its order
+    return {field: row.get(field) for field in model_fields}
+
+
+def page_response(items: list, page: ListParams, request: Request, response: Response,
+                  model_fields: tuple = FACULTY_FIELDS, summary_fields: tuple = SUMMARY_FIELDS):
+    """
+    The rows of a list endpoint. Every column: validated by its
+    response_model, or with RECOMMENDER_FAST_JSON trusted as they come from
+    the database and encoded directly. Projected: returned as they are, no
+    per-row model; the summary view as `summary_fields`.
+    """
+    headers = {}
+    if page.limit is not None and len(items) == page.limit:
+        next_page = request.url.include_query_params(after_id=items[-1]["id"])
+        headers["Link"] = f'<{next_page}>; rel="next"'
+
+    if page.summary:
+        items = [model_row(item, summary_fields) for item in items]
+
+    if recommender_settings.FAST_JSON:
+        if page.fields is None:
+            items = [model_row(item, model_fields) for item in items]
+        return FastJSONResponse(content=items, headers=headers)
+
+    if page.fields is None:
+        response.headers.update(headers)
+        return items
+    return JSONResponse(content=items, headers=headers)
+
+
+@app.get("/faculty", response_model=FacultyList)
+def get_all_faculty(request: Request, response: Response, page: ListParams = Depends(),
+                    db: Session = Depends(get_db)):
+    """All faculty by id; see ListParams for paging (limit, after_id) and projection (fields, view)"""
+    snap = serving_snapshot()
+    if snap is not None:
+        items = snapshot_items(snap.all(page.after_id, page.limit), page)
+    else:
+        items = select_page(db, page)
+    return page_response(items, page, request, response)
 
 
 @app.get("/faculty/{faculty_id}", response_model=FacultyOut)
 def get_faculty(faculty_id: int, db: Session = Depends(get_db)):
-    result = db.execute(
-        text("SELECT * FROM faculty WHERE id = :id"), {"id": faculty_id}
-    )
-    row = result.mappings().first()
-    if not row:
+    snap = serving_snapshot()
+    if snap is not None:
+        row = snap.get(faculty_id)
+    else:
+        result = db.execute(
+            text("SELECT * FROM faculty WHERE id = :id"), {"id": faculty_id}
+        )
+        row = result.mappings().first()
+        row = parse_row(row) if row else None
+
+    if row is None:
         raise HTTPException(status_code=404, detail="Faculty not found")
-    return parse_row(row)
-
-
-@app.get("/faculty/name/{faculty_name}", response_model=List[FacultyOut])
-def get_by_name(faculty_name: str, db: Session = Depends(get_db)):
-    result = db.execute(
-        text(
-            """
-        SELECT * FROM faculty 
-        WHERE LOWER(name) LIKE LOWER(:name)
-        """
-        ),
-        {"name": f"%{faculty_name}%"},
-    )
-    rows = result.mappings().all()
-    return [parse_row(row) for row in rows]
+    if recommender_settings.FAST_JSON:
+        return FastJSONResponse(content=model_row(row))
+    return dict(row)
+
+
+@app.get("/faculty/{faculty_id}/similar")
+def get_similar_faculty(faculty_id: int, k: int = Query(5, ge=1, le=recommender_settings.MAX_K)):
+    """
+    Faculty most similar to faculty_id, from the vector already indexed for
+    it (precomputed k-NN graph; no query encoding)
+    """
+    warming = warming_response()
+    if warming is not None:
+        return warming
+
+    from pipeline.recommender.search import similar_faculty
+    results = similar_faculty(faculty_id, k)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Faculty not found in the search index")
+
+    return {
+        "faculty_id": faculty_id,
+        "count": len(results),
+        "similar": results
+    }
+
+
+@app.get("/faculty/name/{faculty_name}", response_model=FacultyList)
+def get_by_name(faculty_name: str, request: Request, response: Response, page: ListParams = Depends(),
+                db: Session = Depends(get_db)):
+    snap = serving_snapshot()
+    if snap is not None:
+        items = snapshot_items(snap.named(faculty_name, page.after_id, page.limit), page)
+    else:
+        items = select_page(db, page, "LOWER(name) LIKE LOWER(:name)", {"name": f"%{faculty_name}%"})
+    return page_response(items, page, request, response)
 
 
 class FacultyType(str, Enum):
@@ -88,47 +364,118 @@ class FacultyType(str, Enum):
     professor_practice = "professor-practice"
 
 
-@app.get("/faculty/type/{faculty_type}", response_model=List[FacultyOut])
-def get_by_type(faculty_type: FacultyType, db: Session = Depends(get_db)):
-    result = db.execute(
-        text("SELECT * FROM faculty WHERE faculty_type = :t"), {"t": faculty_type.value}
-    )
-    rows = result.mappings().all()
-    return [parse_row(row) for row in rows]
+@app.get("/faculty/type/{faculty_type}", response_model=FacultyList)
+def get_by_type(faculty_type: FacultyType, request: Request, response: Response, page: ListParams = Depends(),
+                db: Session = Depends(get_db)):
+    snap = serving_snapshot()
+    if snap is not None:
+        items = snapshot_items(snap.of_type(faculty_type.value, page.after_id, page.limit), page)
+    else:
+        items = select_page(db, page, "faculty_type = :t", {"t": faculty_type.value})
+    return page_response(items, page, request, response)
 
 
-@app.get("/faculty/search/keyword/{keyword}", response_model=List[FacultyOut])
-def search_by_keyword(keyword: str, db: Session = Depends(get_db)):
+@app.get("/faculty/search/keyword/{keyword}", response_model=FacultyMatchList)
+def search_by_keyword(keyword: str, request: Request, response: Response, page: ListParams = Depends(),
+                      db: Session = Depends(get_db)):
     """
     Search for faculty by keyword in research, teaching, and specializations fields.
-    Returns all faculty members where the keyword appears in any of these fields.
+    Returns all faculty members where the keyword appears in any of these fields,
+    best match first (bm25) with a snippet of the matching text. Words match
+    whole, the last one (3+ letters) also as a prefix ("machine learn" finds
+    "machine learning").
+    Pages (after_id) follow that order.
     """
-    result = db.execute(
-        text(
-            """
-        SELECT * FROM faculty 
-        WHERE LOWER(research) LIKE LOWER(:keyword)
+    conn = db.connection()
+    if conn.exec_driver_sql(fts.EXISTS_SQL).first() is not None:
+        rows = fts.search(conn.connection.driver_connection, keyword, fts.KEYWORD_COLUMNS,
+                          select=page.fields, limit=page.limit, after_id=page.after_id)
+        return page_response([parse_row(row) for row in rows], page, request, response,
+                             MATCH_FIELDS, SUMMARY_MATCH_FIELDS)
+
+    # Databases loaded before the FTS5 index existed: substring scan, by id
+    items = select_page(
+        db,
+        page,
+        """(LOWER(research) LIKE LOWER(:keyword)
            OR LOWER(teaching) LIKE LOWER(:keyword)
-           OR LOWER(specializations) LIKE LOWER(:keyword)
-        """
-        ),
+           OR LOWER(specializations) LIKE LOWER(:keyword))""",
         {"keyword": f"%{keyword}%"},
     )
-    rows = result.mappings().all()
-    return [parse_row(row) for row in rows]
+    return page_response(items, page, request, response, MATCH_FIELDS, SUMMARY_MATCH_FIELDS)
 
 
 @app.get("/", include_in_schema=False)
 def root():
     return FileResponse("app/static/index.html")
 
+@app.get("/ready")
+def ready(response: Response, db: Session = Depends(get_db)):
+    """Readiness of the database and of each recommender component (503 until all are ready)"""
+    try:
+        db.execute(text("SELECT 1 FROM faculty LIMIT 1"))
+        database = {"state": "ready", "seconds": None, "error": None}
+    except Exception as e:
+        database = {"state": "failed", "seconds": None, "error": str(e)}
+
+    components = {"database": database, **readiness.status()}
+    is_ready = all(component["state"] == "ready" for component in components.values())
+
+    response.status_code = 200 if is_ready else 503
+    return {"ready": is_ready, "components": components}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Search stage latency histograms, candidate counts, fallbacks and cache hit rates (Prometheus)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/recommend")
-def recommend(query: str, k: int = 5):
+def recommend(
+    query: str,
+    k: int = Query(5, ge=1, le=recommender_settings.MAX_K),
+    faculty_type: Optional[List[FacultyType]] = Query(None),
+    min_citations: Optional[int] = None,
+    max_citations: Optional[int] = None,
+    min_works_count: Optional[int] = None,
+    max_works_count: Optional[int] = None,
+):
+    """
+    Semantic faculty search. Optional filters (repeat faculty_type for
+    several types; ranges are inclusive) are applied during the vector
+    search, so filtered queries still return up to k results.
+    """
 
     if not query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
-    results = search_faculty(query, k)
+    for low, high, field in (
+        (min_citations, max_citations, "citations"),
+        (min_works_count, max_works_count, "works_count"),
+    ):
+        if low is not None and high is not None and low > high:
+            raise HTTPException(status_code=400, detail=f"Empty {field} range: min > max")
+
+    warming = warming_response()
+    if warming is not None:
+        return warming
+
+    from pipeline.recommender.filters import SearchFilter
+    search_filter = SearchFilter(
+        faculty_types=[t.value for t in faculty_type] if faculty_type else None,
+        min_citations=min_citations,
+        max_citations=max_citations,
+        min_works_count=min_works_count,
+        max_works_count=max_works_count,
+    )
+
+    if recommender_settings.MICROBATCH_ENABLED:
+        from pipeline.recommender.batcher import search_faculty_microbatched
+        results = search_faculty_microbatched(query, k, search_filter)
+    else:
+        from pipeline.recommender.search import search_faculty
+        results = search_faculty(query, k, search_filter)
 
     return {
         "query": query,
@@ -136,4 +483,34 @@ def recommend(query: str, k: int = 5):
         "recommendations": results
     }
 
+
+@app.post("/recommend/batch")
+def recommend_batch(request: RecommendBatchRequest):
+
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="Queries cannot be empty")
+
+    for query in request.queries:
+        if not query.strip():
+            raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+    warming = warming_response()
+    if warming is not None:
+        return warming
+
+    from pipeline.recommender.search import search_faculty_batch
+    batch_results = search_faculty_batch(request.queries, request.k)
+
+    return {
+        "count": len(batch_results),
+        "results": [
+            {
+                "query": query,
+                "count": len(results),
+                "recommendations": results
+            }
+            for query, results in zip(request.queries, batch_results)
+        ]
+    }
+
     
\ No newline at end of file
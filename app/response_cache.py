@@ -0,0 +1,149 @@
+"""
+Pre-encoded responses of the faculty read endpoints.
+
+/faculty, /faculty/type/{type} and /faculty/{id} only change when the
+pipeline reloads the database, so their bodies are kept as bytes (and
+gzipped, once) per path and query string, for one data version: a
+pipeline run id (RECOMMENDER_DATA_VERSION) or the version of the
+database file / snapshot being served. A hit skips SQL, JSON decoding,
+validation and encoding.
+
+The ETag is derived from the data version and the request key, not from
+the body. A client revalidating with If-None-Match therefore gets its 304
+before the endpoint runs, whether or not the body is still cached.
+"""
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from starlette.responses import Response
+
+# Paths served from the cache (not /faculty/{id}/similar: it reads the search index)
+CACHED_PATHS = re.compile(r"^/faculty(/\d+|/type/[^/]+)?$")
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+# Not replayed from a cached response: recomputed per response, or per encoding
+_DROPPED_HEADERS = {"content-length", "content-encoding", "server-timing", "etag", "vary"}
+
+
+def request_key(path: str, query_items: list) -> tuple:
+    """Cache key of a request: its path and query parameters, in any order"""
+    return (path, tuple(sorted(query_items)))
+
+
+def etag(version: str, key: tuple) -> str:
+    digest = hashlib.blake2b(repr((version, key)).encode("utf-8"), digest_size=10).hexdigest()
+    # Weak: the plain and gzipped bodies are the same representation
+    return f'W/"{digest}"'
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    return "gzip" in (accept_encoding or "").lower()
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: str, tag: str) -> bool:
+    """If-None-Match against `tag`, by weak comparison (W/"x" matches "x")"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque(candidate) == _opaque(tag) for candidate in if_none_match.split(","))
+
+
+class CachedResponse:
+    def __init__(self, body: bytes, headers: dict, compress: bool = True):
+        self.body = body
+        self.headers = {name: value for name, value in headers.items() if name.lower() not in _DROPPED_HEADERS}
+        self.gzipped = None
+        if compress and len(body) >= GZIP_MIN_BYTES:
+            self.gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+    def response(self, accept_encoding: str, headers: dict) -> Response:
+        """The cached body (gzipped if the client takes it) with `headers` added"""
+        if self.gzipped is not None and accepts_gzip(accept_encoding):
+            return Response(self.gzipped, headers={**self.headers, **headers, "Content-Encoding": "gzip"})
+        return Response(self.body, headers={**self.headers, **headers})
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU of CachedResponse for the current data version, at most
+    `maxsize` entries and `max_bytes` of bodies. Setting an entry of a new
+    version drops every entry of the previous one.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int, compress: bool = True):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: str, key: tuple):
+        with self._lock:
+            entry = self._data.get(key) if version == self._version else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, version: str, key: tuple, body: bytes, headers: dict):
+        """Store a response body; returns the entry, None if it is too large to keep"""
+        if self.maxsize <= 0 or len(body) > self.max_bytes:
+            return None
+
+        entry = CachedResponse(body, headers, self.compress)
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._bytes = 0
+                self._version = version
+
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._data[key] = entry
+            self._bytes += entry.size
+
+            while self._data and (len(self._data) > self.maxsize or self._bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "version": self._version,
+            "size": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict
 
+from pipeline.recommender import settings
+
 class FacultyOut(BaseModel):
     id: int
     faculty_type: Optional[str]
@@ -24,3 +26,29 @@ class FacultyOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class FacultyMatchOut(FacultyOut):
+    # Matching text with the matched terms in **bold** (full-text search only)
+    snippet: Optional[str] = None
+
+
+class FacultySummaryOut(BaseModel):
+    # List views (view=summary): enough for a result card, the rest is at GET /faculty/{id}
+    id: int
+    name: Optional[str] = None
+    faculty_type: Optional[str] = None
+    specializations: Optional[str] = None
+    image_url: Optional[str] = None
+    citations: Optional[int] = None
+    works_count: Optional[int] = None
+
+
+class FacultySummaryMatchOut(FacultySummaryOut):
+    # Keyword search in the summary view keeps the matching text
+    snippet: Optional[str] = None
+
+
+class RecommendBatchRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=settings.MAX_BATCH_QUERIES)
+    k: int = Field(5, ge=1, le=settings.MAX_K)
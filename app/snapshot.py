@@ -0,0 +1,165 @@
+"""
+Immutable in-memory snapshot of the faculty table for the API read endpoints.
+
+The table only changes when the pipeline reruns, so with
+RECOMMENDER_SNAPSHOT=1 the API reads it once, decodes the JSON columns once
+and answers /faculty, /faculty/{id}, /faculty/name/... and /faculty/type/...
+from memory. A snapshot is never modified after it is built: rows are
+read-only mappings (responses copy them), the indexes are tuples and dicts
+nobody writes to. Readers take the module-level reference once and use
+that snapshot for the whole request, without locks.
+
+current() checks the database file (mtime, size, inode) at most every
+RECOMMENDER_SNAPSHOT_CHECK_S seconds. A change is loaded in a background
+thread while the old snapshot keeps serving, then swapped in with a single
+assignment.
+"""
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+
+from app.db import DB_PATH, parse_row
+from pipeline.recommender import settings
+from pipeline.recommender.log import ROOT_LOGGER, get_logger
+
+# Under the recommender's logger, for its handler and level
+logger = get_logger(f"{ROOT_LOGGER}.snapshot")
+
+
+def file_version(path: str) -> tuple:
+    """Identity of the database file's current contents, None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def normalize_name(name: str) -> str:
+    # Case-insensitive like the SQL endpoint's LOWER(name) LIKE LOWER('%...%')
+    return (name or "").lower()
+
+
+class FacultySnapshot:
+    """
+    The faculty table at one file version: rows in id order with their JSON
+    columns decoded, indexed by id, by faculty_type and by normalized name
+    """
+
+    def __init__(self, rows: list, version: tuple = None):
+        rows = sorted(rows, key=lambda row: row["id"])
+        self.version = version
+        self.rows = tuple(MappingProxyType(row) for row in rows)
+        self.ids = tuple(row["id"] for row in self.rows)
+        self.by_id = dict(zip(self.ids, self.rows))
+        self.names = tuple(normalize_name(row.get("name")) for row in self.rows)
+
+        by_type = {}
+        for position, row in enumerate(self.rows):
+            by_type.setdefault(row.get("faculty_type"), []).append(position)
+        # faculty_type -> (ids, rows), both in id order
+        self.by_type = {
+            faculty_type: (tuple(self.ids[p] for p in positions), tuple(self.rows[p] for p in positions))
+            for faculty_type, positions in by_type.items()
+        }
+
+    @classmethod
+    def load(cls, path: str = DB_PATH) -> "FacultySnapshot":
+        # The version is read first: a write during the load makes the next check reload
+        version = file_version(path)
+        conn = sqlite3.connect(path)
+        try:
+            cursor = conn.execute("SELECT * FROM faculty")
+            names = [description[0] for description in cursor.description]
+            rows = [parse_row(dict(zip(names, row))) for row in cursor]
+        finally:
+            conn.close()
+        return cls(rows, version)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, faculty_id: int):
+        return self.by_id.get(faculty_id)
+
+    def all(self, after_id: int = None, limit: int = None) -> tuple:
+        return _page(self.ids, self.rows, after_id, limit)
+
+    def of_type(self, faculty_type: str, after_id: int = None, limit: int = None) -> tuple:
+        ids, rows = self.by_type.get(faculty_type, ((), ()))
+        return _page(ids, rows, after_id, limit)
+
+    def named(self, text: str, after_id: int = None, limit: int = None) -> list:
+        """Rows whose name contains `text` (case-insensitive), in id order"""
+        needle = normalize_name(text)
+        start = 0 if after_id is None else bisect.bisect_right(self.ids, after_id)
+        matches = []
+        for position in range(start, len(self.rows)):
+            if needle in self.names[position]:
+                matches.append(self.rows[position])
+                if limit is not None and len(matches) == limit:
+                    break
+        return matches
+
+
+def _page(ids: tuple, rows: tuple, after_id: int = None, limit: int = None) -> tuple:
+    start = 0 if after_id is None else bisect.bisect_right(ids, after_id)
+    return rows[start:] if limit is None else rows[start:start + limit]
+
+
+_snapshot = None
+_checked_at = 0.0
+_reload_lock = threading.Lock()
+
+
+def load(path: str = DB_PATH):
+    """Load the snapshot now and swap it in (API startup)"""
+    global _snapshot, _checked_at
+
+    start = time.perf_counter()
+    snapshot = FacultySnapshot.load(path)
+    _snapshot = snapshot
+    _checked_at = time.monotonic()
+    logger.info("Faculty snapshot loaded", rows=len(snapshot), seconds=round(time.perf_counter() - start, 3))
+    return snapshot
+
+
+def _reload(path: str):
+    try:
+        load(path)
+    except Exception as e:
+        # Keep serving the previous snapshot; the next check retries
+        logger.exception("Faculty snapshot reload failed", error=str(e))
+    finally:
+        _reload_lock.release()
+
+
+def start_load(path: str = DB_PATH) -> bool:
+    """Load the snapshot in a background thread unless a load is running"""
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    threading.Thread(target=_reload, args=(path,), name="faculty-snapshot", daemon=True).start()
+    return True
+
+
+def current(path: str = DB_PATH):
+    """
+    The snapshot to answer this request from, None until the first one is
+    loaded. Starts a background reload when the database file changed.
+    """
+    global _checked_at
+
+    snapshot = _snapshot
+    if snapshot is None:
+        return None
+
+    now = time.monotonic()
+    if now - _checked_at >= settings.SNAPSHOT_CHECK_S:
+        _checked_at = now
+        version = file_version(path)
+        if version is not None and version != snapshot.version:
+            start_load(path)
+    return snapshot
@@ -0,0 +1,99 @@
+"""
+Benchmark: FAISS index types from index_factory against the flat baseline.
+
+Reports recall@k vs exact (IndexFlatIP) search, p50/p99 single-query search
+latency, build time and serialized index size on synthetic clustered
+corpora of normalized vectors.
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_ann_index.py
+    python pipeline/benchmarks/bench_ann_index.py --sizes 10000 100000 --types hnsw ivf_pq --dim 384
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender.index_factory import INDEX_TYPES, build_faiss_index, default_config
+
+
+def synthetic_corpus(n: int, dim: int, num_queries: int, seed: int):
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise"""
+    rng = np.random.default_rng(seed)
+    num_clusters = max(8, n // 500)
+    centers = rng.standard_normal((num_clusters, dim)).astype("float32")
+
+    vectors = np.empty((n, dim), dtype="float32")
+    for start in range(0, n, 100_000):
+        stop = min(n, start + 100_000)
+        labels = rng.integers(0, num_clusters, stop - start)
+        vectors[start:stop] = centers[labels] + 0.6 * rng.standard_normal((stop - start, dim)).astype("float32")
+    faiss.normalize_L2(vectors)
+
+    query_rows = rng.integers(0, n, num_queries)
+    queries = vectors[query_rows] + 0.3 * rng.standard_normal((num_queries, dim)).astype("float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    faiss.normalize_L2(queries)
+
+    return vectors, queries
+
+
+def single_query_latencies(index, queries: np.ndarray, k: int) -> np.ndarray:
+    latencies = []
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(n: int, dim: int, index_types: list, k: int, num_queries: int, seed: int):
+    vectors, queries = synthetic_corpus(n, dim, num_queries, seed)
+
+    flat, _ = build_faiss_index(vectors, default_config("flat"))
+    _, truth = flat.search(queries, k)
+
+    print(f"\n{n:,} vectors x {dim} dims, recall@{k} over {num_queries} queries")
+    for index_type in index_types:
+        start = time.perf_counter()
+        index, config = build_faiss_index(vectors, default_config(index_type))
+        build_s = time.perf_counter() - start
+
+        _, found = index.search(queries, k)
+        latencies = single_query_latencies(index, queries, k)
+        size_mb = faiss.serialize_index(index).nbytes / 1024 ** 2
+
+        print(
+            f"  {config['type']:<9} | recall {recall_at_k(found, truth):.3f} | "
+            f"p50 {np.percentile(latencies, 50):7.3f} ms | p99 {np.percentile(latencies, 99):7.3f} ms | "
+            f"memory {size_mb:9.1f} MB | build {build_s:7.1f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        run(n, args.dim, args.types, args.k, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
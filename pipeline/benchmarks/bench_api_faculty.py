@@ -0,0 +1,132 @@
+"""
+Benchmark: /faculty request throughput, response_model validation vs the
+orjson fast path (RECOMMENDER_FAST_JSON).
+
+For each --rows size, writes a synthetic faculty table (suite/corpus.py)
+into a project tree in a temporary directory and serves it from a fresh
+process (TestClient, without the recommender's startup). Every --paths
+request is replayed, one at a time, for --duration seconds (at least
+--min-requests times) per mode:
+- model: FastAPI validates each row through FacultyOut (default)
+- orjson: rows encoded directly by orjson (RECOMMENDER_FAST_JSON=1)
+and reports requests/s, rows/s, MB/s of body and median latency. The
+response cache is off, so every request runs the endpoint. --snapshot
+serves from the in-memory snapshot instead of SQLite. Both modes must
+return the same JSON.
+
+Usage (from project root; needs httpx and orjson):
+    python pipeline/benchmarks/bench_api_faculty.py
+    python pipeline/benchmarks/bench_api_faculty.py --rows 10000 --paths /faculty "/faculty?limit=100" --snapshot
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+PROJECT_ROOT = os.getcwd()
+sys.path.append(PROJECT_ROOT)
+
+from pipeline.benchmarks.suite.corpus import create_faculty_table
+from pipeline.recommender import settings
+
+# mode -> RECOMMENDER_FAST_JSON
+MODES = {"model": False, "orjson": True}
+
+
+def prepare_project(work_dir: str, rows: int) -> str:
+    """Project tree with a `rows` faculty table and a link to app/static (the app mounts it)"""
+    project_dir = os.path.join(work_dir, f"rows-{rows}")
+    create_faculty_table(os.path.join(project_dir, "pipeline", "outputs", "faculty.db"), rows)
+    os.makedirs(os.path.join(project_dir, "app"))
+    os.symlink(os.path.join(PROJECT_ROOT, "app", "static"), os.path.join(project_dir, "app", "static"))
+    return project_dir
+
+
+def replay(client, path: str, duration: float, min_requests: int) -> tuple:
+    """(stats, last body) of GET path repeated for `duration` seconds"""
+    latencies = []
+    stop_at = time.perf_counter() + duration
+    while len(latencies) < min_requests or time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = client.get(path)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {response.status_code} {response.text[:200]}")
+
+    body = response.content
+    rows = len(json.loads(body))
+    seconds = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / seconds,
+        "rows_per_s": rows * len(latencies) / seconds,
+        "mb_per_s": len(body) * len(latencies) / seconds / 1024 ** 2,
+        "p50_ms": statistics.median(latencies) * 1000,
+    }, body
+
+
+def run(project_dir: str, rows: int, args):
+    # The app resolves the database and app/static from the working directory
+    # when it is imported, hence a new process per size
+    os.chdir(project_dir)
+    settings.RESPONSE_CACHE = False
+    settings.SNAPSHOT = args.snapshot
+
+    from fastapi.testclient import TestClient
+    from app import snapshot
+    from app.main import app
+
+    if args.snapshot:
+        snapshot.load()
+
+    # Not `with TestClient(app)`: the startup event would load the recommender
+    client = TestClient(app)
+
+    print(f"\n{rows:,} rows ({'snapshot' if args.snapshot else 'SQLite'})")
+    print(f"  {'path':<28} {'mode':<7} | {'req/s':>8} {'rows/s':>11} {'MB/s':>8} {'p50 ms':>9} | speedup")
+    for path in args.paths:
+        results = {}
+        bodies = {}
+        for mode, fast_json in MODES.items():
+            settings.FAST_JSON = fast_json
+            results[mode], bodies[mode] = replay(client, path, args.duration, args.min_requests)
+
+        if json.loads(bodies["model"]) != json.loads(bodies["orjson"]):
+            raise RuntimeError(f"{path}: the orjson body differs from the model's")
+
+        for mode, stats in results.items():
+            speedup = stats["rps"] / results["model"]["rps"]
+            print(f"  {path:<28} {mode:<7} | {stats['rps']:8.2f} {stats['rows_per_s']:11,.0f} "
+                  f"{stats['mb_per_s']:8.1f} {stats['p50_ms']:9.2f} | {speedup:6.2f}x")
+        same_bytes = "identical" if bodies["model"] == bodies["orjson"] else "same JSON, different bytes"
+        print(f"  {'':<28} bodies: {same_bytes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--paths", nargs="+", default=["/faculty", "/faculty?limit=100"])
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per path and mode")
+    parser.add_argument("--min-requests", type=int, default=3)
+    parser.add_argument("--snapshot", action="store_true", help="serve from the in-memory snapshot")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory(prefix="faculty-api-bench-") as work_dir:
+        for rows in args.rows:
+            print(f"Creating synthetic faculty table with {rows:,} rows...", flush=True)
+            project_dir = prepare_project(work_dir, rows)
+            proc = ctx.Process(target=run, args=(project_dir, rows, args))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0:
+                sys.exit(f"Benchmark at {rows:,} rows failed (exit code {proc.exitcode})")
+
+
+if __name__ == "__main__":
+    main()
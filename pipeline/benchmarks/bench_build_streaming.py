@@ -0,0 +1,99 @@
+"""
+Benchmark: streaming, multi-process build_index on a synthetic faculty table.
+
+Creates a faculty table with --rows synthetic rows (suite/corpus.py, the
+schema of pipeline/transformation/load_to_db.py) in a temporary project
+tree and runs a full flat build in a fresh process for each configuration:
+- one chunk holding the whole table, one in-process encoder (how the build
+  worked before it was streamed)
+- streamed in --chunk-size chunks, one in-process encoder
+- streamed, one worker process per --workers value
+
+Reports wall time, rows/s and peak RSS of the build process and of its
+largest encode worker. The embedding cache is off, so every run encodes
+every row.
+
+--encoder model runs the real sentence-transformers model (slow on CPU for
+500k rows: use it with fewer --rows to measure scaling with cores).
+--encoder hash swaps in a cheap deterministic hashing encoder, which
+isolates the read / index / metadata pipeline and its memory use.
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_build_streaming.py --encoder hash
+    python pipeline/benchmarks/bench_build_streaming.py --encoder model --rows 20000 --workers 1 2 4 8
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+PROJECT_ROOT = os.getcwd()
+sys.path.append(PROJECT_ROOT)
+
+from pipeline.benchmarks.suite.corpus import create_faculty_table, hash_encode
+from pipeline.recommender import build_index as build
+from pipeline.recommender.encode_pool import encode_normalized
+from pipeline.recommender.index_factory import default_config
+
+
+def run_build(project_dir: str, encoder: str, workers: int, chunk_size: int, queue):
+    # build_index.py works with paths relative to the project root
+    os.chdir(project_dir)
+    encode_fn = hash_encode if encoder == "hash" else encode_normalized
+
+    start = time.perf_counter()
+    # The all-pairs k-NN graph would dominate the timing, it's not streamed
+    build.build_index(default_config("flat"), use_cache=False, workers=workers,
+                      chunk_size=chunk_size, neighbor_graph=False, encode_fn=encode_fn)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    main_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    worker_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    queue.put((elapsed, main_mb, worker_mb))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=2048)
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="worker process counts to run streamed builds with")
+    parser.add_argument("--encoder", choices=("model", "hash"), default="model")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as project_dir:
+        db_path = os.path.join(project_dir, build.DB_PATH)
+        print(f"Creating synthetic faculty table with {args.rows:,} rows...")
+        create_faculty_table(db_path, args.rows)
+        print(f"  {os.path.getsize(db_path) / 1024 ** 2:.0f} MB")
+
+        runs = [("whole table, in-process", 1, args.rows), ("streamed, in-process", 1, args.chunk_size)]
+        runs += [(f"streamed, {w} workers", w, args.chunk_size) for w in args.workers if w > 1]
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        results = []
+
+        for label, workers, chunk_size in runs:
+            proc = ctx.Process(target=run_build, args=(project_dir, args.encoder, workers, chunk_size, queue))
+            proc.start()
+            elapsed, main_mb, worker_mb = queue.get()
+            proc.join()
+            results.append((label, elapsed, main_mb, worker_mb))
+
+        print(f"\n{args.rows:,} rows, {args.encoder} encoder, chunks of {args.chunk_size}")
+        for label, elapsed, main_mb, worker_mb in results:
+            workers_note = f" | worker peak RSS {worker_mb:8.0f} MB" if "workers" in label else ""
+            print(
+                f"  {label:<24} | {elapsed:8.1f}s | {args.rows / elapsed:9.0f} rows/s | "
+                f"peak RSS {main_mb:8.0f} MB{workers_note}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark: fp32 PyTorch SentenceTransformer vs the int8 ONNX encoder.
+
+Reports single-query and batched encode latency for each backend, and
+checks retrieval agreement on a fixed query set: top-k faculty for every
+query with the int8 encoder vs the fp32 model, over the faculty texts in the
+database. Two overlaps are checked against --min-overlap:
+- query only: int8 queries against the fp32 corpus embeddings (serving with
+  onnx-int8 against an index built with torch)
+- query + corpus: int8 queries against int8 corpus embeddings (index rebuilt
+  with onnx-int8)
+Exits with status 1 if either mean overlap is below the threshold.
+
+The ONNX model is exported on first run (needs torch, sentence-transformers
+and onnxruntime).
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_encoder.py
+    python pipeline/benchmarks/bench_encoder.py --k 10 --min-overlap 0.95 --threads 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender import settings
+from pipeline.recommender.build_index import fetch_faculty
+from pipeline.recommender.encoders import (
+    MODEL_NAME,
+    OnnxEncoder,
+    TorchEncoder,
+    export_onnx,
+    onnx_exported,
+)
+
+QUERIES = [
+    "machine learning",
+    "deep learning for computer vision",
+    "signal processing",
+    "wireless communication systems",
+    "VLSI design",
+    "embedded systems",
+    "natural language processing",
+    "information retrieval",
+    "network security",
+    "cryptography",
+    "graph algorithms",
+    "theoretical computer science",
+    "optimization",
+    "control theory",
+    "robotics",
+    "data science and statistics",
+    "image processing",
+    "speech recognition",
+    "quantum computing",
+    "computational biology",
+    "human computer interaction",
+    "software engineering",
+    "distributed systems",
+    "databases and big data",
+    "economics and game theory",
+    "professor working on climate and environment",
+    "who teaches probability",
+    "research on social networks",
+    "internet of things sensors",
+    "energy efficient hardware",
+]
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype="float32")
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def latencies_ms(encoder, queries: list, batch_size: int, repeat: int) -> tuple:
+    encoder.encode(queries[:batch_size], batch_size=batch_size)  # warm up
+
+    single = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            encoder.encode([query])
+            single.append((time.perf_counter() - start) * 1000)
+
+    batched = []
+    for _ in range(repeat):
+        for start_row in range(0, len(queries), batch_size):
+            batch = queries[start_row:start_row + batch_size]
+            start = time.perf_counter()
+            encoder.encode(batch, batch_size=batch_size)
+            batched.append((time.perf_counter() - start) * 1000 / len(batch))
+
+    return np.array(single), np.array(batched)
+
+
+def top_k(query_vecs: np.ndarray, corpus_vecs: np.ndarray, k: int) -> list:
+    scores = query_vecs @ corpus_vecs.T
+    return [set(np.argsort(-row, kind="stable")[:k].tolist()) for row in scores]
+
+
+def mean_overlap(found: list, truth: list, k: int) -> float:
+    return float(np.mean([len(f & t) / k for f, t in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over the query set for latency")
+    parser.add_argument("--threads", type=int, default=settings.ONNX_THREADS,
+                        help="onnxruntime intra-op threads (0 = default)")
+    parser.add_argument("--min-overlap", type=float, default=settings.ONNX_MIN_OVERLAP)
+    args = parser.parse_args()
+
+    if not onnx_exported(settings.ONNX_MODEL_DIR):
+        export_onnx(MODEL_NAME, settings.ONNX_MODEL_DIR)
+
+    encoders = {
+        "torch-fp32": TorchEncoder(MODEL_NAME, device="cpu"),
+        "onnx-int8": OnnxEncoder(settings.ONNX_MODEL_DIR, threads=args.threads),
+    }
+
+    queries = QUERIES * max(1, args.batch_size // len(QUERIES))
+    print(f"Encode latency, {len(QUERIES)} queries x {args.repeat} passes (CPU)")
+    for name, encoder in encoders.items():
+        single, batched = latencies_ms(encoder, queries, args.batch_size, args.repeat)
+        print(
+            f"  {name:<10} | single p50 {np.percentile(single, 50):7.2f} ms, "
+            f"p99 {np.percentile(single, 99):7.2f} ms | "
+            f"batch of {args.batch_size}: {np.mean(batched):6.2f} ms/query"
+        )
+
+    _, texts, _, _ = fetch_faculty()
+    print(f"\nTop-{args.k} overlap with torch-fp32 over {len(texts)} faculty texts")
+
+    fp32, int8 = encoders["torch-fp32"], encoders["onnx-int8"]
+    corpus_fp32 = normalized(fp32.encode(texts, batch_size=64))
+    corpus_int8 = normalized(int8.encode(texts, batch_size=64))
+    queries_fp32 = normalized(fp32.encode(QUERIES))
+    queries_int8 = normalized(int8.encode(QUERIES))
+
+    truth = top_k(queries_fp32, corpus_fp32, args.k)
+    overlaps = {
+        "query only": mean_overlap(top_k(queries_int8, corpus_fp32, args.k), truth, args.k),
+        "query + corpus": mean_overlap(top_k(queries_int8, corpus_int8, args.k), truth, args.k),
+    }
+    cosine = float(np.mean(np.sum(queries_fp32 * queries_int8, axis=1)))
+
+    failed = False
+    for name, overlap in overlaps.items():
+        status = "ok" if overlap >= args.min_overlap else "BELOW THRESHOLD"
+        failed = failed or overlap < args.min_overlap
+        print(f"  {name:<14} | mean overlap {overlap:.3f} (min {args.min_overlap:.2f}) {status}")
+    print(f"  mean fp32/int8 query cosine {cosine:.4f}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark: candidates from the combined-text index vs the per-field index.
+
+For a fixed query set, retrieves search_k candidates per query from each
+index (one batched search per configuration) and reports:
+- recall of relevant faculty among the candidates, where relevant means the
+  query terms all appear in research / topics / specializations (a lexical
+  proxy, but one the combined text loses when long biographies push those
+  fields past the encoder's max sequence length)
+- search latency per query batch
+at several search_k = k * factor values, so the combined index at the old
+k * 10 can be compared with the field index at settings.FIELD_SEARCH_K_FACTOR.
+
+Usage (from project root, after build_index.py with the field index):
+    python pipeline/benchmarks/bench_field_index.py
+    python pipeline/benchmarks/bench_field_index.py --k 10 --factors 2 3 5 10
+"""
+import argparse
+import os
+import sys
+import time
+
+import faiss
+import numpy as np
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender import settings
+from pipeline.recommender.loader import get_all, get_field_index, get_id_positions, load_all
+
+QUERIES = [
+    "machine learning", "deep learning", "signal processing", "computer vision",
+    "wireless communication", "natural language processing", "cryptography",
+    "graph algorithms", "embedded systems", "information retrieval",
+    "quantum computing", "image processing", "distributed systems",
+    "optimization", "data mining", "robotics", "VLSI design", "network security",
+    "control systems", "software engineering",
+]
+
+RELEVANCE_FIELDS = ("research", "topics", "specializations")
+
+
+def relevant_ids(query: str, metadata) -> set:
+    terms = query.lower().split()
+    relevant = set()
+    for pos in range(len(metadata)):
+        text = " ".join((metadata.value(field, pos) or "") for field in RELEVANCE_FIELDS).lower()
+        if all(term in text for term in terms):
+            relevant.add(int(metadata.ids[pos]))
+    return relevant
+
+
+def recall(candidate_lists: list, relevant_sets: list, search_k: int) -> float:
+    recalls = [
+        len(set(candidates) & relevant) / min(len(relevant), search_k)
+        for candidates, relevant in zip(candidate_lists, relevant_sets)
+        if relevant
+    ]
+    return float(np.mean(recalls)) if recalls else float("nan")
+
+
+def combined_candidates(index, query_vecs: np.ndarray, search_k: int, metadata) -> list:
+    _, labels = index.search(query_vecs, search_k)
+    id_mapped = get_id_positions() is not None
+    return [
+        [int(label) if id_mapped else int(metadata.ids[label]) for label in row if label != -1]
+        for row in labels
+    ]
+
+
+def field_candidates(field_index, query_vecs: np.ndarray, search_k: int) -> list:
+    hit_lists = field_index.search(query_vecs, [search_k] * len(query_vecs))
+    return [[fid for fid, _ in hits] for hits in hit_lists]
+
+
+def timed(fn, *args, repeats: int = 5):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn(*args)
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--factors", type=int, nargs="+", default=[2, settings.FIELD_SEARCH_K_FACTOR, 5, 10])
+    args = parser.parse_args()
+
+    load_all()
+    model, index, metadata = get_all()
+    field_index = get_field_index()
+    if index is None or field_index is None:
+        print("❌ Needs a build with the field index (build_index.py without --no-field-index)")
+        sys.exit(1)
+
+    query_vecs = np.ascontiguousarray(model.encode(QUERIES, convert_to_numpy=True), dtype="float32")
+    faiss.normalize_L2(query_vecs)
+    relevant_sets = [relevant_ids(query, metadata) for query in QUERIES]
+
+    print(f"\n{len(metadata)} faculty, {len(QUERIES)} queries "
+          f"({sum(1 for r in relevant_sets if r)} with relevant faculty), k={args.k}")
+    print(f"Field weights: {settings.FIELD_WEIGHTS}")
+
+    for factor in sorted(set(args.factors)):
+        search_k = min(args.k * factor, len(metadata))
+        combined, combined_ms = timed(combined_candidates, index, query_vecs, search_k, metadata)
+        fields, fields_ms = timed(field_candidates, field_index, query_vecs, search_k)
+
+        print(
+            f"  search_k={search_k:<5} | combined recall {recall(combined, relevant_sets, search_k):.3f} "
+            f"({combined_ms:6.2f} ms) | fields recall {recall(fields, relevant_sets, search_k):.3f} "
+            f"({fields_ms:6.2f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark: FTS5 MATCH vs LOWER(col) LIKE '%kw%' on a synthetic faculty table.
+
+Creates a --rows synthetic faculty table (suite/corpus.py) in a temporary
+directory, or uses --db, builds the FTS5 index (fts.py) and times, per query:
+- keyword: the keyword endpoint's query, every matching row
+  (LIKE over research / teaching / specializations vs a phrase-prefix MATCH
+  on those columns, bm25-ordered, with snippets)
+- fallback: search.py's database fallback, first --k rows
+  (LIKE over five columns, unranked, vs a phrase MATCH topped up with
+  any-word matches, bm25-ordered, with snippets)
+
+The queries cover a common phrase, a prefix, a name, a rare word and a
+word that matches nothing (the worst case of LIKE: a full scan).
+Reports index build time and size, median latency of each path over
+--repeats runs and the rows each returned. LIKE with a LIMIT stops at the
+first rows it finds, in table order; MATCH ranks every match first, so
+for very common words the fallback trades some latency for ranking.
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_fts.py
+    python pipeline/benchmarks/bench_fts.py --rows 100000 --repeats 20
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.benchmarks.suite.corpus import create_faculty_table
+from pipeline.recommender import fts
+
+QUERIES = (
+    "machine learning",
+    "quantum comp",
+    "Mehta",
+    "blockchain",
+    "zeolite",
+)
+
+KEYWORD_LIKE = """
+    SELECT * FROM faculty
+    WHERE LOWER(research) LIKE LOWER(?)
+       OR LOWER(teaching) LIKE LOWER(?)
+       OR LOWER(specializations) LIKE LOWER(?)
+"""
+
+FALLBACK_LIKE = """
+    SELECT * FROM faculty
+    WHERE LOWER(name) LIKE ? OR LOWER(research) LIKE ? OR LOWER(topics) LIKE ?
+       OR LOWER(specializations) LIKE ? OR LOWER(faculty_type) LIKE ?
+    LIMIT ?
+"""
+
+
+def timed(fetch, repeats: int) -> tuple:
+    """(median ms, rows returned) of fetch()"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = fetch()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), len(rows)
+
+
+def fallback_match(conn, query: str, k: int) -> list:
+    """The fallback's FTS5 path: the phrase, topped up with any-word matches"""
+    rows = []
+    for any_term in (False, True):
+        seen = {row["id"] for row in rows}
+        rows += [row for row in fts.search(conn, query, any_term=any_term, limit=k + len(seen))
+                 if row["id"] not in seen]
+        if len(rows) >= k or len(fts.words(query)) < 2:
+            break
+    return rows[:k]
+
+
+def run(db_path: str, args):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0]
+    size_before = os.path.getsize(db_path)
+
+    start = time.perf_counter()
+    fts.create_index(conn)
+    build_seconds = time.perf_counter() - start
+    conn.execute("VACUUM")
+    index_mb = (os.path.getsize(db_path) - size_before) / 1024 ** 2
+
+    print(f"\n{rows:,} rows | FTS5 index built in {build_seconds:.1f}s, ~{index_mb:.0f} MB")
+    print(f"  {'query':<18} {'path':<9} | {'LIKE ms':>9} {'rows':>8} | {'MATCH ms':>9} {'rows':>8} | speedup")
+
+    for query in QUERIES:
+        pattern = f"%{query.lower()}%"
+
+        like = timed(lambda: conn.execute(KEYWORD_LIKE, (pattern,) * 3).fetchall(), args.repeats)
+        match = timed(lambda: fts.search(conn, query, fts.KEYWORD_COLUMNS), args.repeats)
+        print(f"  {query:<18} {'keyword':<9} | {like[0]:9.2f} {like[1]:8} | {match[0]:9.2f} {match[1]:8} | "
+              f"{like[0] / match[0]:6.1f}x")
+
+        like = timed(lambda: conn.execute(FALLBACK_LIKE, (pattern,) * 5 + (args.k,)).fetchall(), args.repeats)
+        match = timed(lambda: fallback_match(conn, query, args.k), args.repeats)
+        print(f"  {'':<18} {'fallback':<9} | {like[0]:9.2f} {like[1]:8} | {match[0]:9.2f} {match[1]:8} | "
+              f"{like[0] / match[0]:6.1f}x")
+
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", help="existing faculty database to index and query (modified in place)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5, help="rows fetched by the fallback queries")
+    args = parser.parse_args()
+
+    if args.db:
+        run(args.db, args)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "faculty.db")
+        print(f"Creating synthetic faculty table with {args.rows:,} rows...")
+        create_faculty_table(db_path, args.rows)
+        run(db_path, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Benchmark: pickled list-of-dicts metadata vs the columnar MetadataStore.
+
+Reports, for a synthetic corpus:
+- resident memory after loading the metadata (each mode in a fresh process)
+- per-query peak traced allocation and live allocated blocks for candidate
+  assembly + hybrid rerank + building the top-k results
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_metadata_store.py
+    python pipeline/benchmarks/bench_metadata_store.py --rows 500000 --k 10
+"""
+import argparse
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+import tempfile
+import tracemalloc
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender.metadata_store import MetadataStore
+from pipeline.recommender.search import hybrid_search_rerank, _materialize
+from pipeline.recommender.text_features import TextFeatures
+
+WORDS = (
+    "learning machine signal processing wireless networks vlsi design security "
+    "graph algorithms optimization vision image retrieval systems data quantum "
+    "communication embedded control theory statistics language models"
+).split()
+
+QUERY = "signal processing"
+
+
+def synthetic_records(rows: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    return [
+        {
+            "id": i + 1,
+            "name": f"Faculty {i + 1}",
+            "faculty_type": rng.choice(["faculty", "adjunct-faculty"]),
+            "education": f"PhD ({text(3)})",
+            "research": text(12),
+            "specializations": text(8),
+            "teaching": '["' + text(4) + '"]',
+            "email": '["someone@example.org"]',
+            "phone": '{"landline": ["0796826000"]}',
+            "address": "# 1224, FB-1, Gandhinagar",
+            "image_url": "https://example.org/img.png",
+            "publications": '["' + '", "'.join(text(10) for _ in range(10)) + '"]',
+            "website_links": "{}",
+            "citations": rng.randint(0, 5000),
+            "works_count": rng.randint(0, 300),
+            "topics": ", ".join(text(2) for _ in range(3)),
+        }
+        for i in range(rows)
+    ]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def legacy_rerank(query: str, candidates: list) -> list:
+    """The dict-copying hybrid_search_rerank used with metadata.pkl"""
+    query_lower = query.lower().strip()
+    query_terms = query_lower.split()
+    exact, keyword, semantic = [], [], []
+
+    for faculty in candidates:
+        if faculty.get("name") and faculty["name"].lower() == query_lower:
+            faculty_copy = faculty.copy()
+            faculty_copy["_hybrid_score"] = 1.0
+            faculty_copy["_match_type"] = "exact_name"
+            exact.append(faculty_copy)
+            continue
+        if faculty.get("name") and query_lower in faculty["name"].lower():
+            keyword.append({"faculty": faculty.copy(), "score": 0.95})
+            continue
+        if faculty.get("topics"):
+            topics_lower = faculty["topics"].lower()
+            terms_found = sum(1 for term in query_terms if term in topics_lower)
+            if terms_found > 0:
+                keyword.append({"faculty": faculty.copy(), "score": 0.90 * terms_found / len(query_terms)})
+                continue
+        score = 0
+        if faculty.get("research") and query_lower in faculty["research"].lower():
+            score = max(score, 0.85)
+        if faculty.get("specializations") and query_lower in faculty["specializations"].lower():
+            score = max(score, 0.82)
+        if score > 0:
+            keyword.append({"faculty": faculty.copy(), "score": score})
+            continue
+        if faculty.get("similarity_score") and faculty["similarity_score"] > 0.5:
+            faculty_copy = faculty.copy()
+            faculty_copy["_hybrid_score"] = faculty["similarity_score"]
+            faculty_copy["_match_type"] = "semantic"
+            semantic.append(faculty_copy)
+
+    combined = exact + [m["faculty"] for m in sorted(keyword, key=lambda x: x["score"], reverse=True)] + semantic
+    seen, deduped = set(), []
+    for faculty in combined:
+        if faculty["id"] not in seen:
+            faculty.setdefault("_hybrid_score", faculty["similarity_score"])
+            deduped.append(faculty)
+            seen.add(faculty["id"])
+    deduped.sort(key=lambda x: x["_hybrid_score"], reverse=True)
+    return deduped
+
+
+def legacy_query(metadata: list, hits: list, k: int) -> list:
+    candidates = []
+    for pos, score in hits:
+        faculty = metadata[pos].copy()
+        faculty["similarity_score"] = score
+        candidates.append(faculty)
+    return legacy_rerank(QUERY, candidates)[:k]
+
+
+def store_query(store: MetadataStore, features: TextFeatures, hits: list, k: int) -> list:
+    return _materialize(store, hybrid_search_rerank(QUERY, hits, store, features)[:k])
+
+
+def measure_allocations(fn) -> tuple:
+    fn()  # warm up
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return peak / 1024, blocks
+
+
+def child(mode: str, data_dir: str, k: int, queue):
+    base = rss_mb()
+    if mode == "pickle":
+        with open(os.path.join(data_dir, "metadata.pkl"), "rb") as f:
+            metadata = pickle.load(f)
+    else:
+        metadata = MetadataStore.open(data_dir)
+    loaded = rss_mb() - base
+
+    rng = random.Random(7)
+    hits = [(rng.randrange(len(metadata)), rng.uniform(0.3, 0.9)) for _ in range(k * 10)]
+
+    if mode == "pickle":
+        peak_kb, blocks = measure_allocations(lambda: legacy_query(metadata, hits, k))
+    else:
+        features = TextFeatures(metadata)
+        peak_kb, blocks = measure_allocations(lambda: store_query(metadata, features, hits, k))
+
+    queue.put((mode, loaded, peak_kb, blocks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.rows)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        with open(os.path.join(data_dir, "metadata.pkl"), "wb") as f:
+            pickle.dump(records, f)
+        MetadataStore.write(records, data_dir)
+        del records
+
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        print(f"{args.rows:,} records, k={args.k} ({args.k * 10} candidates per query)")
+
+        for mode in ("pickle", "store"):
+            proc = ctx.Process(target=child, args=(mode, data_dir, args.k, queue))
+            proc.start()
+            mode, loaded, peak_kb, blocks = queue.get()
+            proc.join()
+            print(
+                f"  {mode:<6} | resident after load {loaded:8.1f} MB | "
+                f"per query: peak alloc {peak_kb:8.1f} KB, {blocks:6d} live blocks"
+            )
+
+
+if __name__ == "__main__":
+    main()
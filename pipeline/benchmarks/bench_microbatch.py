@@ -0,0 +1,102 @@
+"""
+Load test: per-request search_faculty vs the micro-batching scheduler.
+
+Runs N client threads (like FastAPI's threadpool under load) against each
+path for a fixed duration and reports QPS and latency percentiles.
+
+Usage (from project root, after build_index.py):
+    python pipeline/benchmarks/bench_microbatch.py
+    python pipeline/benchmarks/bench_microbatch.py --threads 8 32 --duration 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender import settings
+from pipeline.recommender.loader import load_all
+from pipeline.recommender.search import search_faculty, search_faculty_many
+from pipeline.recommender.batcher import MicroBatcher
+
+# Topic-style queries only, so every call reaches the encoder
+QUERIES = [
+    "machine learning", "VLSI design", "signal processing", "computer vision",
+    "wireless communication", "natural language processing", "cryptography",
+    "graph algorithms", "embedded systems", "information retrieval",
+    "quantum computing", "image processing", "distributed systems",
+    "optimization", "data mining", "robotics",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_load(search_fn, threads: int, duration: float) -> dict:
+    latencies = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(offset: int):
+        i = offset
+        local = []
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            search_fn(QUERIES[i % len(QUERIES)], 5)
+            local.append((time.perf_counter() - start) * 1000)
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=client, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    return {
+        "qps": len(latencies) / duration,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--window-ms", type=float, default=settings.BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch-size", type=int, default=settings.MAX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    load_all()
+    batcher = MicroBatcher(search_faculty_many, args.window_ms, args.max_batch_size)
+
+    # Silence the per-query prints so they don't dominate the measurement
+    stdout = sys.stdout
+    print(f"window={args.window_ms}ms max_batch_size={args.max_batch_size}")
+
+    for threads in args.threads:
+        sys.stdout = open(os.devnull, "w")
+        try:
+            direct = run_load(search_faculty, threads, args.duration)
+            batched = run_load(batcher.submit, threads, args.duration)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+        print(
+            f"{threads:>3} threads | "
+            f"per-request {direct['qps']:7.1f} qps (p50 {direct['p50']:7.1f} ms, p99 {direct['p99']:7.1f} ms) | "
+            f"micro-batched {batched['qps']:7.1f} qps (p50 {batched['p50']:7.1f} ms, p99 {batched['p99']:7.1f} ms) | "
+            f"gain {batched['qps'] / direct['qps']:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
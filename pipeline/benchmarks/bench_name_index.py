@@ -0,0 +1,111 @@
+"""
+Benchmark: name lookup in search_faculty, linear scan + difflib vs NameIndex.
+
+Usage (from project root):
+    python pipeline/benchmarks/bench_name_index.py
+    python pipeline/benchmarks/bench_name_index.py --sizes 1000 100000 --queries 50
+"""
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender.name_index import NameIndex
+
+SYLLABLES = [
+    "an", "ra", "vi", "ka", "sh", "mi", "ta", "ni", "ja", "ya",
+    "pr", "su", "de", "ma", "ha", "li", "ro", "ga", "ve", "ba",
+    "kum", "dev", "esh", "ram", "pat", "sin", "gho", "tri", "chu", "nak",
+    "bho", "wal", "zer", "qui", "fel", "lop", "mur", "thy", "oxe", "pul",
+]
+
+
+def synthetic_name(rng: random.Random) -> str:
+    def word():
+        return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f"{word()} {word()}"
+
+
+def make_typo(rng: random.Random, name: str) -> str:
+    pos = rng.randrange(len(name))
+    return name[:pos] + rng.choice("aeiou") + name[pos + 1:]
+
+
+def make_queries(rng: random.Random, names: list, count: int) -> list:
+    queries = []
+    for i in range(count):
+        name = rng.choice(names)
+        kind = i % 3
+        if kind == 0:
+            queries.append(name.lower())           # exact (case-insensitive)
+        elif kind == 1:
+            queries.append(make_typo(rng, name))   # fuzzy
+        else:
+            queries.append("machine learning")     # no name match
+    return queries
+
+
+def legacy_lookup(metadata: list, query: str) -> list:
+    """The per-query path search_faculty used before the name index."""
+    query_lower = query.lower().strip()
+    exact_matches = [
+        f for f in metadata
+        if f.get("name") and f["name"].lower().strip() == query_lower
+    ]
+    if not exact_matches:
+        all_names = [f["name"] for f in metadata if f.get("name")]
+        close_names = difflib.get_close_matches(query, all_names, n=3, cutoff=0.7)
+        exact_matches = [f for f in metadata if f.get("name") in close_names]
+    return exact_matches
+
+
+def time_queries(fn, queries: list) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def run(size: int, num_queries: int, legacy_queries: int, seed: int):
+    rng = random.Random(seed)
+    metadata = [{"id": i + 1, "name": synthetic_name(rng)} for i in range(size)]
+    names = [f["name"] for f in metadata]
+    queries = make_queries(rng, names, num_queries)
+
+    start = time.perf_counter()
+    name_index = NameIndex.from_metadata(metadata)
+    build_s = time.perf_counter() - start
+
+    indexed_ms = time_queries(name_index.lookup, queries)
+    legacy_ms = time_queries(lambda q: legacy_lookup(metadata, q), queries[:legacy_queries])
+
+    print(
+        f"{size:>9,} names | build {build_s:7.2f}s | "
+        f"legacy {legacy_ms:10.2f} ms/query | "
+        f"indexed {indexed_ms:8.3f} ms/query | "
+        f"speedup {legacy_ms / indexed_ms:8.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument(
+        "--legacy-queries", type=int, default=9,
+        help="queries timed on the legacy path (it takes seconds per query at 1M names)",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.queries, args.legacy_queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare two benchmark suite reports (run.py --output).
+
+Prints every metric both reports measured, with its relative change, and
+flags changes beyond --threshold percent as regressions or improvements
+(qps and rows/s: higher is better; seconds, latencies and RSS: lower).
+Exits with status 1 when there is a regression, for use in CI.
+
+Usage (from project root):
+    python pipeline/benchmarks/suite/compare.py before.json after.json
+    python pipeline/benchmarks/suite/compare.py before.json after.json --threshold 5 --only-flagged
+"""
+import argparse
+import os
+import sys
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.benchmarks.suite.report import compare, load_report
+
+
+def print_comparison(baseline: dict, current: dict, threshold: float = 10.0,
+                     only_flagged: bool = False, file=sys.stdout) -> int:
+    """Print the comparison table; returns the number of regressions"""
+    rows = compare(baseline, current, threshold)
+    width = max((len(metric) for metric, *_ in rows), default=6)
+
+    print(f"baseline {baseline['environment'].get('commit')} -> current {current['environment'].get('commit')}, "
+          f"threshold {threshold:g}%", file=file)
+    for metric, before, after, change, verdict in rows:
+        if only_flagged and not verdict:
+            continue
+        print(f"  {metric:<{width}} {before:12.3f} -> {after:12.3f} {change:+8.1f}%  {verdict}", file=file)
+
+    regressions = sum(verdict == "regression" for *_, verdict in rows)
+    improvements = sum(verdict == "improvement" for *_, verdict in rows)
+    print(f"{regressions} regression(s), {improvements} improvement(s) in {len(rows)} metrics", file=file)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged")
+    parser.add_argument("--only-flagged", action="store_true", help="only print flagged metrics")
+    args = parser.parse_args()
+
+    regressions = print_comparison(load_report(args.baseline), load_report(args.current),
+                                   args.threshold, args.only_flagged)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Synthetic faculty tables and the fixed query mix of the benchmark suite.
+
+Tables use the schema of pipeline/transformation/load_to_db.py. Names are
+drawn from first / last name pools (with a middle initial), topics and
+research from a pool of research phrases, so exact names, misspelled names,
+known topics and free text all have something to match at every size. The
+same seed gives the same table and the same queries.
+"""
+import hashlib
+import os
+import random
+import sqlite3
+
+import numpy as np
+
+# Table sizes the suite runs by default, by label
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+HASH_DIM = 768
+
+FIRST_NAMES = (
+    "Aarav Aditi Amit Ananya Anil Anjali Arjun Asha Bhavin Chetan Deepa Devika "
+    "Dhruv Gauri Harsh Isha Jayesh Kavita Kiran Lakshmi Manish Meera Mihir Nandini "
+    "Neha Nikhil Pooja Pranav Rahul Rajesh Ritu Rohan Sanjay Shreya Sneha Sunil "
+    "Tanvi Uday Varun Vidya Vikram Yash Zara Maria John Elena David Sofia Thomas"
+).split()
+
+LAST_NAMES = (
+    "Agarwal Banerjee Bhatt Chatterjee Desai Dutta Gandhi Ghosh Gupta Iyer Jain "
+    "Joshi Kapoor Kulkarni Kumar Mehta Menon Mishra Mukherjee Nair Pandey Patel "
+    "Pillai Rao Reddy Sen Shah Sharma Singh Sinha Srinivasan Trivedi Varma Verma "
+    "Yadav Fernandes Almeida Thomas Schmidt Rossi Novak Tanaka Silva Garcia Müller"
+).split()
+
+RESEARCH_AREAS = (
+    "machine learning", "deep learning", "natural language processing",
+    "computer vision", "signal processing", "wireless communication",
+    "information theory", "vlsi design", "embedded systems", "computer networks",
+    "network security", "cryptography", "distributed systems", "cloud computing",
+    "database systems", "information retrieval", "graph algorithms",
+    "combinatorial optimization", "convex optimization", "control theory",
+    "robotics", "reinforcement learning", "quantum computing", "speech recognition",
+    "image processing", "data mining", "social networks", "human computer interaction",
+    "software engineering", "programming languages", "compilers", "operating systems",
+    "internet of things", "smart grids", "power electronics", "biomedical imaging",
+    "computational biology", "statistical inference", "game theory", "blockchain",
+    "edge computing", "high performance computing", "computer architecture",
+    "formal verification", "multimedia systems", "digital humanities",
+)
+
+WORDS = (
+    "learning model models data systems analysis design methods theory networks "
+    "efficient scalable robust secure adaptive optimal distributed parallel "
+    "algorithms applications framework evaluation performance signals images "
+    "energy privacy inference representation structure dynamics estimation"
+).split()
+
+FACULTY_TYPES = (
+    "faculty", "adjunct-faculty", "adjunct-faculty-international",
+    "distinguished-professor", "professor-practice",
+)
+
+FREE_TEXT_TEMPLATES = (
+    "professor working on {a} and {b}",
+    "who does research in {a}",
+    "{a} for {b}",
+    "faculty interested in {a} {w} {w2}",
+    "recent work on {w} {a}",
+    "expert in {a} with {b} background",
+    "{w} {w2} methods in {a}",
+    "I want to study {a}",
+)
+
+QUERY_CATEGORIES = ("exact_name", "fuzzy_name", "topic", "free_text")
+
+
+def hash_encode(texts: list) -> np.ndarray:
+    """Deterministic bag-of-words hashing vectors, L2-normalized"""
+    embeddings = np.zeros((len(texts), HASH_DIM), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in text.lower().split():
+            embeddings[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % HASH_DIM] += 1
+    embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+    return embeddings
+
+
+class HashEncoder:
+    """hash_encode behind the model.encode() interface search.py calls"""
+
+    def encode(self, texts, convert_to_numpy: bool = True, **kwargs):
+        if isinstance(texts, str):
+            return hash_encode([texts])[0]
+        return hash_encode(list(texts))
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice('ABCDEGHJKMNPRSTV')}. {rng.choice(LAST_NAMES)}"
+
+
+def _row(rng: random.Random, faculty_id: int) -> tuple:
+    def text(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    areas = rng.sample(RESEARCH_AREAS, 4)
+    return (
+        faculty_id,
+        rng.choice(FACULTY_TYPES),
+        _name(rng),
+        f"PhD ({areas[0].title()})",
+        '{"landline": ["0796826000"]}',
+        "# 1224, FB-1, Gandhinagar",
+        '["someone@example.org"]',
+        ", ".join(areas[:2]),
+        f"Works on {areas[0]} and {areas[1]}. " + text(40),
+        '["' + areas[2].title() + '"]',
+        f"{areas[0]}; {areas[1]}; {text(8)}",
+        '["' + '", "'.join(text(10) for _ in range(10)) + '"]',
+        "{}",
+        "https://example.org/img.png",
+        rng.randint(0, 5000),
+        rng.randint(0, 300),
+        ", ".join(areas[1:]),
+    )
+
+
+def create_faculty_table(db_path: str, rows: int, seed: int = 42):
+    """Write `rows` synthetic faculty (ids 1..rows) to a new database at db_path"""
+    rng = random.Random(seed)
+
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+    CREATE TABLE faculty (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        faculty_type TEXT,
+        name TEXT,
+        education TEXT,
+        phone TEXT,
+        address TEXT,
+        email TEXT,
+        specializations TEXT,
+        biography TEXT,
+        teaching TEXT,
+        research TEXT,
+        publications TEXT,
+        website_links TEXT,
+        image_url TEXT,
+        openalex_id TEXT,
+        citations INTEGER DEFAULT 0,
+        works_count INTEGER DEFAULT 0,
+        topics TEXT
+    )""")
+
+    for start in range(0, rows, 10_000):
+        conn.executemany(
+            "INSERT INTO faculty (id, faculty_type, name, education, phone, address, email, "
+            "specializations, biography, teaching, research, publications, website_links, "
+            "image_url, citations, works_count, topics) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_row(rng, i + 1) for i in range(start, min(rows, start + 10_000))],
+        )
+    conn.commit()
+    conn.close()
+
+
+def _misspell(rng: random.Random, name: str) -> str:
+    """One typo in the last name (swap, drop or double a letter), lowercased"""
+    first, _, last = name.rpartition(" ")
+    pos = rng.randrange(1, len(last) - 1)
+    edit = rng.choice(("swap", "drop", "double"))
+    if edit == "swap":
+        last = last[:pos] + last[pos + 1] + last[pos] + last[pos + 2:]
+    elif edit == "drop":
+        last = last[:pos] + last[pos + 1:]
+    else:
+        last = last[:pos] + last[pos] + last[pos:]
+    return f"{first} {last}".lower()
+
+
+def query_mix(db_path: str, per_category: int = 50, seed: int = 7) -> list:
+    """
+    [(category, query)]: `per_category` queries of each of QUERY_CATEGORIES,
+    interleaved so every stretch of the replay sees all four kinds.
+
+    - exact_name: a name from the table, as stored
+    - fuzzy_name: a name from the table with one typo in the last name
+    - topic: one of the topics of a faculty, as stored (BM25 shortcut path)
+    - free_text: a sentence around one or two research areas
+    """
+    rng = random.Random(seed)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0]
+        sample_ids = [rng.randint(1, rows) for _ in range(2 * per_category)]
+        records = {
+            faculty_id: (name, topics)
+            for faculty_id, name, topics in conn.execute(
+                f"SELECT id, name, topics FROM faculty WHERE id IN ({','.join('?' * len(sample_ids))})",
+                sample_ids,
+            )
+        }
+    finally:
+        conn.close()
+
+    exact, fuzzy, topic, free = [], [], [], []
+    for n, faculty_id in enumerate(sample_ids):
+        name, topics = records[faculty_id]
+        if n < per_category:
+            exact.append(("exact_name", name))
+            topic.append(("topic", rng.choice(topics.split(", "))))
+        else:
+            fuzzy.append(("fuzzy_name", _misspell(rng, name)))
+
+    for _ in range(per_category):
+        a, b = rng.sample(RESEARCH_AREAS, 2)
+        template = rng.choice(FREE_TEXT_TEMPLATES)
+        free.append(("free_text", template.format(a=a, b=b, w=rng.choice(WORDS), w2=rng.choice(WORDS))))
+
+    return [query for group in zip(exact, fuzzy, topic, free) for query in group]
@@ -0,0 +1,151 @@
+"""
+Measurements and JSON reports of the benchmark suite.
+
+A report is one JSON object: the environment it ran in (commit, Python,
+CPU count), the options, and per table size the generate / build / load
+timings, peak RSS and the latency summaries of every replay. Numbers are
+plain floats, so two reports can be diffed leaf by leaf (see compare.py).
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+
+import numpy as np
+
+REPORT_VERSION = 1
+
+# Leaves where larger is better; for every other number smaller is better
+HIGHER_IS_BETTER = ("qps", "rows_per_s")
+
+# Leaves that describe a run rather than measure it, never compared
+NOT_COMPARED = ("queries", "count", "rows", "reused", "db_mb")
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """Peak resident set of this process (or of its finished children), MB"""
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def latency_summary(latencies: list, seconds: float) -> dict:
+    """Throughput and latency percentiles of `latencies` (seconds) replayed in `seconds` wall time"""
+    ms = np.asarray(latencies, dtype="float64") * 1000
+    if not len(ms):
+        return {"queries": 0, "seconds": seconds, "qps": 0.0}
+
+    return {
+        "queries": len(ms),
+        "seconds": seconds,
+        "qps": len(ms) / seconds if seconds > 0 else 0.0,
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def replay(call, queries: list) -> dict:
+    """
+    Run call(query) for every (category, query) of `queries` in order, one
+    at a time. Summary over all queries, plus one per category.
+    """
+    by_category = {}
+    latencies = []
+
+    start = time.perf_counter()
+    for category, query in queries:
+        t0 = time.perf_counter()
+        call(query)
+        elapsed = time.perf_counter() - t0
+        latencies.append(elapsed)
+        by_category.setdefault(category, []).append(elapsed)
+    seconds = time.perf_counter() - start
+
+    summary = latency_summary(latencies, seconds)
+    summary["by_category"] = {
+        category: latency_summary(values, sum(values))
+        for category, values in by_category.items()
+    }
+    return summary
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment() -> dict:
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def write_report(report: dict, path: str = None):
+    """Write `report` to `path`, or to stdout without one"""
+    text = json.dumps(report, indent=2, sort_keys=False)
+    if path is None:
+        print(text)
+        return
+    with open(path, "w") as f:
+        f.write(text + "\n")
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"{path}: report version {report.get('version')}, expected {REPORT_VERSION}")
+    return report
+
+
+def flatten(report: dict) -> dict:
+    """{"scales.10k.api.cold.p95_ms": value, ...} for every measured number of a report"""
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            if prefix.rsplit(".", 1)[-1] not in NOT_COMPARED:
+                flat[prefix] = float(value)
+
+    walk("", report.get("scales", {}))
+    return flat
+
+
+def compare(baseline: dict, current: dict, threshold: float = 10.0) -> list:
+    """
+    [(metric, baseline, current, change %, verdict)] for the metrics both
+    reports have. verdict is "regression" / "improvement" when the change
+    in the bad / good direction exceeds `threshold` percent, else "".
+    """
+    old, new = flatten(baseline), flatten(current)
+    rows = []
+
+    for metric in sorted(old.keys() & new.keys()):
+        before, after = old[metric], new[metric]
+        if before == 0:
+            continue
+        change = (after - before) / abs(before) * 100
+        better = change > 0 if metric.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change < 0
+
+        verdict = ""
+        if abs(change) > threshold:
+            verdict = "improvement" if better else "regression"
+        rows.append((metric, before, after, change, verdict))
+
+    return rows
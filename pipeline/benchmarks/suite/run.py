@@ -0,0 +1,279 @@
+"""
+Benchmark suite: build and query time of the recommender by table size.
+
+For each --scales size (1k, 10k, 100k, 1m or a row count) the suite:
+- generates a synthetic faculty table (corpus.py) and its FTS5 index in a
+  project tree of its own, in a temporary directory or under --work-dir,
+  where tables are kept and reused by later runs with the same size and
+  --seed
+- runs a full build_index in a fresh process: wall time, rows/s, peak RSS
+  of the build and of its encode workers
+- starts the FastAPI app in-process (TestClient, which runs load_all) in
+  another fresh process and replays the fixed query mix, exact names,
+  misspelled names, topics and free text, one query at a time:
+    search_faculty  the search function directly
+    api             GET /recommend through the app
+  each cold (query / result caches cleared) and warm (same queries again,
+  served from the caches), with throughput, p50/p95/p99 latency per query
+  kind and overall, the mean per search stage (metrics.py) and peak RSS
+
+The report is JSON (stdout, or --output) and can be compared with an
+earlier one by compare.py, or here with --compare.
+
+--encoder hash (default) builds and queries with a deterministic hashing
+encoder, so timings cover the index / metadata / search pipeline and not
+the transformer; --encoder model runs the real one (slow at 100k+ rows on
+CPU). The k-NN graph is all-pairs and only built up to --graph-max-rows.
+/recommend latency includes the micro-batch window unless
+RECOMMENDER_MICROBATCH_ENABLED=0. The api target needs httpx.
+
+Usage (from project root):
+    python pipeline/benchmarks/suite/run.py --scales 1k 10k --output before.json
+    python pipeline/benchmarks/suite/run.py --scales 1k 10k --output after.json --compare before.json
+    python pipeline/benchmarks/suite/run.py --scales 1m --index-type hnsw --no-field-index --work-dir /tmp/bench
+"""
+import argparse
+import contextlib
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import traceback
+
+# Add project root to sys.path to allow imports from pipeline
+PROJECT_ROOT = os.getcwd()
+sys.path.append(PROJECT_ROOT)
+
+from pipeline.benchmarks.suite import report as reports
+from pipeline.benchmarks.suite.corpus import SCALES, HashEncoder, create_faculty_table, hash_encode, query_mix
+from pipeline.recommender import build_index as build
+from pipeline.recommender import fts, settings
+from pipeline.recommender.encode_pool import encode_normalized
+from pipeline.recommender.index_factory import default_config
+
+
+def parse_scale(value: str) -> tuple:
+    """"10k" -> ("10k", 10000); a plain row count is its own label"""
+    if value.lower() in SCALES:
+        return value.lower(), SCALES[value.lower()]
+    rows = int(value)
+    if rows <= 0:
+        raise argparse.ArgumentTypeError(f"invalid scale {value!r}")
+    return value, rows
+
+
+@contextlib.contextmanager
+def _quiet(verbose: bool):
+    """Silence progress prints (build_index.py per chunk, API startup) unless verbose"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def prepare_project(work_dir: str, label: str, rows: int, seed: int) -> tuple:
+    """
+    Project tree for one size: the generated table at build.DB_PATH and a
+    link to app/static (the app mounts it). Returns (project_dir, generate stats).
+    """
+    project_dir = os.path.join(work_dir, f"{label}-seed{seed}")
+    db_path = os.path.join(project_dir, build.DB_PATH)
+
+    static_dir = os.path.join(project_dir, "app", "static")
+    if not os.path.exists(static_dir):
+        os.makedirs(os.path.dirname(static_dir), exist_ok=True)
+        os.symlink(os.path.join(PROJECT_ROOT, "app", "static"), static_dir)
+
+    reused = os.path.exists(db_path)
+    start = time.perf_counter()
+    if not reused:
+        create_faculty_table(db_path, rows, seed)
+        # As load_to_db.py does, for the keyword endpoint / database fallback
+        conn = sqlite3.connect(db_path)
+        fts.create_index(conn)
+        conn.close()
+    seconds = time.perf_counter() - start
+
+    return project_dir, {
+        "reused": reused,
+        "seconds": None if reused else seconds,
+        "db_mb": os.path.getsize(db_path) / 1024 ** 2,
+    }
+
+
+def run_build(project_dir: str, rows: int, options: dict, queue):
+    try:
+        # build_index.py works with paths relative to the project root
+        os.chdir(project_dir)
+        shutil.rmtree(build.DATA_DIR, ignore_errors=True)
+
+        encode_fn = hash_encode if options["encoder"] == "hash" else encode_normalized
+        neighbor_graph = settings.NEIGHBOR_GRAPH and rows <= options["graph_max_rows"]
+
+        start = time.perf_counter()
+        with _quiet(options["verbose"]):
+            build.build_index(default_config(options["index_type"]), use_cache=False,
+                              workers=options["workers"], field_index=options["field_index"],
+                              neighbor_graph=neighbor_graph, encode_fn=encode_fn)
+        seconds = time.perf_counter() - start
+
+        queue.put({
+            "seconds": seconds,
+            "rows_per_s": rows / seconds,
+            "peak_rss_mb": reports.peak_rss_mb(),
+            "worker_peak_rss_mb": reports.peak_rss_mb(children=True),
+            "index_type": options["index_type"],
+            "field_index": options["field_index"],
+            "neighbor_graph": neighbor_graph,
+        })
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+
+
+def run_queries(project_dir: str, options: dict, queue):
+    try:
+        os.chdir(project_dir)
+        settings.DATA_DIR = os.path.abspath(build.DATA_DIR)
+        # load_all runs in the app's startup, the replay waits for it
+        settings.FAST_START = False
+
+        from pipeline.recommender import cache, log, metrics, model
+
+        if not options["verbose"]:
+            logging.getLogger(log.ROOT_LOGGER).setLevel(logging.WARNING)
+
+        if options["encoder"] == "hash":
+            # Same encoder as the build, registered in place of the model
+            model._models[settings.ENCODER_BACKEND] = HashEncoder()
+
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from pipeline.recommender.search import search_faculty
+
+        queries = query_mix(build.DB_PATH, options["queries_per_category"], options["seed"])
+        k = options["k"]
+
+        def api_call(query):
+            response = client.get("/recommend", params={"query": query, "k": k})
+            if response.status_code != 200:
+                raise RuntimeError(f"/recommend {query!r}: HTTP {response.status_code} {response.text[:200]}")
+
+        targets = {
+            "search_faculty": lambda query: search_faculty(query, k),
+            "api": api_call,
+        }
+
+        results = {}
+        start = time.perf_counter()
+        with _quiet(options["verbose"]), TestClient(app) as client:
+            results["load"] = {"seconds": time.perf_counter() - start, "peak_rss_mb": reports.peak_rss_mb()}
+
+            for target, call in targets.items():
+                results[target] = {}
+                cache.embedding_cache.clear()
+                cache.result_cache.clear()
+                for run in ("cold", "warm"):
+                    metrics.reset()
+                    summary = reports.replay(call, queries)
+                    summary["stages"] = metrics.stage_summary()
+                    results[target][run] = summary
+
+        results["peak_rss_mb"] = reports.peak_rss_mb()
+        queue.put(results)
+    except Exception:
+        queue.put({"error": traceback.format_exc()})
+
+
+def _in_process(target, *args) -> dict:
+    """Run target(*args, queue) in a fresh spawned process, for a clean heap and its own peak RSS"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=(*args, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+
+    if "error" in result:
+        raise RuntimeError(f"{target.__name__} failed:\n{result['error']}")
+    return result
+
+
+def run_scale(work_dir: str, label: str, rows: int, options: dict) -> dict:
+    log = lambda message: print(message, file=sys.stderr, flush=True)
+
+    log(f"[{label}] preparing {rows:,} rows...")
+    project_dir, generate = prepare_project(work_dir, label, rows, options["seed"])
+
+    log(f"[{label}] building {options['index_type']} index...")
+    built = _in_process(run_build, project_dir, rows, options)
+    log(f"[{label}]   {built['seconds']:.1f}s, {built['rows_per_s']:.0f} rows/s, peak RSS {built['peak_rss_mb']:.0f} MB")
+
+    log(f"[{label}] replaying queries...")
+    served = _in_process(run_queries, project_dir, options)
+    for target in ("search_faculty", "api"):
+        for run in ("cold", "warm"):
+            summary = served[target][run]
+            log(f"[{label}]   {target:<14} {run} | {summary['qps']:8.1f} qps | p50 {summary['p50_ms']:7.2f} ms "
+                f"| p95 {summary['p95_ms']:7.2f} ms | p99 {summary['p99_ms']:7.2f} ms")
+
+    return {"rows": rows, "generate": generate, "build": built, **served}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=parse_scale, nargs="+", default=[parse_scale(label) for label in SCALES],
+                        help="table sizes: 1k, 10k, 100k, 1m or row counts")
+    parser.add_argument("--seed", type=int, default=42, help="seed of the tables and of the query mix")
+    parser.add_argument("--queries-per-category", type=int, default=50)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--encoder", choices=("hash", "model"), default="hash")
+    parser.add_argument("--index-type", default=settings.INDEX_TYPE, choices=("flat", "ivf_flat", "hnsw", "ivf_pq"))
+    parser.add_argument("--workers", type=int, default=settings.ENCODE_WORKERS)
+    parser.add_argument("--no-field-index", action="store_true")
+    parser.add_argument("--graph-max-rows", type=int, default=100_000,
+                        help="skip the k-NN graph above this many rows")
+    parser.add_argument("--work-dir", help="keep the generated tables here and reuse them (default: temporary)")
+    parser.add_argument("--output", help="report path (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="report to compare this run with")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged by --compare")
+    parser.add_argument("--verbose", action="store_true", help="show build_index.py progress")
+    args = parser.parse_args()
+
+    options = {
+        "seed": args.seed,
+        "queries_per_category": args.queries_per_category,
+        "k": args.k,
+        "encoder": args.encoder,
+        "index_type": args.index_type,
+        "workers": args.workers,
+        "field_index": settings.FIELD_INDEX and not args.no_field_index,
+        "graph_max_rows": args.graph_max_rows,
+        "verbose": args.verbose,
+    }
+
+    report = {
+        "version": reports.REPORT_VERSION,
+        "environment": reports.environment(),
+        "options": {key: value for key, value in options.items() if key != "verbose"},
+        "scales": {},
+    }
+
+    with contextlib.ExitStack() as stack:
+        work_dir = args.work_dir or stack.enter_context(tempfile.TemporaryDirectory(prefix="faculty-bench-"))
+        for label, rows in args.scales:
+            report["scales"][label] = run_scale(work_dir, label, rows, options)
+
+    reports.write_report(report, args.output)
+
+    if args.compare:
+        from pipeline.benchmarks.suite.compare import print_comparison
+        print_comparison(reports.load_report(args.compare), report, args.threshold, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
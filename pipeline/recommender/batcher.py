@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline.recommender import metrics, settings
+from pipeline.recommender.search import search_faculty_many
+
+
+class MicroBatcher:
+    """
+    Merges concurrent search calls into one batched search.
+
+    Callers block in submit(); a single worker thread collects the queries
+    that arrive within `window_ms` of the first one (up to `max_batch_size`),
+    runs them through one encode call and one FAISS search, and hands each
+    caller its own result list. The batch's stage timings are added to
+    every caller's Server-Timing.
+    """
+
+    def __init__(self, handler, window_ms: float, max_batch_size: int):
+        self._handler = handler
+        self._window = window_ms / 1000.0
+        self._max_batch_size = max(1, max_batch_size)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="recommender-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, query: str, k: int = 5, search_filter=None) -> list:
+        future = Future()
+        self._queue.put((query, k, search_filter, (future, metrics.current_timings())))
+        return future.result()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            queries = [query for query, _, _, _ in batch]
+            ks = [k for _, k, _, _ in batch]
+            filters = [search_filter for _, _, search_filter, _ in batch]
+
+            try:
+                with metrics.request_timings() as timings:
+                    results = self._handler(queries, ks, filters)
+            except Exception as e:
+                for _, _, _, (future, _) in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, _, _, (future, caller_timings)), result in zip(batch, results):
+                metrics.add_timings(caller_timings, timings)
+                future.set_result(result)
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher:
+    """Process-wide batcher, started on first use"""
+    global _batcher
+
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    search_faculty_many,
+                    window_ms=settings.BATCH_WINDOW_MS,
+                    max_batch_size=settings.MAX_BATCH_SIZE,
+                )
+
+    return _batcher
+
+
+def search_faculty_microbatched(query: str, k: int = 5, search_filter=None) -> list:
+    """Drop-in replacement for search_faculty that joins the current micro-batch"""
+    return get_batcher().submit(query, k, search_filter)
@@ -0,0 +1,197 @@
+import math
+import pickle
+import re
+from array import array
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from pipeline.recommender import settings
+
+BM25_FILENAME = "bm25.pkl"
+
+# Fields indexed for sparse retrieval, with per-field term frequency weights
+BM25_FIELDS = {
+    "name": 2.0,
+    "topics": 1.5,
+    "research": 1.0,
+    "specializations": 1.0,
+}
+
+# Fields whose comma-separated entries count as known phrases ("Machine Learning")
+PHRASE_FIELDS = ("topics", "research", "specializations")
+
+_TOKEN_RE = re.compile(r"\w+")
+_PHRASE_SPLIT_RE = re.compile(r"[,;]")
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+class BM25Index:
+    """
+    In-memory inverted index with BM25 scoring over name, topics, research
+    and specializations.
+
+    Documents are keyed by faculty.id. The BM25 contribution of every
+    (term, document) pair is computed at build time, so a query only sums
+    precomputed weights over the posting lists of its terms.
+    """
+
+    def __init__(self, doc_ids: np.ndarray, postings: dict, phrases: set):
+        self.doc_ids = doc_ids
+        self.postings = postings
+        self.phrases = phrases
+
+    @classmethod
+    def build(cls, ids: list, fields: dict, k1: float = None, b: float = None) -> "BM25Index":
+        """
+        `fields` maps field name -> list of values aligned with `ids`.
+        """
+        builder = BM25Builder()
+        builder.add(ids, fields)
+        return builder.build(k1, b)
+
+    @classmethod
+    def from_records(cls, records: list) -> "BM25Index":
+        builder = BM25Builder()
+        builder.add_records(records)
+        return builder.build()
+
+    @classmethod
+    def from_store(cls, store) -> "BM25Index":
+        return cls.build(
+            store.ids.tolist(),
+            {field: store.column(field) for field in BM25_FIELDS if field in store.text_columns},
+        )
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            pickle.dump(
+                {"doc_ids": self.doc_ids, "postings": self.postings, "phrases": self.phrases},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["doc_ids"], data["postings"], data["phrases"])
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def is_known_phrase(self, query: str) -> bool:
+        """The whole query is a topic / research / specialization entry"""
+        return normalize_phrase(query) in self.phrases
+
+    def search(self, query: str, k: int, allowed: np.ndarray = None) -> list:
+        """
+        Top-k (faculty.id, bm25 score) pairs, best first. `allowed` is an
+        optional boolean mask over documents (in doc_ids order).
+        """
+        matched = [self.postings[term] for term in set(tokenize(query)) if term in self.postings]
+        if not matched or k <= 0:
+            return []
+
+        scores = np.zeros(len(self.doc_ids), dtype="float32")
+        for docs, weights in matched:
+            scores[docs] += weights
+
+        touched = np.unique(np.concatenate([docs for docs, _ in matched]))
+        if allowed is not None:
+            touched = touched[allowed[touched]]
+        if len(touched) > k:
+            top = np.argpartition(-scores[touched], k - 1)[:k]
+            touched = touched[top]
+        order = touched[np.argsort(-scores[touched], kind="stable")]
+
+        return [(int(self.doc_ids[doc]), float(scores[doc])) for doc in order]
+
+
+class BM25Builder:
+    """
+    Collects term frequencies chunk by chunk (e.g. while streaming the
+    faculty table); build() turns them into a BM25Index. Only the postings
+    are kept, not the documents.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.doc_lengths = array("d")
+        self.phrases = set()
+        self._postings = defaultdict(lambda: (array("i"), array("d")))
+
+    def add(self, ids: list, fields: dict):
+        """`fields` maps field name -> list of values aligned with `ids`"""
+        columns = {field: fields[field] for field in BM25_FIELDS if field in fields}
+
+        for offset, fid in enumerate(ids):
+            doc = len(self.ids)
+            tf = Counter()
+            for field, values in columns.items():
+                weight = BM25_FIELDS[field]
+                value = values[offset]
+                if not value:
+                    continue
+                for token in tokenize(value):
+                    tf[token] += weight
+                if field in PHRASE_FIELDS:
+                    for phrase in _PHRASE_SPLIT_RE.split(value):
+                        phrase = normalize_phrase(phrase)
+                        if phrase:
+                            self.phrases.add(phrase)
+
+            for term, freq in tf.items():
+                docs, freqs = self._postings[term]
+                docs.append(doc)
+                freqs.append(freq)
+
+            self.ids.append(fid)
+            self.doc_lengths.append(sum(tf.values()))
+
+    def add_records(self, records: list):
+        self.add(
+            [record["id"] for record in records],
+            {field: [record.get(field) for record in records] for field in BM25_FIELDS},
+        )
+
+    def build(self, k1: float = None, b: float = None) -> BM25Index:
+        k1 = settings.BM25_K1 if k1 is None else k1
+        b = settings.BM25_B if b is None else b
+
+        num_docs = len(self.ids)
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype="float64")
+        avg_length = float(doc_lengths.mean()) if num_docs else 0.0
+        norms = k1 * (1 - b + b * doc_lengths / avg_length) if avg_length else np.full(num_docs, k1)
+
+        postings = {}
+        for term, (docs, freqs) in self._postings.items():
+            docs = np.frombuffer(docs, dtype="int32")
+            freqs = np.frombuffer(freqs, dtype="float64")
+            idf = math.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            weights = idf * freqs * (k1 + 1) / (freqs + norms[docs])
+            postings[term] = (docs.copy(), weights.astype("float32"))
+
+        return BM25Index(np.frombuffer(self.ids, dtype="int64").copy(), postings, self.phrases)
+
+
+def reciprocal_rank_fusion(ranked_lists: list, k: int = None) -> list:
+    """
+    Fuse ranked lists of keys: score(key) = sum of 1 / (k + rank).
+    Returns keys ordered by fused score (ties keep first-seen order).
+    """
+    k = settings.RRF_K if k is None else k
+    fused = {}
+
+    for ranked in ranked_lists:
+        for rank, key in enumerate(ranked, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+
+    return sorted(fused, key=fused.get, reverse=True)
@@ -3,75 +3,107 @@ import faiss
 import pickle
 import os
 import sys
+import argparse
+import hashlib
+from collections import deque
+
+import numpy as np
 
 # Add project root to sys.path to allow imports from pipeline
 sys.path.append(os.getcwd())
 
-from pipeline.recommender.model import get_model
+from pipeline.recommender import settings
+from pipeline.recommender.encoders import cache_key
+from pipeline.recommender.encode_pool import EncodePool, encode_normalized
+from pipeline.recommender.startup import StartupTimer
+from pipeline.recommender.embedding_store import EmbeddingStore, text_key
+from pipeline.recommender.metadata_store import MetadataStore, MetadataWriter, store_exists
+from pipeline.recommender.bm25 import BM25_FILENAME, BM25Builder, BM25Index
+from pipeline.recommender.field_index import (
+    FieldIndex,
+    FieldIndexBuilder,
+    field_entries,
+    field_index_exists,
+    remove_field_index,
+)
+from pipeline.recommender.neighbors import (
+    NeighborGraph,
+    index_vectors,
+    neighbor_graph_exists,
+    remove_neighbor_graph,
+)
+from pipeline.recommender.index_factory import (
+    INDEX_TYPES,
+    IndexBuilder,
+    default_config,
+    load_index_config,
+    remove_ids,
+    save_index_config,
+)
 
 # Paths relative to project root
 DB_PATH = "pipeline/outputs/faculty.db"
 INDEX_PATH = "pipeline/recommender/data/faiss.index"
 IDS_PATH = "pipeline/recommender/data/faculty_ids.pkl"
-META_PATH = "pipeline/recommender/data/metadata.pkl"
+DATA_DIR = "pipeline/recommender/data"   # metadata store (metadata/ column files)
+HASHES_PATH = "pipeline/recommender/data/row_hashes.pkl"
+BM25_PATH = os.path.join(DATA_DIR, BM25_FILENAME)
 
 
-def fetch_faculty():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT 
-            id,
-            faculty_type,
-            name,
-            education,
-            phone,
-            email,
-            specializations,
-            biography,
-            teaching,
-            research,
-            publications,
-            website_links,
-            address,
-            image_url,
-            citations,
-            works_count,
-            topics
-        FROM faculty
-    """)
+FACULTY_QUERY = """
+    SELECT 
+        id,
+        faculty_type,
+        name,
+        education,
+        phone,
+        email,
+        specializations,
+        biography,
+        teaching,
+        research,
+        publications,
+        website_links,
+        address,
+        image_url,
+        citations,
+        works_count,
+        topics
+    FROM faculty
+"""
 
-    faculty_ids = []
-    faculty_texts = []
-    metadata = []
-    
-    for row in cursor.fetchall():
-        (
-            fid,
-            faculty_type,
-            name,
-            education,
-            phone,
-            email,
-            specializations,
-            biography,
-            teaching,
-            research,
-            publications,
-            website_links,
-            address,
-            image_url,
-            citations,
-            works_count,
-            topics
-        ) = row
-
-        # No strict filters - include everyone to match search requirements
-        if not name or not name.strip():
-            name = "Unknown Faculty"
-
-        combined = f"""
+
+def _faculty_row(row) -> tuple:
+    """
+    (id, combined text to embed, metadata record, field texts) for one
+    faculty row. Field texts are the per-field embedding inputs.
+    """
+    (
+        fid,
+        faculty_type,
+        name,
+        education,
+        phone,
+        email,
+        specializations,
+        biography,
+        teaching,
+        research,
+        publications,
+        website_links,
+        address,
+        image_url,
+        citations,
+        works_count,
+        topics
+    ) = row
+
+    # No strict filters - include everyone to match search requirements
+    if not name or not name.strip():
+        name = "Unknown Faculty"
+
+    # Row hashes and embedding cache keys are computed from this exact text
+    combined = f"""
         Faculty Name: {name or ""}
         Topics: {topics or ""}
         Research: {research or ""}
@@ -80,71 +112,474 @@ def fetch_faculty():
         Biography: {biography or ""}
         """.strip()
 
-        faculty_ids.append(fid)
-        faculty_texts.append(combined)
-
-        metadata.append({
-            "id": fid,
-            "name": name,
-            "faculty_type": faculty_type,
-            "education": education,
-            "research": research,
-            "specializations": specializations,
-            "teaching": teaching,
-            "email": email,
-            "phone": phone,
-            "address": address,
-            "image_url": image_url,
-            "publications": publications,
-            "website_links": website_links,
-            "citations": citations,
-            "works_count": works_count,
-            "topics": topics
-        })
-
-    return faculty_ids, faculty_texts, metadata
-
-
-def build_index():
+    metadata = {
+        "id": fid,
+        "name": name,
+        "faculty_type": faculty_type,
+        "education": education,
+        "research": research,
+        "specializations": specializations,
+        "teaching": teaching,
+        "email": email,
+        "phone": phone,
+        "address": address,
+        "image_url": image_url,
+        "publications": publications,
+        "website_links": website_links,
+        "citations": citations,
+        "works_count": works_count,
+        "topics": topics
+    }
 
-    print("Fetching faculty data...")
-    ids, texts, metadata = fetch_faculty()
+    fields = {
+        "name": name,
+        "topics": topics,
+        "research": research,
+        "teaching": teaching,
+        "specializations": specializations,
+        "biography": biography,
+    }
 
-    print("Loading transformer model...")
-    model = get_model()
+    return fid, combined, metadata, fields
 
-    print("Generating embeddings (GPU will be used if available)...")
 
-    embeddings = model.encode(
-        texts,
-        batch_size=64,   # increase if GPU strong
-        show_progress_bar=True,
-        convert_to_numpy=True
-    )
+def count_faculty() -> int:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_faculty(chunk_size: int = None):
+    """
+    Stream the faculty table in chunks of (ids, texts, metadata, field
+    texts), so only one chunk of rows is in memory at a time.
+    """
+    chunk_size = chunk_size or settings.BUILD_CHUNK_SIZE
+    conn = sqlite3.connect(DB_PATH)
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(FACULTY_QUERY)
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            ids, texts, metadata, fields = [], [], [], []
+            for row in rows:
+                fid, combined, record, row_fields = _faculty_row(row)
+                ids.append(fid)
+                texts.append(combined)
+                metadata.append(record)
+                fields.append(row_fields)
+
+            yield ids, texts, metadata, fields
+    finally:
+        conn.close()
+
+
+def fetch_faculty():
+    """The whole faculty table at once (incremental builds diff against it)"""
+    faculty_ids = []
+    faculty_texts = []
+    metadata = []
+    faculty_fields = []
+
+    for ids, texts, records, fields in iter_faculty():
+        faculty_ids.extend(ids)
+        faculty_texts.extend(texts)
+        metadata.extend(records)
+        faculty_fields.extend(fields)
 
-    print("Normalizing embeddings for cosine similarity...")
-    faiss.normalize_L2(embeddings)
+    return faculty_ids, faculty_texts, metadata, faculty_fields
 
-    dim = embeddings.shape[1]
 
-    print("Building FAISS index...")
-    index = faiss.IndexFlatIP(dim)  # cosine similarity
-    index.add(embeddings)
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
 
+
+def _embedding_store() -> EmbeddingStore:
+    return EmbeddingStore(settings.EMBEDDING_STORE_DIR, cache_key(), settings.EMBEDDING_STORE_DTYPE)
+
+
+def encode_texts(texts: list, use_cache: bool = True, workers: int = None) -> np.ndarray:
+    """
+    Normalized embeddings for `texts`, encoded on `workers` processes. With
+    the embedding cache on, only texts never encoded by this model before
+    reach the transformer.
+    """
+    with EncodePool(workers) as pool:
+        print(f"Generating embeddings for {len(texts)} texts ({pool.workers} worker(s))...")
+        if not use_cache:
+            return pool.encode(texts)
+
+        embeddings = _embedding_store().encode(texts, pool.encode)
+        return np.ascontiguousarray(embeddings, dtype="float32")
+
+
+def embed_chunks(chunks, pool: EncodePool, store: EmbeddingStore = None):
+    """
+    For each (texts, payload) chunk, yield (payload, embeddings of texts),
+    in input order.
+
+    Texts not in the embedding cache are submitted to the pool as soon as
+    their chunk is read, with up to two chunks per worker in flight; results
+    are consumed in order, so memory stays bounded by the number of chunks
+    in flight. Cached vectors are read back from the store, so fresh and
+    cached ones go through the same storage dtype (as in EmbeddingStore.encode).
+    """
+    max_pending = 2 * pool.workers
+    pending = deque()
+    in_flight = set()
+    stats = {"hits": 0, "encoded": 0}
+
+    def finish(payload, keys, new_keys, handle):
+        if store is None:
+            return payload, handle.get()
+
+        if new_keys:
+            store.add(new_keys, handle.get(), persist=False)
+            in_flight.difference_update(new_keys)
+
+        vectors, _ = store.get(keys)
+        return payload, np.ascontiguousarray(vectors, dtype="float32")
+
+    for texts, payload in chunks:
+        if store is None:
+            pending.append((payload, None, None, pool.submit(texts)))
+        else:
+            keys = [text_key(text) for text in texts]
+
+            # Each text is encoded once, even if it repeats across chunks
+            new_texts = {}
+            for key, text in zip(keys, texts):
+                if key not in store and key not in in_flight:
+                    new_texts.setdefault(key, text)
+
+            new_keys = list(new_texts)
+            in_flight.update(new_keys)
+            stats["hits"] += len(keys) - len(new_keys)
+            stats["encoded"] += len(new_keys)
+
+            handle = pool.submit(list(new_texts.values())) if new_keys else None
+            pending.append((payload, keys, new_keys, handle))
+
+        if len(pending) > max_pending:
+            yield finish(*pending.popleft())
+
+    while pending:
+        yield finish(*pending.popleft())
+
+    if store is not None:
+        store.flush()
+        print(f"Embedding cache: {stats['hits']} hits, {stats['encoded']} texts encoded")
+
+
+def _embedding_chunks(chunks, field_index: bool):
+    """
+    (texts, payload) chunks for embed_chunks: each row's combined text,
+    followed by the chunk's field texts when the field index is built, so
+    both are encoded in one submission.
+    """
+    for ids, texts, metadata, fields in chunks:
+        entries = field_entries(ids, fields) if field_index else ([], [], [])
+        yield texts + entries[1], (ids, texts, metadata, entries)
+
+
+def save_index_artifacts(index, index_config: dict, ids: list, row_hashes: dict, fields: FieldIndex = None,
+                         neighbors: NeighborGraph = None):
     os.makedirs(os.path.dirname(INDEX_PATH), exist_ok=True)
 
-    print("Saving index + metadata...")
+    print("Saving index...")
     faiss.write_index(index, INDEX_PATH)
+    save_index_config(INDEX_PATH, index_config)
+
+    if fields is not None:
+        print(f"Saving field index ({fields.index.ntotal} field vectors)...")
+        fields.save(DATA_DIR)
+    else:
+        remove_field_index(DATA_DIR)
+
+    if neighbors is not None:
+        print(f"Saving {neighbors.k}-NN graph ({len(neighbors)} rows)...")
+        neighbors.save(DATA_DIR)
+    else:
+        remove_neighbor_graph(DATA_DIR)
 
     with open(IDS_PATH, "wb") as f:
         pickle.dump(ids, f)
 
-    with open(META_PATH, "wb") as f:
-        pickle.dump(metadata, f)
+    with open(HASHES_PATH, "wb") as f:
+        pickle.dump(row_hashes, f)
+
+
+def save_artifacts(index, index_config: dict, ids: list, metadata: list, row_hashes: dict,
+                   fields: FieldIndex = None, neighbors: NeighborGraph = None):
+    print("Saving metadata...")
+    MetadataStore.write(metadata, DATA_DIR)
+
+    # Sparse index over the same records, rebuilt in full (no encoder involved)
+    BM25Index.from_records(metadata).save(BM25_PATH)
+
+    save_index_artifacts(index, index_config, ids, row_hashes, fields, neighbors)
+
+
+def build_index(index_config: dict = None, use_cache: bool = True, workers: int = None,
+                chunk_size: int = None, field_index: bool = None, neighbor_graph: bool = None,
+                encode_fn=encode_normalized):
+    """
+    Full build, streamed: the faculty table is read in chunks, each chunk is
+    encoded by the worker pool and added to the index, metadata store and
+    BM25 postings before the next one is needed. Besides the index itself,
+    memory holds a few chunks, per-row ids/hashes and (IVF / PQ only) the
+    training sample.
+
+    With `field_index` (default settings.FIELD_INDEX) the non-empty fields
+    of every row are also embedded on their own, into a field-tagged index
+    of the same type (see field_index.py). With `neighbor_graph` (default
+    settings.NEIGHBOR_GRAPH) the k-NN graph between the indexed vectors is
+    computed last, for "similar faculty" lookups (see neighbors.py).
+
+    `encode_fn` (texts -> normalized float32 embeddings) runs in the workers
+    and must be importable there, i.e. a module-level function.
+    """
+    index_config = index_config or default_config()
+    field_index = settings.FIELD_INDEX if field_index is None else field_index
+    neighbor_graph = settings.NEIGHBOR_GRAPH if neighbor_graph is None else neighbor_graph
+    total = count_faculty()
+    store = _embedding_store() if use_cache else None
+
+    # Id-mapped on faculty.id so later incremental runs can patch rows in place
+    builder = IndexBuilder(index_config, total)
+    field_builder = FieldIndexBuilder(index_config, total) if field_index else None
+    metadata_writer = MetadataWriter(DATA_DIR)
+    bm25 = BM25Builder()
+    ids = []
+    row_hashes = {}
+
+    with EncodePool(workers, encode_fn) as pool:
+        print(f"Streaming {total} faculty rows into a {index_config['type']} index "
+              f"({pool.workers} encode worker(s))...")
+
+        chunks = _embedding_chunks(iter_faculty(chunk_size), field_index)
+        for (chunk_ids, texts, metadata, (field_labels, _, field_masks)), embeddings in embed_chunks(chunks, pool, store):
+            builder.add(embeddings[:len(chunk_ids)], chunk_ids)  # cosine similarity
+            if field_builder is not None:
+                field_builder.add(chunk_ids, field_masks, field_labels, embeddings[len(chunk_ids):])
+            metadata_writer.append(metadata)
+            bm25.add_records(metadata)
+
+            ids.extend(chunk_ids)
+            row_hashes.update((fid, text_hash(text)) for fid, text in zip(chunk_ids, texts))
+            print(f"  {len(ids)}/{total} rows indexed")
+
+    index, index_config = builder.finish()
+    fields = field_builder.finish() if field_builder is not None else None
+    neighbors = NeighborGraph.build(ids, index_vectors(index, ids)) if neighbor_graph else None
+
+    print("Saving metadata...")
+    metadata_writer.close()
+    bm25.build().save(BM25_PATH)
+    save_index_artifacts(index, index_config, ids, row_hashes, fields, neighbors)
 
     print("\n FAISS index built successfully!")
     print(f"Total faculty indexed: {len(ids)}")
 
 
+def _load_existing():
+    """Previous build artifacts, or None if they can't be patched incrementally"""
+    paths = (INDEX_PATH, IDS_PATH, HASHES_PATH)
+    if not all(os.path.exists(path) for path in paths) or not store_exists(DATA_DIR):
+        print("No previous incremental build found.")
+        return None
+
+    index_config = load_index_config(INDEX_PATH)
+    if not index_config.get("id_mapped"):
+        print("Existing index is not id-mapped (built by an older version).")
+        return None
+
+    index = faiss.read_index(INDEX_PATH)
+
+    with open(IDS_PATH, "rb") as f:
+        ids = pickle.load(f)
+
+    with open(HASHES_PATH, "rb") as f:
+        row_hashes = pickle.load(f)
+
+    return index, index_config, ids, row_hashes
+
+
+def update_index(index_config: dict = None, use_cache: bool = True, workers: int = None,
+                 chunk_size: int = None, field_index: bool = None, neighbor_graph: bool = None):
+    """
+    Incremental build: re-encode only new or changed faculty rows.
+
+    The combined text of every row is hashed and compared with the hashes
+    stored by the previous build. Deleted and changed ids are removed from
+    the id-mapped FAISS index, new and changed rows are encoded and added
+    under their faculty.id. The field index, if built, is patched the same
+    way, and the k-NN graph only recomputes the rows the changes can affect.
+    Falls back to a full build when there is no usable previous build.
+
+    Only the encoding is incremental. The row list is patched in memory, but
+    the metadata store, BM25 postings, faculty_ids.pkl and row_hashes.pkl are
+    then written out whole, like a full build does: the store's columns are
+    packed at fixed offsets, so changing one row's text would move every row
+    after it. That is one sequential write and no encoder call, small next
+    to re-encoding the table.
+    """
+    field_index = settings.FIELD_INDEX if field_index is None else field_index
+    neighbor_graph = settings.NEIGHBOR_GRAPH if neighbor_graph is None else neighbor_graph
+
+    existing = _load_existing()
+    if existing is None:
+        print("Running a full build instead.")
+        return build_index(index_config, use_cache, workers, chunk_size, field_index, neighbor_graph)
+
+    index, stored_config, old_ids, old_hashes = existing
+
+    if index_config and index_config["type"] != stored_config["type"]:
+        print(f"Index type changed ({stored_config['type']} -> {index_config['type']}), running a full build.")
+        return build_index(index_config, use_cache, workers, chunk_size, field_index, neighbor_graph)
+
+    fields = None
+    if field_index:
+        if not field_index_exists(DATA_DIR):
+            print("Previous build has no field index, running a full build.")
+            return build_index(index_config or stored_config, use_cache, workers, chunk_size, field_index,
+                               neighbor_graph)
+        fields = FieldIndex.load(DATA_DIR)
+
+    print("Fetching faculty data...")
+    ids, texts, metadata, faculty_fields = fetch_faculty()
+
+    row_hashes = {fid: text_hash(text) for fid, text in zip(ids, texts)}
+    texts_by_id = dict(zip(ids, texts))
+    meta_by_id = {entry["id"]: entry for entry in metadata}
+    fields_by_id = dict(zip(ids, faculty_fields))
+
+    deleted = [fid for fid in old_hashes if fid not in row_hashes]
+    changed = [fid for fid in ids if fid in old_hashes and old_hashes[fid] != row_hashes[fid]]
+    added = [fid for fid in ids if fid not in old_hashes]
+
+    print(f"Rows: {len(added)} new, {len(changed)} changed, {len(deleted)} deleted, "
+          f"{len(ids) - len(added) - len(changed)} unchanged")
+
+    to_encode = changed + added
+    to_remove = deleted + changed
+
+    if to_remove:
+        try:
+            remove_ids(index, to_remove)
+            if fields is not None:
+                fields.remove(to_remove)
+        except RuntimeError as e:
+            # e.g. HNSW graphs don't support removal
+            print(f"Index can't remove rows ({e}), running a full build.")
+            return build_index(index_config or stored_config, use_cache, workers, chunk_size, field_index,
+                               neighbor_graph)
+
+    if to_encode:
+        field_labels, field_texts, field_masks = (
+            field_entries(to_encode, [fields_by_id[fid] for fid in to_encode])
+            if fields is not None else ([], [], [])
+        )
+        embeddings = encode_texts([texts_by_id[fid] for fid in to_encode] + field_texts, use_cache, workers)
+        index.add_with_ids(embeddings[:len(to_encode)], np.asarray(to_encode, dtype="int64"))
+        if fields is not None:
+            fields.add(to_encode, field_masks, field_labels, embeddings[len(to_encode):])
+
+    # Keep the previous row order, drop deleted rows, refresh existing ones
+    # (metadata-only edits included), append new ones; saved whole below
+    deleted_set = set(deleted)
+    patched_ids = [fid for fid in old_ids if fid not in deleted_set]
+    patched_ids.extend(added)
+    patched_metadata = [meta_by_id[fid] for fid in patched_ids]
+
+    neighbors = None
+    if neighbor_graph:
+        vectors = index_vectors(index, patched_ids)
+        if neighbor_graph_exists(DATA_DIR):
+            previous = NeighborGraph.load(DATA_DIR)
+            if previous.k == settings.NEIGHBORS_K:
+                neighbors = previous.refresh(patched_ids, vectors, to_encode, deleted)
+        if neighbors is None:
+            neighbors = NeighborGraph.build(patched_ids, vectors)
+
+    save_artifacts(index, stored_config, patched_ids, patched_metadata, row_hashes, fields, neighbors)
+
+    print("\n FAISS index updated successfully!")
+    print(f"Total faculty indexed: {index.ntotal}")
+
+
+def parse_args():
+    defaults = default_config()
+    parser = argparse.ArgumentParser(description="Build the FAISS index over the faculty table")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None,
+                        help=f"default: {defaults['type']} (or the existing type with --incremental)")
+    parser.add_argument("--nlist", type=int, default=defaults["nlist"])
+    parser.add_argument("--nprobe", type=int, default=defaults["nprobe"])
+    parser.add_argument("--hnsw-m", type=int, default=defaults["hnsw_m"])
+    parser.add_argument("--ef-search", type=int, default=defaults["ef_search"])
+    parser.add_argument("--pq-m", type=int, default=defaults["pq_m"])
+    parser.add_argument("--train-sample", type=int, default=defaults["train_sample"])
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only re-embed new or changed rows and patch the existing index",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=settings.ENCODE_WORKERS,
+        help="encode worker processes, one torch thread each (0 = one per core, 1 = in-process)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.BUILD_CHUNK_SIZE,
+        help="faculty rows read, encoded and indexed per chunk",
+    )
+    parser.add_argument(
+        "--no-field-index", action="store_true",
+        help="skip the per-field embeddings index (fields.index)",
+    )
+    parser.add_argument(
+        "--no-neighbor-graph", action="store_true",
+        help="skip the precomputed k-NN graph behind /faculty/{id}/similar",
+    )
+    parser.add_argument(
+        "--no-embedding-cache", action="store_true",
+        help="re-encode every text instead of reusing the on-disk embedding cache",
+    )
+    return parser.parse_args()
+
+
+def config_from_args(args) -> dict:
+    config = default_config(args.index_type)
+    config.update({
+        "nlist": args.nlist,
+        "nprobe": args.nprobe,
+        "hnsw_m": args.hnsw_m,
+        "ef_search": args.ef_search,
+        "pq_m": args.pq_m,
+        "train_sample": args.train_sample,
+    })
+    return config
+
+
 if __name__ == "__main__":
-    build_index()
+    # The model is only loaded if some text isn't in the embedding cache
+    startup_timer = StartupTimer("build_index")
+    startup_timer.mark("imports")
+    startup_timer.report()
+
+    args = parse_args()
+    config = config_from_args(args)
+    field_index = settings.FIELD_INDEX and not args.no_field_index
+    neighbor_graph = settings.NEIGHBOR_GRAPH and not args.no_neighbor_graph
+
+    if args.incremental:
+        # Keep the existing index type unless one was asked for explicitly
+        update_index(config if args.index_type else None, not args.no_embedding_cache,
+                     args.workers, args.chunk_size, field_index, neighbor_graph)
+    else:
+        build_index(config, not args.no_embedding_cache, args.workers, args.chunk_size, field_index, neighbor_graph)
@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import OrderedDict
+
+from pipeline.recommender import settings
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry time-to-live.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached,
+    and treated as missing once older than `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+# Level 1: normalized query text -> normalized embedding vector
+embedding_cache = TTLCache(settings.EMBEDDING_CACHE_SIZE, settings.EMBEDDING_CACHE_TTL)
+
+# Level 2: (stripped query text, k, filter key) -> final reranked result list
+result_cache = TTLCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL)
+
+_version = None
+_version_lock = threading.Lock()
+
+
+def sync_version(version):
+    """Drop both cache levels when the loaded index/metadata version changes"""
+    global _version
+
+    if version == _version:
+        return
+
+    with _version_lock:
+        if version != _version:
+            embedding_cache.clear()
+            result_cache.clear()
+            _version = version
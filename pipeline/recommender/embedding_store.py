@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+
+import numpy as np
+
+VECTORS_FILE = "vectors.bin"
+KEYS_FILE = "keys.pkl"
+INFO_FILE = "info.json"
+
+
+def text_key(text: str) -> str:
+    """Hash of the whitespace-normalized text"""
+    normalized = " ".join(text.split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """
+    On-disk embedding cache for one model, keyed by normalized text hash.
+
+    Vectors live in one append-only matrix file (float32 or float16) that is
+    memory-mapped for reads; a small pickle maps text hash -> row. Each model
+    gets its own directory, so switching models never mixes vectors.
+    """
+
+    def __init__(self, root: str, model_name: str, dtype: str = "float32"):
+        self.model_name = model_name
+        self.path = os.path.join(root, _slug(model_name))
+        self.dtype = np.dtype(dtype)
+        self.dim = None
+        self.rows = 0
+        self._keys = {}
+        self._matrix = None
+
+        info_path = os.path.join(self.path, INFO_FILE)
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                info = json.load(f)
+            with open(os.path.join(self.path, KEYS_FILE), "rb") as f:
+                self._keys = pickle.load(f)
+
+            # The dtype the store was created with wins over the requested one
+            self.dtype = np.dtype(info["dtype"])
+            self.dim = info["dim"]
+            self.rows = info["rows"]
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def _vectors(self) -> np.ndarray:
+        if self._matrix is None and self.rows:
+            self._matrix = np.memmap(
+                os.path.join(self.path, VECTORS_FILE),
+                dtype=self.dtype, mode="r", shape=(self.rows, self.dim),
+            )
+        return self._matrix
+
+    def get(self, keys: list):
+        """(vectors for the keys found, positions of the keys that are missing)"""
+        rows = [self._keys.get(key, -1) for key in keys]
+        missing = [pos for pos, row in enumerate(rows) if row == -1]
+        found_rows = [row for row in rows if row != -1]
+
+        vectors = None
+        if found_rows:
+            vectors = np.asarray(self._vectors()[found_rows], dtype="float32")
+
+        return vectors, missing
+
+    def add(self, keys: list, vectors: np.ndarray, persist: bool = True):
+        """
+        Append new vectors and persist the key index. With persist=False the
+        key index is only written by flush() (for many small appends); rows
+        appended since the last flush are dropped if the process dies first.
+        """
+        if not len(keys):
+            return
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {vectors.shape[1]} does not match store dim {self.dim}")
+
+        os.makedirs(self.path, exist_ok=True)
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        row_bytes = self.dim * self.dtype.itemsize
+
+        # Truncate to the committed row count first, so bytes left behind by an
+        # interrupted run can't shift later rows
+        mode = "r+b" if os.path.exists(vectors_path) else "wb"
+        with open(vectors_path, mode) as f:
+            f.truncate(self.rows * row_bytes)
+            f.seek(self.rows * row_bytes)
+            f.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+
+        for offset, key in enumerate(keys):
+            self._keys[key] = self.rows + offset
+        self.rows += len(keys)
+        self._matrix = None
+
+        if persist:
+            self.flush()
+
+    def flush(self):
+        """Write the key index and row count for everything appended so far"""
+        if self.dim is None:
+            return
+
+        _write_atomic(os.path.join(self.path, KEYS_FILE), pickle.dumps(self._keys))
+        info = {"model": self.model_name, "dim": self.dim, "dtype": self.dtype.name, "rows": self.rows}
+        _write_atomic(os.path.join(self.path, INFO_FILE), json.dumps(info, indent=2).encode("utf-8"))
+
+    def encode(self, texts: list, encode_fn) -> np.ndarray:
+        """
+        Embeddings for `texts` in order. Only texts not already in the store
+        are passed (once each) to `encode_fn`, and their vectors are saved.
+        """
+        if not texts:
+            return np.empty((0, self.dim or 0), dtype="float32")
+
+        keys = [text_key(text) for text in texts]
+        missing = [pos for pos, key in enumerate(keys) if key not in self._keys]
+
+        # Encode each distinct missing text once
+        pending = {}
+        for pos in missing:
+            pending.setdefault(keys[pos], texts[pos])
+
+        print(f"Embedding cache: {len(texts) - len(missing)} hits, {len(pending)} texts to encode")
+
+        if pending:
+            new_keys = list(pending)
+            new_vectors = np.asarray(encode_fn(list(pending.values())), dtype="float32")
+            self.add(new_keys, new_vectors)
+
+        # Read everything back from the store so cached and fresh vectors
+        # go through the same storage dtype
+        vectors, _ = self.get(keys)
+        return vectors
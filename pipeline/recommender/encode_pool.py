@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+
+import faiss
+import numpy as np
+
+from pipeline.recommender import settings
+from pipeline.recommender.model import get_model
+
+
+def encode_normalized(texts: list) -> np.ndarray:
+    """L2-normalized float32 embeddings from this process's shared encoder"""
+    embeddings = get_model().encode(
+        texts,
+        batch_size=settings.ENCODE_BATCH_SIZE,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    )
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+
+def _init_worker():
+    # Workers split the cores between them: one intra-op thread each, on CPU
+    settings.MODEL_DEVICE = "cpu"
+    settings.TORCH_THREADS = 1
+    settings.ONNX_THREADS = 1
+
+
+class _Done:
+    """Result of a chunk encoded in-process, with the AsyncResult interface"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class EncodePool:
+    """
+    Encodes chunks of texts on `workers` processes (0 = one per core), each
+    with its own model copy and a single torch / onnxruntime thread. With one
+    worker, chunks are encoded in this process by the shared model instead.
+
+    submit() returns a handle whose get() blocks for the chunk's embeddings,
+    so callers can keep a few chunks in flight and consume them in order.
+    """
+
+    def __init__(self, workers: int = None, encode_fn=encode_normalized):
+        workers = settings.ENCODE_WORKERS if workers is None else workers
+        self.workers = workers or os.cpu_count() or 1
+        self.encode_fn = encode_fn
+        self._pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            print(f"Starting {self.workers} encode worker processes...")
+            ctx = multiprocessing.get_context("spawn")
+            self._pool = ctx.Pool(self.workers, initializer=_init_worker)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            if exc[0] is None:
+                self._pool.close()
+            else:
+                self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def submit(self, texts: list):
+        if self._pool is None:
+            return _Done(self.encode_fn(texts))
+        return self._pool.apply_async(self.encode_fn, (texts,))
+
+    def encode(self, texts: list, chunk_size: int = None) -> np.ndarray:
+        """Embeddings for `texts` in order, chunks spread over the workers"""
+        if not texts:
+            return np.empty((0, 0), dtype="float32")
+
+        # Enough chunks to keep every worker busy
+        chunk_size = chunk_size or max(1, min(settings.BUILD_CHUNK_SIZE, -(-len(texts) // self.workers)))
+        handles = [self.submit(texts[start:start + chunk_size]) for start in range(0, len(texts), chunk_size)]
+        return np.vstack([handle.get() for handle in handles])
@@ -0,0 +1,227 @@
+import json
+import os
+
+import numpy as np
+
+from pipeline.recommender import settings
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+
+ENCODER_BACKENDS = ("torch", "onnx-int8")
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+ONNX_INFO_FILE = "encoder.json"
+
+
+def cache_key(backend: str = None, model_name: str = MODEL_NAME) -> str:
+    """
+    Key of a backend's vectors in the on-disk embedding cache. int8 vectors
+    differ slightly from fp32 ones, so each backend gets its own entry.
+    """
+    backend = backend or settings.ENCODER_BACKEND
+    return model_name if backend == "torch" else f"{model_name}:{backend}"
+
+
+class TorchEncoder:
+    """The fp32 SentenceTransformer (PyTorch), on GPU when available"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str = MODEL_NAME, device: str = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device=self.device)
+
+    @property
+    def cache_key(self) -> str:
+        return cache_key(self.backend, self.model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs):
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=convert_to_numpy,
+            **kwargs,
+        )
+
+
+def onnx_exported(model_dir: str) -> bool:
+    return all(
+        os.path.exists(os.path.join(model_dir, filename))
+        for filename in (ONNX_INT8_FILE, ONNX_INFO_FILE)
+    )
+
+
+def export_onnx(model_name: str = MODEL_NAME, model_dir: str = None) -> str:
+    """
+    Export the SentenceTransformer's transformer to ONNX and quantize its
+    weights to int8 (dynamic quantization: activations stay float and are
+    quantized per batch at run time). Pooling / normalization are redone in
+    numpy by OnnxEncoder, so only the transformer is exported.
+
+    Needs torch, sentence-transformers and onnxruntime; done once per model.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    model_dir = model_dir or settings.ONNX_MODEL_DIR
+    os.makedirs(model_dir, exist_ok=True)
+
+    print(f"Exporting {model_name} to ONNX in {model_dir}...")
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    class _Transformer(torch.nn.Module):
+        def __init__(self, module):
+            super().__init__()
+            self.module = module
+
+        def forward(self, input_ids, attention_mask):
+            return self.module(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    sample = tokenizer(["faculty expertise search"], return_tensors="pt")
+    fp32_path = os.path.join(model_dir, ONNX_FP32_FILE)
+    dynamic_axes = {0: "batch", 1: "sequence"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Transformer(transformer),
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic_axes,
+                "attention_mask": dynamic_axes,
+                "last_hidden_state": dynamic_axes,
+            },
+            opset_version=14,
+        )
+
+    print("Quantizing weights to int8...")
+    quantize_dynamic(fp32_path, os.path.join(model_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(model_dir)
+
+    pooling = st_model[1]
+    info = {
+        "model": model_name,
+        "max_seq_length": st_model.max_seq_length,
+        "pooling": "cls" if getattr(pooling, "pooling_mode_cls_token", False) else "mean",
+        "normalize": any(type(module).__name__ == "Normalize" for module in st_model),
+        "dim": st_model.get_sentence_embedding_dimension(),
+    }
+    with open(os.path.join(model_dir, ONNX_INFO_FILE), "w") as f:
+        json.dump(info, f, indent=2)
+
+    print("✅ ONNX int8 encoder exported")
+    return model_dir
+
+
+class OnnxEncoder:
+    """
+    int8-quantized ONNX export of the SentenceTransformer, run with
+    onnxruntime on CPU. Same encode() interface as TorchEncoder.
+    """
+
+    backend = "onnx-int8"
+
+    def __init__(self, model_dir: str = None, threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = model_dir or settings.ONNX_MODEL_DIR
+        with open(os.path.join(model_dir, ONNX_INFO_FILE)) as f:
+            self.info = json.load(f)
+
+        threads = settings.ONNX_THREADS if threads is None else threads
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+
+        self.model_name = self.info["model"]
+        self.max_seq_length = self.info["max_seq_length"]
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_INT8_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    @property
+    def cache_key(self) -> str:
+        return cache_key(self.backend, self.model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.info["dim"]
+
+    def _encode_batch(self, texts: list) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        attention_mask = tokens["attention_mask"].astype("int64")
+        hidden = self.session.run(None, {
+            "input_ids": tokens["input_ids"].astype("int64"),
+            "attention_mask": attention_mask,
+        })[0]
+
+        if self.info["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.info["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+        return pooled.astype("float32")
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs):
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        if not texts:
+            return np.empty((0, self.info["dim"]), dtype="float32")
+
+        # Batch texts of similar length together to keep padding short
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        embeddings = np.empty((len(texts), self.info["dim"]), dtype="float32")
+
+        starts = range(0, len(texts), batch_size)
+        if show_progress_bar:
+            print(f"Encoding {len(texts)} texts in {len(starts)} batches (onnx-int8)...")
+
+        for start in starts:
+            rows = order[start:start + batch_size]
+            embeddings[rows] = self._encode_batch([texts[row] for row in rows])
+
+        return embeddings[0] if single else embeddings
+
+
+def load_encoder(backend: str = None, device: str = None):
+    """
+    New query / document encoder for the configured backend
+    (settings.ENCODER_BACKEND). Use model.get_model() for the shared one.
+    """
+    backend = backend or settings.ENCODER_BACKEND
+
+    if backend == "torch":
+        return TorchEncoder(MODEL_NAME, device=device)
+
+    if backend == "onnx-int8":
+        if not onnx_exported(settings.ONNX_MODEL_DIR):
+            export_onnx(MODEL_NAME, settings.ONNX_MODEL_DIR)
+        return OnnxEncoder(settings.ONNX_MODEL_DIR)
+
+    raise ValueError(f"Unknown encoder backend '{backend}', expected one of {ENCODER_BACKENDS}")
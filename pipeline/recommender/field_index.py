@@ -0,0 +1,236 @@
+import json
+import os
+from array import array
+
+import faiss
+import numpy as np
+
+from pipeline.recommender import settings
+from pipeline.recommender.filters import filtered_search
+from pipeline.recommender.index_factory import IndexBuilder, apply_search_params, read_index, remove_ids
+from pipeline.recommender.log import get_logger
+
+FIELD_INDEX_FILENAME = "fields.index"
+FIELD_CONFIG_FILENAME = "fields_config.json"
+FIELD_MASKS_FILENAME = "fields_mask.npz"
+
+logger = get_logger(__name__)
+
+# Fields embedded separately. The vector of field number f of faculty.id i is
+# stored under label i * len(EMBED_FIELDS) + f, so one index holds them all.
+EMBED_FIELDS = ("name", "topics", "research", "teaching", "specializations", "biography")
+
+
+def field_files(directory: str) -> list:
+    return [os.path.join(directory, name)
+            for name in (FIELD_INDEX_FILENAME, FIELD_CONFIG_FILENAME, FIELD_MASKS_FILENAME)]
+
+
+def field_index_exists(directory: str) -> bool:
+    return all(os.path.exists(path) for path in field_files(directory))
+
+
+def remove_field_index(directory: str):
+    """Drop a field index left by an earlier build, so it can't go stale"""
+    for path in field_files(directory):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def field_entries(ids: list, rows: list, fields: tuple = EMBED_FIELDS) -> tuple:
+    """
+    (labels, texts, masks) for the non-empty fields of each row. `rows` are
+    dicts field -> text aligned with `ids`; masks has one bitmask per row
+    (bit f set = field f embedded).
+    """
+    n_fields = len(fields)
+    labels, texts, masks = [], [], []
+
+    for fid, row in zip(ids, rows):
+        mask = 0
+        for field_no, field in enumerate(fields):
+            text = (row.get(field) or "").strip()
+            if not text:
+                continue
+            labels.append(fid * n_fields + field_no)
+            texts.append(text)
+            mask |= 1 << field_no
+        masks.append(mask)
+
+    return labels, texts, masks
+
+
+def field_weights(fields: tuple) -> np.ndarray:
+    """Query-time weight of each field from settings.FIELD_WEIGHTS (0 if unset)"""
+    return np.array([settings.FIELD_WEIGHTS.get(field, 0.0) for field in fields], dtype="float32")
+
+
+class FieldIndex:
+    """
+    One FAISS index over per-field embeddings, with field-tagged labels.
+
+    A query runs one search for search_k * len(fields) field hits, then
+    scores every faculty they belong to by weighted late fusion: the
+    weighted mean of its field similarities over the fields it has, with
+    the weights from settings.FIELD_WEIGHTS. Similarities of fields that
+    weren't among the hits come from the stored vectors.
+    """
+
+    def __init__(self, index, config: dict, ids: np.ndarray, masks: np.ndarray):
+        self.index = index
+        self.config = config
+        self.fields = tuple(config["fields"])
+        self._set_masks(ids, masks)
+
+    def _set_masks(self, ids, masks):
+        # Sorted faculty.id -> bitmask of embedded fields
+        order = np.argsort(ids, kind="stable")
+        self.ids = np.asarray(ids, dtype="int64")[order]
+        self.masks = np.asarray(masks, dtype="uint8")[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False) -> "FieldIndex":
+        index = read_index(os.path.join(directory, FIELD_INDEX_FILENAME), mmap=mmap)
+        with open(os.path.join(directory, FIELD_CONFIG_FILENAME)) as f:
+            config = json.load(f)
+        apply_search_params(index, config)
+
+        with np.load(os.path.join(directory, FIELD_MASKS_FILENAME)) as data:
+            return cls(index, config, data["ids"], data["masks"])
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(directory, FIELD_INDEX_FILENAME))
+        with open(os.path.join(directory, FIELD_CONFIG_FILENAME), "w") as f:
+            json.dump(self.config, f, indent=2)
+        np.savez(os.path.join(directory, FIELD_MASKS_FILENAME), ids=self.ids, masks=self.masks)
+
+    def remove(self, fids: list):
+        """Remove every field vector of `fids` (raises RuntimeError where the index can't)"""
+        fids = np.asarray(fids, dtype="int64")
+        labels = (fids[:, None] * len(self.fields) + np.arange(len(self.fields))).ravel()
+        remove_ids(self.index, labels)
+
+        keep = ~np.isin(self.ids, fids)
+        self.ids, self.masks = self.ids[keep], self.masks[keep]
+
+    def add(self, ids: list, masks: list, labels: list, embeddings: np.ndarray):
+        if len(labels):
+            self.index.add_with_ids(embeddings, np.asarray(labels, dtype="int64"))
+        self._set_masks(
+            np.concatenate([self.ids, np.asarray(ids, dtype="int64")]),
+            np.concatenate([self.masks, np.asarray(masks, dtype="uint8")]),
+        )
+
+    def _masks_for(self, fids: np.ndarray) -> np.ndarray:
+        if not len(self.ids):
+            return np.zeros(len(fids), dtype="uint8")
+        rows = np.minimum(np.searchsorted(self.ids, fids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == fids, self.masks[rows], 0).astype("uint8")
+
+    def labels_for(self, fids: np.ndarray) -> np.ndarray:
+        """Labels of every embedded field of `fids`"""
+        fids = np.asarray(fids, dtype="int64")
+        present = (self._masks_for(fids)[:, None] >> np.arange(len(self.fields))) & 1
+        labels = fids[:, None] * len(self.fields) + np.arange(len(self.fields))
+        return labels[present.astype(bool)]
+
+    def _fused_scores(self, query_vec: np.ndarray, fids: np.ndarray, known: dict) -> np.ndarray:
+        """
+        Weighted mean of field similarities for each of `fids`. `known` maps
+        label -> similarity for fields already returned by the search; the
+        rest are scored against the stored vectors in one reconstruct call.
+        Faculty with no weighted field get -inf.
+        """
+        n_fields = len(self.fields)
+        weights = field_weights(self.fields)
+
+        present = (self._masks_for(fids)[:, None] >> np.arange(n_fields)) & 1
+        needed = present.astype(bool) & (weights > 0)
+        labels = fids[:, None] * n_fields + np.arange(n_fields)
+
+        sims = np.zeros(needed.shape, dtype="float32")
+        wanted = labels[needed]
+        values = np.array([known.get(label, np.nan) for label in wanted.tolist()], dtype="float32")
+
+        missing = np.isnan(values)
+        if missing.any():
+            try:
+                vectors = self.index.reconstruct_batch(np.ascontiguousarray(wanted[missing]))
+                values[missing] = vectors @ query_vec
+            except RuntimeError as e:
+                logger.warning("Cannot reconstruct field vectors, fusing returned fields only", error=str(e))
+                rows, cols = np.nonzero(needed)
+                needed[rows[missing], cols[missing]] = False
+                values = values[~missing]
+        sims[needed] = values
+
+        field_weight = needed * weights
+        total = field_weight.sum(axis=1)
+        fused = (field_weight * sims).sum(axis=1) / np.where(total > 0, total, 1.0)
+        fused[total == 0] = -np.inf
+        return fused
+
+    def search(self, query_vecs: np.ndarray, search_ks: list, allowed_ids: np.ndarray = None) -> list:
+        """
+        One batched search for all queries, restricted to the faculty.ids in
+        `allowed_ids` if given. Returns one list of (faculty.id, fused score)
+        per query, best first, at most search_k long.
+        """
+        n_fields = len(self.fields)
+        if allowed_ids is None:
+            scores, labels = self.index.search(query_vecs, max(search_ks) * n_fields)
+        else:
+            scores, labels = filtered_search(
+                self.index, query_vecs, max(search_ks) * n_fields, self.labels_for(allowed_ids)
+            )
+
+        results = []
+        for query_vec, row_scores, row_labels, search_k in zip(query_vecs, scores, labels, search_ks):
+            hits = row_labels[: search_k * n_fields] >= 0
+            row_labels = row_labels[: search_k * n_fields][hits]
+            row_scores = row_scores[: search_k * n_fields][hits]
+            if not len(row_labels):
+                results.append([])
+                continue
+
+            fids = np.unique(row_labels // n_fields)
+            known = dict(zip(row_labels.tolist(), row_scores.tolist()))
+            fused = self._fused_scores(query_vec, fids, known)
+
+            order = np.argsort(-fused, kind="stable")[:search_k]
+            results.append([(int(fids[i]), float(fused[i])) for i in order if np.isfinite(fused[i])])
+
+        return results
+
+    def similarities(self, query_vec: np.ndarray, fids: list) -> dict:
+        """faculty.id -> fused score, e.g. for candidates only BM25 returned"""
+        fids = np.asarray(fids, dtype="int64")
+        fused = self._fused_scores(query_vec, fids, {})
+        return {int(fid): float(score) for fid, score in zip(fids, fused) if np.isfinite(score)}
+
+
+class FieldIndexBuilder:
+    """IndexBuilder for field vectors arriving in chunks, plus their field masks"""
+
+    def __init__(self, config: dict, total_rows: int, fields: tuple = EMBED_FIELDS):
+        if len(fields) > 8:
+            raise ValueError("Field masks are 8 bits wide")
+        self.fields = fields
+        self.builder = IndexBuilder(config, total_rows * len(fields))
+        self.ids = array("q")
+        self.masks = array("B")
+
+    def add(self, ids: list, masks: list, labels: list, embeddings: np.ndarray):
+        self.builder.add(embeddings, labels)
+        self.ids.extend(ids)
+        self.masks.extend(masks)
+
+    def finish(self) -> FieldIndex:
+        index, config = self.builder.finish()
+        config["fields"] = list(self.fields)
+        return FieldIndex(index, config, np.frombuffer(self.ids, dtype="int64"),
+                          np.frombuffer(self.masks, dtype="uint8"))
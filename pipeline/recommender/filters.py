@@ -0,0 +1,200 @@
+import faiss
+import numpy as np
+
+from pipeline.recommender import settings
+from pipeline.recommender.log import get_logger
+
+logger = get_logger(__name__)
+
+# Integer columns that can be filtered by range
+RANGE_FIELDS = ("citations", "works_count")
+
+
+class SearchFilter:
+    """
+    Restricts search results to some faculty types and / or citation and
+    works_count ranges. Bounds are inclusive, None leaves that side open;
+    rows with no value never match a range.
+    """
+
+    def __init__(self, faculty_types: list = None, min_citations: int = None, max_citations: int = None,
+                 min_works_count: int = None, max_works_count: int = None):
+        self.faculty_types = tuple(sorted(set(faculty_types))) if faculty_types else ()
+        self.ranges = {
+            "citations": (min_citations, max_citations),
+            "works_count": (min_works_count, max_works_count),
+        }
+
+    def is_empty(self) -> bool:
+        return not self.faculty_types and all(
+            low is None and high is None for low, high in self.ranges.values()
+        )
+
+    def key(self) -> tuple:
+        """Hashable form, part of the result cache key"""
+        return (self.faculty_types, tuple(self.ranges[field] for field in RANGE_FIELDS))
+
+    def matches(self, record: dict) -> bool:
+        """Check one record dict (name matches, database fallback rows)"""
+        if self.faculty_types and record.get("faculty_type") not in self.faculty_types:
+            return False
+
+        for field, (low, high) in self.ranges.items():
+            if low is None and high is None:
+                continue
+            value = record.get(field)
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+
+        return True
+
+    def sql(self, table: str = None) -> tuple:
+        """
+        (WHERE conditions joined by AND, parameters) for the faculty table,
+        ("", []) if empty. Columns are qualified with `table` if given (joins).
+        """
+        conditions, params = [], []
+        prefix = f"{table}." if table else ""
+
+        if self.faculty_types:
+            conditions.append(f"{prefix}faculty_type IN ({', '.join('?' for _ in self.faculty_types)})")
+            params.extend(self.faculty_types)
+
+        for field, (low, high) in self.ranges.items():
+            if low is not None:
+                conditions.append(f"{prefix}{field} >= ?")
+                params.append(low)
+            if high is not None:
+                conditions.append(f"{prefix}{field} <= ?")
+                params.append(high)
+
+        return " AND ".join(conditions), params
+
+    def __repr__(self):
+        return f"SearchFilter(faculty_types={list(self.faculty_types)}, ranges={self.ranges})"
+
+
+def active_filter(search_filter):
+    """The filter, or None when there is nothing to filter on"""
+    if search_filter is None or search_filter.is_empty():
+        return None
+    return search_filter
+
+
+class AttributeIndex:
+    """
+    Posting lists over the filterable metadata columns: the positions of
+    every faculty_type, and for each range field the positions sorted by
+    value. A filter resolves to a position mask with one pass per attribute,
+    without touching the records.
+    """
+
+    def __init__(self, metadata):
+        self.size = len(metadata)
+
+        types = np.array([value or "" for value in metadata.column("faculty_type")], dtype=object)
+        self.type_postings = {
+            faculty_type: np.flatnonzero(types == faculty_type)
+            for faculty_type in set(types.tolist()) if faculty_type
+        }
+
+        # Rows without a value are left out, so they never match a range
+        self.sorted_positions = {}
+        self.sorted_values = {}
+        for field in RANGE_FIELDS:
+            column = metadata.int_columns.get(field)
+            if column is None:
+                positions = np.empty(0, dtype="int64")
+                values = np.empty(0, dtype="int64")
+            else:
+                positions = np.flatnonzero(~np.asarray(column.nulls, dtype=bool))
+                values = np.asarray(column.values)[positions]
+                order = np.argsort(values, kind="stable")
+                positions, values = positions[order], values[order]
+            self.sorted_positions[field] = positions
+            self.sorted_values[field] = values
+
+    def mask(self, search_filter: SearchFilter) -> np.ndarray:
+        """Boolean mask over metadata positions of the rows matching the filter"""
+        mask = np.ones(self.size, dtype=bool)
+
+        if search_filter.faculty_types:
+            allowed = np.zeros(self.size, dtype=bool)
+            for faculty_type in search_filter.faculty_types:
+                allowed[self.type_postings.get(faculty_type, [])] = True
+            mask &= allowed
+
+        for field, (low, high) in search_filter.ranges.items():
+            if low is None and high is None:
+                continue
+            values = self.sorted_values[field]
+            start = np.searchsorted(values, low, side="left") if low is not None else 0
+            stop = np.searchsorted(values, high, side="right") if high is not None else len(values)
+
+            allowed = np.zeros(self.size, dtype=bool)
+            allowed[self.sorted_positions[field][start:stop]] = True
+            mask &= allowed
+
+        return mask
+
+
+def search_params(index, selector):
+    """
+    SearchParameters restricting `index.search` to `selector`, carrying the
+    index's own nprobe / efSearch (the parameter objects default to their
+    own values otherwise)
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexIDMap):
+        inner = faiss.downcast_index(inner.index)
+    if hasattr(inner, "hnsw"):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+
+    return faiss.SearchParameters(sel=selector)
+
+
+def filtered_search(index, query_vecs: np.ndarray, k: int, labels: np.ndarray) -> tuple:
+    """
+    index.search restricted to `labels` (faculty.id, field labels or list
+    positions, whatever the index stores), returning the same
+    (scores, labels) arrays padded with -1.
+
+    Filters that keep at most FILTER_EXACT_MAX vectors score just those
+    vectors from the stored copies: exact, and cheaper than any index scan.
+    Broader ones pass a bitmap ID selector to FAISS, so the index skips
+    filtered-out vectors during the search itself and still fills k results.
+    """
+    labels = np.ascontiguousarray(labels, dtype="int64")
+    scores = np.full((len(query_vecs), k), -np.inf, dtype="float32")
+    found = np.full((len(query_vecs), k), -1, dtype="int64")
+    if not len(labels) or k <= 0:
+        return scores, found
+
+    if len(labels) <= settings.FILTER_EXACT_MAX:
+        try:
+            vectors = index.reconstruct_batch(labels)
+        except RuntimeError as e:
+            logger.warning("Cannot reconstruct filtered vectors, using the ID selector", error=str(e))
+        else:
+            similarities = query_vecs @ vectors.T
+            top = min(k, len(labels))
+            order = np.argsort(-similarities, axis=1, kind="stable")[:, :top]
+            scores[:, :top] = np.take_along_axis(similarities, order, axis=1)
+            found[:, :top] = labels[order]
+            return scores, found
+
+    # Bit i set = label i allowed (size in bytes); the bitmap must outlive the search call
+    bits = np.zeros(int(labels.max()) + 1, dtype=bool)
+    bits[labels] = True
+    bitmap = np.packbits(bits, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+
+    return index.search(query_vecs, k, params=search_params(index, selector))
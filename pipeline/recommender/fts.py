@@ -0,0 +1,225 @@
+"""
+SQLite FTS5 index over the faculty table's text columns.
+
+faculty_fts is an external-content FTS5 table: it stores only the inverted
+index, the text stays in `faculty`. Triggers keep it in sync with inserts,
+deletes and updates of the indexed columns (the scraper, cleaning and
+enrichment scripts write rows one by one); load_to_db.py, which replaces
+the whole table, rebuilds it in one pass.
+
+The keyword endpoint and the database fallback of search.py query it with
+MATCH (search()), rank by bm25 (column weights in settings.FTS_WEIGHTS)
+and return a snippet of the best matching column.
+
+Create or rebuild the index of an existing database (from project root):
+    python pipeline/recommender/fts.py
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender import settings
+
+DB_PATH = "pipeline/outputs/faculty.db"
+
+FTS_TABLE = "faculty_fts"
+FTS_COLUMNS = ("name", "research", "teaching", "specializations", "topics", "biography", "faculty_type")
+
+# Columns searched by the keyword endpoint (its documented fields)
+KEYWORD_COLUMNS = ("research", "teaching", "specializations")
+
+# Highlight markers around matched terms in snippets (Markdown bold)
+SNIPPET_OPEN = "**"
+SNIPPET_CLOSE = "**"
+
+EXISTS_SQL = f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{FTS_TABLE}'"
+
+_TOKEN = re.compile(r"\w+")
+
+
+def has_index(conn) -> bool:
+    """Whether the database behind sqlite3 connection `conn` has faculty_fts"""
+    return conn.execute(EXISTS_SQL).fetchone() is not None
+
+
+def create_index(conn):
+    """
+    (Re)create faculty_fts and its sync triggers on sqlite3 connection
+    `conn` and index every row of the faculty table
+    """
+    columns = ", ".join(FTS_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+
+    conn.executescript(f"""
+        DROP TRIGGER IF EXISTS {FTS_TABLE}_insert;
+        DROP TRIGGER IF EXISTS {FTS_TABLE}_delete;
+        DROP TRIGGER IF EXISTS {FTS_TABLE}_update;
+        DROP TABLE IF EXISTS {FTS_TABLE};
+
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {columns},
+            content='faculty', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        );
+
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON faculty BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON faculty BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END;
+
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF {columns} ON faculty BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END;
+
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize');
+    """)
+    conn.commit()
+
+
+def words(text: str) -> list:
+    """The words of `text` as the FTS5 tokenizer sees them (lowercased)"""
+    return _TOKEN.findall(text.lower())
+
+
+def is_partial(text: str, last_word: str) -> bool:
+    """
+    Whether the last word of `text` may be partly typed: at least
+    settings.FTS_MIN_PREFIX characters and not followed by symbols (in
+    "c++" or "c#" the word "c" is complete)
+    """
+    return len(last_word) >= settings.FTS_MIN_PREFIX and _TOKEN.match(text.rstrip()[-1]) is not None
+
+
+def match_expression(text: str, columns: tuple = None, any_term: bool = False) -> str:
+    """
+    FTS5 query for free text, None if it has no words. The words are quoted
+    (no FTS5 syntax gets through) and match whole tokens: unlike the old
+    LIKE '%text%', "ai" doesn't find "main". Symbols are dropped like the
+    tokenizer drops them, so "c++" searches "c". The last word is also a
+    prefix when is_partial(), so partly typed input matches.
+
+    - default: the words as a phrase
+    - any_term: any of the words, bm25 ranks faculty matching more first
+    """
+    terms = words(text)
+    if not terms:
+        return None
+
+    star = "*" if is_partial(text, terms[-1]) else ""
+    if any_term:
+        expression = " OR ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"{star}'])
+    else:
+        expression = '"' + " ".join(terms) + '"' + star
+
+    if columns:
+        expression = "{" + " ".join(columns) + "} : (" + expression + ")"
+    return expression
+
+
+def _rank_function() -> str:
+    weights = ", ".join(repr(float(settings.FTS_WEIGHTS.get(column, 1.0))) for column in FTS_COLUMNS)
+    return f"bm25({weights})"
+
+
+def match_sql(select: str = "faculty.*", where: str = "", limit: bool = False, after: bool = False) -> str:
+    """
+    Query for the faculty rows matching an FTS5 expression, best bm25 first
+    (ties by id), with a `snippet` column.
+
+    The matches are ranked and paged on (rank, id) first (`page`); the
+    faculty rows and snippets are then read for that page only, in one
+    more pass over the index restricted to the page's rowid range. With
+    `after`, the page starts after a cursor row (keyset pagination in rank
+    order).
+
+    Parameters (qmark), in order: the expression; with `after` the
+    expression again and the cursor id twice; those of `where` (conditions
+    on qualified `faculty` columns); with `limit` the page size; the
+    expression once more.
+    """
+    rank = f"{FTS_TABLE}.rank MATCH '{_rank_function()}'"
+    cursor = ""
+    if after:
+        cursor = f"""AND ({FTS_TABLE}.rank, {FTS_TABLE}.rowid) > (
+                (SELECT rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? AND {rank} AND rowid = ?), ?)"""
+    join = f"CROSS JOIN faculty ON faculty.id = {FTS_TABLE}.rowid" if where else ""
+    where = f"AND {where}" if where else ""
+
+    return f"""
+        WITH page AS (
+            SELECT {FTS_TABLE}.rowid AS id, {FTS_TABLE}.rank AS score
+            FROM {FTS_TABLE} {join}
+            WHERE {FTS_TABLE} MATCH ? AND {rank} {cursor} {where}
+            ORDER BY score, id
+            {"LIMIT ?" if limit else ""}
+        )
+        SELECT {select},
+               snippet({FTS_TABLE}, -1, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}', '…', {settings.FTS_SNIPPET_TOKENS}) AS snippet
+        FROM {FTS_TABLE}
+        CROSS JOIN page ON page.id = {FTS_TABLE}.rowid
+        CROSS JOIN faculty ON faculty.id = page.id
+        WHERE {FTS_TABLE} MATCH ?
+          AND {FTS_TABLE}.rowid BETWEEN (SELECT MIN(id) FROM page) AND (SELECT MAX(id) FROM page)
+        ORDER BY page.score, page.id
+    """
+
+
+def search(conn, text: str, columns: tuple = None, any_term: bool = False, select: tuple = None,
+           where: str = "", where_params: list = (), limit: int = None, after_id: int = None) -> list:
+    """
+    Faculty matching `text` (see match_expression) in `columns` (default
+    all) as dicts of the `select` columns (default all), best first, each
+    with a `snippet`. `where` / `where_params` filter on qualified faculty
+    columns; `limit` / `after_id` page through the ranked matches.
+    `conn` is a sqlite3 connection.
+    """
+    expression = match_expression(text, columns, any_term)
+    if expression is None:
+        return []
+
+    selected = ", ".join(f"faculty.{column}" for column in select) if select else "faculty.*"
+    sql = match_sql(selected, where, limit is not None, after_id is not None)
+
+    params = [expression]
+    if after_id is not None:
+        params += [expression, after_id, after_id]
+    params += list(where_params)
+    if limit is not None:
+        params.append(limit)
+    params.append(expression)
+
+    cursor = conn.execute(sql, params)
+    names = [description[0] for description in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or rebuild the FTS5 index of the faculty table")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        start = time.perf_counter()
+        create_index(conn)
+        rows = conn.execute("SELECT COUNT(*) FROM faculty").fetchone()[0]
+        print(f"Indexed {rows} faculty rows into {FTS_TABLE} in {time.perf_counter() - start:.1f}s")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
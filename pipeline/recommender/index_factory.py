@@ -0,0 +1,313 @@
+import json
+import os
+
+import faiss
+import numpy as np
+
+from pipeline.recommender import settings
+from pipeline.recommender.log import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+CONFIG_FILENAME = "index_config.json"
+
+# FAISS wants ~39 training points per IVF centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def default_config(index_type: str = None) -> dict:
+    """Index configuration from settings.py (env overridable)"""
+    return {
+        "type": index_type or settings.INDEX_TYPE,
+        "nlist": settings.IVF_NLIST,
+        "nprobe": settings.IVF_NPROBE,
+        "hnsw_m": settings.HNSW_M,
+        "ef_construction": settings.HNSW_EF_CONSTRUCTION,
+        "ef_search": settings.HNSW_EF_SEARCH,
+        "pq_m": settings.PQ_M,
+        "pq_nbits": settings.PQ_NBITS,
+        "train_sample": settings.TRAIN_SAMPLE_SIZE,
+    }
+
+
+def _resolve_config(config: dict, n: int, dim: int) -> dict:
+    """Clamp the requested config to what the corpus size supports"""
+    config = dict(config)
+    index_type = config["type"]
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        config["nlist"] = max(1, min(config["nlist"], n // MIN_POINTS_PER_CENTROID))
+        config["nprobe"] = min(config["nprobe"], config["nlist"])
+
+    if index_type == "ivf_pq":
+        if n < 2 ** config["pq_nbits"] or dim % config["pq_m"] != 0:
+            print(f"⚠️ IVF-PQ needs >= {2 ** config['pq_nbits']} vectors and dim divisible "
+                  f"by pq_m={config['pq_m']}; falling back to ivf_flat")
+            config["type"] = "ivf_flat"
+
+    return config
+
+
+def create_index(config: dict, dim: int):
+    """Empty (untrained) index for the given config. All types use inner product."""
+    index_type = config["type"]
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config["hnsw_m"], metric)
+        index.hnsw.efConstruction = config["ef_construction"]
+        return index
+
+    quantizer = faiss.IndexFlatIP(dim)
+
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, config["nlist"], metric)
+
+    return faiss.IndexIVFPQ(quantizer, dim, config["nlist"], config["pq_m"], config["pq_nbits"], metric)
+
+
+def train_sample(embeddings: np.ndarray, sample_size: int, seed: int = 0) -> np.ndarray:
+    """Random subset of the embeddings used to train IVF / PQ codebooks"""
+    if len(embeddings) <= sample_size:
+        return embeddings
+
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(embeddings), size=sample_size, replace=False)
+    return embeddings[np.sort(rows)]
+
+
+def build_faiss_index(embeddings: np.ndarray, config: dict, ids=None):
+    """
+    Create, train and fill an index from L2-normalized float32 embeddings.
+
+    With `ids`, the index is wrapped in IndexIDMap2 so search returns those
+    ids (faculty.id) instead of list positions, and rows can later be removed
+    or replaced by id. Returns (index, resolved_config).
+    """
+    n, dim = embeddings.shape
+    config = _resolve_config(config, n, dim)
+
+    index = create_index(config, dim)
+
+    if not index.is_trained:
+        sample = train_sample(embeddings, config["train_sample"])
+        print(f"Training {config['type']} index on {len(sample)} vectors...")
+        index.train(sample)
+
+    if ids is None:
+        index.add(embeddings)
+        config["id_mapped"] = False
+    else:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(embeddings, np.asarray(ids, dtype="int64"))
+        config["id_mapped"] = True
+
+    apply_search_params(index, config)
+
+    return index, config
+
+
+class IndexBuilder:
+    """
+    build_faiss_index (id-mapped) for embeddings that arrive in chunks.
+
+    Flat and HNSW indexes take every chunk as it comes. IVF / PQ indexes
+    first buffer up to `train_sample` vectors, train on them, then add the
+    buffer and everything after it, so at most one training sample is held
+    besides the index itself. `total` is the expected row count, used to size
+    nlist like build_faiss_index does.
+    """
+
+    def __init__(self, config: dict, total: int):
+        self.requested = config
+        self.total = total
+        self.config = None
+        self.index = None
+        self._buffer = []
+        self._buffered = 0
+
+    def _create(self, dim: int):
+        self.config = _resolve_config(self.requested, self.total, dim)
+        self.index = create_index(self.config, dim)
+
+    def _train_and_flush(self):
+        embeddings = np.vstack([chunk for chunk, _ in self._buffer])
+        ids = np.concatenate([chunk_ids for _, chunk_ids in self._buffer])
+        self._buffer, self._buffered = [], 0
+
+        sample = train_sample(embeddings, self.config["train_sample"])
+        print(f"Training {self.config['type']} index on {len(sample)} vectors...")
+        self.index.train(sample)
+        self.index = faiss.IndexIDMap2(self.index)
+        self.index.add_with_ids(embeddings, ids)
+
+    def add(self, embeddings: np.ndarray, ids):
+        if not len(embeddings):
+            return
+
+        ids = np.asarray(ids, dtype="int64")
+        if self.index is None:
+            self._create(embeddings.shape[1])
+            if self.index.is_trained:
+                self.index = faiss.IndexIDMap2(self.index)
+
+        if isinstance(self.index, faiss.IndexIDMap2):
+            self.index.add_with_ids(embeddings, ids)
+            return
+
+        self._buffer.append((embeddings, ids))
+        self._buffered += len(embeddings)
+        if self._buffered >= self.config["train_sample"]:
+            self._train_and_flush()
+
+    def finish(self) -> tuple:
+        """(index, resolved_config), like build_faiss_index"""
+        if self.index is None:
+            raise ValueError("No embeddings were added to the index")
+
+        if self._buffer:
+            self._train_and_flush()
+
+        self.config["id_mapped"] = True
+        apply_search_params(self.index, self.config)
+        return self.index, self.config
+
+
+def apply_search_params(index, config: dict):
+    """Set nprobe / efSearch on a (possibly wrapped) index"""
+    if not config:
+        return
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+
+    if ivf is not None:
+        ivf.nprobe = config.get("nprobe", ivf.nprobe)
+        return
+
+    hnsw_index = faiss.downcast_index(index)
+    if isinstance(hnsw_index, faiss.IndexIDMap):
+        hnsw_index = faiss.downcast_index(hnsw_index.index)
+    if hasattr(hnsw_index, "hnsw"):
+        hnsw_index.hnsw.efSearch = config.get("ef_search", hnsw_index.hnsw.efSearch)
+
+
+def enable_reconstruct(index):
+    """
+    IVF indexes can only return stored vectors (reconstruct) with a direct
+    map from vector id to list entry; build it. Other index types already can.
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+
+    try:
+        ivf.make_direct_map()
+    except RuntimeError as e:
+        logger.warning("Could not build IVF direct map", error=str(e))
+
+
+def remove_ids(index, ids) -> int:
+    """
+    index.remove_ids for faculty / field ids. IndexIDMap2 compacts its id map
+    after a removal but an IVF index keeps the old internal ids in its lists,
+    so the remaining entries are renumbered to match; otherwise search and
+    reconstruct would return the ids of their neighbours in the id map.
+    Raises RuntimeError where the index can't remove (HNSW).
+    """
+    ids = np.asarray(ids, dtype="int64")
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+
+    id_mapped = faiss.downcast_index(index)
+    if ivf is None or not isinstance(id_mapped, faiss.IndexIDMap):
+        return index.remove_ids(ids)
+
+    id_map = faiss.vector_to_array(id_mapped.id_map)
+    new_internal = np.cumsum(~np.isin(id_map, ids)) - 1
+    removed = index.remove_ids(ids)
+
+    invlists = ivf.invlists
+    for list_no in range(ivf.nlist):
+        size = invlists.list_size(list_no)
+        if not size:
+            continue
+        ids_ptr = invlists.get_ids(list_no)
+        internal = faiss.rev_swig_ptr(ids_ptr, size).copy()
+        invlists.release_ids(list_no, ids_ptr)
+
+        renumbered = np.ascontiguousarray(new_internal[internal], dtype="int64")
+        codes_ptr = invlists.get_codes(list_no)
+        invlists.update_entries(list_no, 0, size, faiss.swig_ptr(renumbered), codes_ptr)
+        invlists.release_codes(list_no, codes_ptr)
+
+    return removed
+
+
+def disable_reconstruct(index):
+    """
+    Drop the IVF direct map again: IVF indexes can't remove ids while it
+    exists, and incremental builds need to.
+    """
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return
+
+    ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+
+
+def read_index(index_path: str, mmap: bool = False):
+    """
+    Read an index, optionally memory-mapped and read-only.
+
+    Flat codes (flat / HNSW storage) are mapped zero-copy, IVF lists are
+    mapped when the file layout allows it. Anything that can't be mapped is
+    read into memory as usual.
+    """
+    if not mmap:
+        return faiss.read_index(index_path)
+
+    flag_sets = [
+        faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY,
+        getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY,
+    ]
+    for flags in flag_sets:
+        try:
+            return faiss.read_index(index_path, flags)
+        except RuntimeError:
+            continue
+
+    return faiss.read_index(index_path)
+
+
+def config_path(index_path: str) -> str:
+    return os.path.join(os.path.dirname(index_path), CONFIG_FILENAME)
+
+
+def save_index_config(index_path: str, config: dict):
+    with open(config_path(index_path), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_index_config(index_path: str) -> dict:
+    """Config saved next to the index; indexes built before it existed are flat"""
+    path = config_path(index_path)
+    if not os.path.exists(path):
+        return {"type": "flat"}
+
+    with open(path) as f:
+        return json.load(f)
@@ -1,82 +1,295 @@
 import sys
 import os
-from sentence_transformers import SentenceTransformer
+import threading
 import faiss
 import pickle
-import torch
 
-MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+from pipeline.recommender.bm25 import BM25_FILENAME, BM25Index
+from pipeline.recommender.field_index import FieldIndex, field_index_exists
+from pipeline.recommender.filters import AttributeIndex
+from pipeline.recommender.model import get_model
+from pipeline.recommender.name_index import NameIndex
+from pipeline.recommender.neighbors import NeighborGraph, neighbor_graph_exists
+from pipeline.recommender.text_features import TextFeatures
+from pipeline.recommender.index_factory import (
+    apply_search_params,
+    enable_reconstruct,
+    load_index_config,
+    read_index,
+)
+from pipeline.recommender.metadata_store import MANIFEST_FILE, MetadataStore, store_exists, store_path
+from pipeline.recommender import metrics, readiness, settings
+from pipeline.recommender.log import get_logger
+
+logger = get_logger(__name__)
 
 model = None
 index = None
 metadata = None
+name_index = None
+attribute_index = None
+bm25_index = None
+field_index = None
+neighbor_graph = None
+text_features = None
+id_positions = None
+id_mapped = False
+data_version = None
+
+_lazy_lock = threading.Lock()
+# Serializes loads, e.g. the API's background warmup and a request arriving meanwhile
+_load_lock = threading.Lock()
+
+
+def _file_version(*paths) -> str:
+    """Identify a set of files by size and modification time"""
+    parts = []
+    for path in paths:
+        stat = os.stat(path)
+        parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+    return "-".join(parts)
 
 
 def load_all():
     """Load the model, FAISS index, and metadata"""
-    global model, index, metadata
+    with _load_lock, metrics.stage("load_all"):
+        _load_all()
 
-    try:
-        device = "cuda" if torch.cuda.is_available() else "cpu"
 
-        print(f"\n🚀 Loading transformer on {device}...")
-        model = SentenceTransformer(MODEL_NAME, device=device)
+def _load_all():
+    global model, index, metadata, name_index, attribute_index, bm25_index, field_index, neighbor_graph, text_features, id_positions, id_mapped, data_version
+
+    try:
+        logger.info("Loading recommender")
+        with readiness.track("model"), metrics.stage("load_model"):
+            model = get_model()
 
-        # Try different possible paths (Search directory relative to execution)
-        # Try different possible paths (Search directory relative to execution)
+        # Try different possible data directories (Search directory relative to execution)
         base_dir = os.path.dirname(os.path.abspath(__file__)) # pipeline/recommender
         root_dir = os.path.dirname(os.path.dirname(base_dir)) # Project root
 
-        possible_paths = [
-            (os.path.join(base_dir, "data", "faiss.index"), os.path.join(base_dir, "data", "metadata.pkl")),
-            ("pipeline/recommender/data/faiss.index", "pipeline/recommender/data/metadata.pkl"),
-            ("data/faiss.index", "data/metadata.pkl"),
+        possible_dirs = [
+            os.path.join(base_dir, "data"),
+            "pipeline/recommender/data",
+            "data",
         ]
+        if settings.DATA_DIR:
+            possible_dirs = [settings.DATA_DIR]
 
         index_loaded = False
-        for index_path, meta_path in possible_paths:
-            if os.path.exists(index_path) and os.path.exists(meta_path):
-                print(f"📂 Loading FAISS index from: {index_path}")
-                index = faiss.read_index(index_path)
-
-                print(f"📂 Loading metadata from: {meta_path}")
-                with open(meta_path, "rb") as f:
-                    metadata = pickle.load(f)
-
-                print(f"✅ Loaded {len(metadata)} faculty records")
-                print(f"✅ FAISS index dimension: {index.d}")
-                print(f"✅ FAISS index total vectors: {index.ntotal}")
-                
-                index_loaded = True
-                break
+        for data_dir in possible_dirs:
+            index_path = os.path.join(data_dir, "faiss.index")
+            pickle_path = os.path.join(data_dir, "metadata.pkl")
+            columnar = store_exists(data_dir)
+
+            if not os.path.exists(index_path) or not (columnar or os.path.exists(pickle_path)):
+                continue
+
+            logger.info("Loading FAISS index", path=index_path)
+            with readiness.track("index"), metrics.stage("load_index"):
+                index = read_index(index_path, mmap=settings.INDEX_MMAP)
+
+                index_config = load_index_config(index_path)
+                apply_search_params(index, index_config)
+                # Stored vectors score BM25-only candidates
+                enable_reconstruct(index)
+
+                # Per-field vectors, for builds that have them
+                field_index = None
+                if settings.FIELD_SEARCH and field_index_exists(data_dir):
+                    field_index = FieldIndex.load(data_dir, mmap=settings.INDEX_MMAP)
+                    enable_reconstruct(field_index.index)
+            logger.info("Index loaded", type=index_config.get("type", "flat"), dimension=index.d,
+                        vectors=index.ntotal)
+            if field_index is not None:
+                logger.info("Field index loaded", vectors=field_index.index.ntotal, fields=",".join(field_index.fields))
+
+            with readiness.track("metadata"), metrics.stage("load_metadata"):
+                if columnar:
+                    # Memory-mapped columns, display fields are decoded on access
+                    logger.info("Mapping metadata store", path=store_path(data_dir))
+                    metadata = MetadataStore.open(data_dir)
+                    meta_path = os.path.join(store_path(data_dir), MANIFEST_FILE)
+                else:
+                    # Older builds only have the pickled list of dicts
+                    logger.info("Loading pickled metadata", path=pickle_path)
+                    with open(pickle_path, "rb") as f:
+                        metadata = MetadataStore.from_records(pickle.load(f))
+                    meta_path = pickle_path
+
+            logger.info("Metadata loaded", records=len(metadata))
+
+            # Precomputed "similar faculty" graph, rows in metadata order
+            neighbor_graph = None
+            if neighbor_graph_exists(data_dir):
+                with metrics.stage("load_neighbors"):
+                    graph = NeighborGraph.load(data_dir, mmap=settings.INDEX_MMAP)
+                if graph.aligned_with(metadata.ids):
+                    neighbor_graph = graph
+                    logger.info("k-NN graph loaded", k=neighbor_graph.k, rows=len(neighbor_graph))
+                else:
+                    logger.warning("k-NN graph doesn't match the metadata, ignoring it (rebuild the index)")
+
+            # Sparse index saved by build_index.py; older builds get one
+            # built from the metadata on first use
+            bm25_path = os.path.join(data_dir, BM25_FILENAME)
+            with metrics.stage("load_bm25"):
+                bm25_index = BM25Index.load(bm25_path) if os.path.exists(bm25_path) else None
+            if bm25_index is not None:
+                logger.info("BM25 index loaded", terms=len(bm25_index.postings))
+
+            # Id-mapped indexes return faculty.id labels instead of list
+            # positions; the lookup, the name index and the rerank text
+            # features are built on first use
+            id_mapped = bool(index_config.get("id_mapped"))
+            id_positions = None
+            name_index = None
+            attribute_index = None
+            text_features = None
+
+            data_version = _file_version(index_path, meta_path)
+
+            index_loaded = True
+            break
 
         if not index_loaded:
-            print("❌ ERROR: Could not find FAISS index or metadata!")
-            print("Searched in:")
-            for idx_path, _ in possible_paths:
-                print(f"  - {os.path.abspath(idx_path)}")
-            print("\n⚠️ Please run build_index.py first!")
-            
+            logger.error(
+                "Could not find FAISS index or metadata, run build_index.py first",
+                searched=[os.path.abspath(data_dir) for data_dir in possible_dirs],
+            )
+            for component in ("index", "metadata"):
+                readiness.set_state(component, "missing", error="run build_index.py first")
+
             # Initialize empty to prevent crashes
-            metadata = []
+            metadata = MetadataStore.from_records([])
+            text_features = None
             index = None
+            field_index = None
+            neighbor_graph = None
+            name_index = NameIndex([])
+            attribute_index = None
+            bm25_index = BM25Index.from_store(metadata)
+            id_positions = None
+            id_mapped = False
+            data_version = None
 
-        print("✅ Recommender ready!\n")
+        logger.info("Recommender ready")
 
     except Exception as e:
-        print(f"❌ Error loading recommender: {e}")
-        import traceback
-        traceback.print_exc()
-        
+        logger.exception("Error loading recommender", error=str(e))
+
         # Initialize empty to prevent crashes
-        metadata = []
+        metadata = MetadataStore.from_records([])
+        text_features = None
         index = None
+        field_index = None
+        neighbor_graph = None
+        name_index = NameIndex([])
+        attribute_index = None
+        bm25_index = BM25Index.from_store(metadata)
+        id_positions = None
+        id_mapped = False
+        data_version = None
+
+    finally:
+        readiness.mark_loaded()
 
 
 def get_all():
     """Get the loaded model, index, and metadata"""
     if model is None or index is None or metadata is None:
-        print("⚠️ Recommender not loaded, attempting to load now...")
-        load_all()
+        with _load_lock:
+            # Another thread may have finished loading while we waited
+            if model is None or index is None or metadata is None:
+                logger.warning("Recommender not loaded, attempting to load now")
+                with metrics.stage("load_all"):
+                    _load_all()
     
-    return model, index, metadata
\ No newline at end of file
+    return model, index, metadata
+
+
+def get_name_index():
+    """Get the name index over the loaded metadata (built on first use)"""
+    global name_index
+
+    if name_index is None:
+        _, _, records = get_all()
+        with _lazy_lock:
+            if name_index is None:
+                with metrics.stage("build_name_index"):
+                    name_index = NameIndex(records.column("name"))
+                logger.info("Name index built", names=len(name_index))
+
+    return name_index
+
+
+def get_attribute_index():
+    """Get the filter posting lists over the loaded metadata (built on first use)"""
+    global attribute_index
+
+    if attribute_index is None:
+        _, _, records = get_all()
+        with _lazy_lock:
+            if attribute_index is None:
+                with metrics.stage("build_attribute_index"):
+                    attribute_index = AttributeIndex(records)
+                logger.info("Filter posting lists built", faculty_types=len(attribute_index.type_postings))
+
+    return attribute_index
+
+
+def get_bm25_index():
+    """Get the BM25 index over the loaded metadata (built on first use for older builds)"""
+    global bm25_index
+
+    if bm25_index is None:
+        _, _, records = get_all()
+        with _lazy_lock:
+            if bm25_index is None:
+                with metrics.stage("build_bm25_index"):
+                    bm25_index = BM25Index.from_store(records)
+                logger.info("BM25 index built", records=len(bm25_index))
+
+    return bm25_index
+
+
+def get_field_index():
+    """Per-field index of the loaded build, None if it has none or FIELD_SEARCH is off"""
+    return field_index
+
+
+def get_neighbor_graph():
+    """k-NN graph of the loaded build, None if it has none"""
+    return neighbor_graph
+
+
+def get_text_features():
+    """Get the rerank text features over the loaded metadata (built on first use)"""
+    global text_features
+
+    if text_features is None:
+        _, _, records = get_all()
+        with _lazy_lock:
+            if text_features is None:
+                with metrics.stage("build_text_features"):
+                    text_features = TextFeatures(records)
+                logger.info("Rerank text features built", records=len(records))
+
+    return text_features
+
+
+def get_id_positions():
+    """faculty.id -> metadata position for id-mapped indexes, None for positional ones"""
+    global id_positions
+
+    if id_mapped and id_positions is None:
+        with _lazy_lock:
+            if id_positions is None:
+                id_positions = metadata.id_positions()
+
+    return id_positions
+
+
+def get_data_version():
+    """Version of the loaded index + metadata files (changes on every rebuild)"""
+    return data_version
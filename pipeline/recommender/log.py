@@ -0,0 +1,110 @@
+import json
+import logging
+import sys
+import threading
+
+from pipeline.recommender import settings
+
+# Every recommender logger lives under this one, so a single handler and
+# level (settings.LOG_LEVEL) covers the search path and the loader
+ROOT_LOGGER = "pipeline.recommender"
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    `time level logger message key=value ...`, or one JSON object per line
+    with `json_lines`. The key=value fields are the keyword arguments given
+    to StructuredLogger.
+    """
+
+    def __init__(self, json_lines: bool = False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record) -> str:
+        fields = getattr(record, "fields", None) or {}
+
+        if self.json_lines:
+            entry = {
+                "time": self.formatTime(record),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str, ensure_ascii=False)
+
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value!r}" if isinstance(value, str) else f"{key}={value}"
+                                   for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class StructuredLogger:
+    """
+    logging.Logger with the context as keyword fields, e.g.
+
+        logger.debug("Search query", query=query, k=k)
+
+    Disabled levels return before any formatting or I/O, so per-query DEBUG
+    messages cost one level check under load.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+
+    def _log(self, level: int, message: str, fields: dict, exc_info=False):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, message, extra={"fields": fields}, exc_info=exc_info, stacklevel=3)
+
+    def debug(self, message: str, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message: str, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message: str, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message: str, **fields):
+        self._log(logging.ERROR, message, fields)
+
+    def exception(self, message: str, **fields):
+        """ERROR with the current exception's traceback"""
+        self._log(logging.ERROR, message, fields, exc_info=True)
+
+
+def configure():
+    """
+    Attach one stderr handler to the recommender loggers, at
+    settings.LOG_LEVEL in settings.LOG_FORMAT (once per process)
+    """
+    global _configured
+
+    with _configure_lock:
+        if _configured:
+            return
+
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(StructuredFormatter(json_lines=settings.LOG_FORMAT == "json"))
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.addHandler(handler)
+        root.setLevel(settings.LOG_LEVEL.upper())
+        # Don't print twice through the root logger (uvicorn / streamlit configure it)
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Structured logger for module `name` (a pipeline.recommender module)"""
+    configure()
+    return StructuredLogger(logging.getLogger(name))
@@ -0,0 +1,332 @@
+import json
+import mmap
+import os
+from array import array
+
+import numpy as np
+
+STORE_DIR = "metadata"
+MANIFEST_FILE = "manifest.json"
+STORE_VERSION = 2
+
+# Columns read while ranking / filtering; everything else is a display field,
+# kept as one JSON blob per record and only decoded for returned results
+INT_COLUMNS = ("id", "citations", "works_count")
+TEXT_COLUMNS = ("name", "faculty_type", "topics", "research", "specializations", "biography")
+DISPLAY_COLUMN = "display"
+
+
+def store_path(directory: str) -> str:
+    return os.path.join(directory, STORE_DIR)
+
+
+def store_exists(directory: str) -> bool:
+    return os.path.exists(os.path.join(store_path(directory), MANIFEST_FILE))
+
+
+def _save_atomic(path: str, write_fn):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write_fn(f)
+    os.replace(tmp_path, path)
+
+
+def _map_file(path: str):
+    if not os.path.getsize(path):
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _text_bytes(value) -> bytes:
+    return b"" if value is None else str(value).encode("utf-8")
+
+
+def _display_blob(record: dict) -> str:
+    """JSON of the fields that don't get a column of their own"""
+    column_names = set(INT_COLUMNS) | set(TEXT_COLUMNS)
+    return json.dumps({k: v for k, v in record.items() if k not in column_names}, ensure_ascii=False)
+
+
+def _merge_fields(fields: list, records: list):
+    """Append record keys not seen yet to `fields`, keeping first-seen order"""
+    seen = set(fields)
+    for record in records:
+        for field in record:
+            if field not in seen:
+                seen.add(field)
+                fields.append(field)
+
+
+def _offsets(chunks: list) -> np.ndarray:
+    offsets = np.zeros(len(chunks) + 1, dtype="int64")
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    return offsets
+
+
+class IntColumn:
+    """int64 values with a null mask"""
+
+    def __init__(self, values: np.ndarray, nulls: np.ndarray):
+        self.values = values
+        self.nulls = nulls
+
+    @classmethod
+    def build(cls, raw: list) -> "IntColumn":
+        nulls = np.array([value is None for value in raw], dtype=bool)
+        values = np.array([0 if value is None else int(value) for value in raw], dtype="int64")
+        return cls(values, nulls)
+
+    def get(self, pos: int):
+        return None if self.nulls[pos] else int(self.values[pos])
+
+    def files(self, name: str) -> dict:
+        return {f"{name}.npy": self.values, f"{name}.nulls.npy": self.nulls}
+
+    @classmethod
+    def open(cls, directory: str, name: str) -> "IntColumn":
+        return cls(
+            np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, f"{name}.nulls.npy"), mmap_mode="r"),
+        )
+
+
+class TextColumn:
+    """UTF-8 strings concatenated in one buffer, with int64 offsets and a null mask"""
+
+    def __init__(self, data, offsets: np.ndarray, nulls: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+        self.nulls = nulls
+
+    @classmethod
+    def build(cls, raw: list) -> "TextColumn":
+        chunks = [_text_bytes(value) for value in raw]
+        nulls = np.array([value is None for value in raw], dtype=bool)
+        return cls(b"".join(chunks), _offsets(chunks), nulls)
+
+    def get_bytes(self, pos: int):
+        if self.nulls[pos]:
+            return None
+        return self.data[int(self.offsets[pos]):int(self.offsets[pos + 1])]
+
+    def get(self, pos: int):
+        value = self.get_bytes(pos)
+        return None if value is None else value.decode("utf-8")
+
+    def files(self, name: str) -> dict:
+        return {
+            f"{name}.bin": self.data,
+            f"{name}.offsets.npy": self.offsets,
+            f"{name}.nulls.npy": self.nulls,
+        }
+
+    @classmethod
+    def open(cls, directory: str, name: str) -> "TextColumn":
+        return cls(
+            _map_file(os.path.join(directory, f"{name}.bin")),
+            np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(directory, f"{name}.nulls.npy"), mmap_mode="r"),
+        )
+
+
+class MetadataStore:
+    """
+    Read-only, columnar faculty metadata.
+
+    Ranking and filter fields are stored column-wise (int64 arrays and
+    offset-indexed UTF-8 buffers with null masks), so search reads single
+    fields by position without building a dict per hit. The remaining
+    display fields live in one JSON blob per record, decoded only when a
+    result is returned. On disk every column is a separate file under
+    `metadata/`, memory-mapped on open: startup cost doesn't depend on corpus
+    size and uvicorn workers share pages through the OS page cache.
+
+    Indexing and iteration still yield full record dicts (a fresh dict on
+    every access) for code that wants the old list-of-dicts view.
+    """
+
+    def __init__(self, fields: list, int_columns: dict, text_columns: dict, display: TextColumn):
+        self.fields = fields
+        self.int_columns = int_columns
+        self.text_columns = text_columns
+        self.display = display
+        self.ids = int_columns["id"].values
+        self._id_positions = None
+
+    @classmethod
+    def from_records(cls, records: list) -> "MetadataStore":
+        """In-memory store with the same layout, e.g. for a legacy metadata.pkl"""
+        fields = []
+        _merge_fields(fields, records)
+
+        int_columns = {
+            name: IntColumn.build([record.get(name) for record in records])
+            for name in INT_COLUMNS
+        }
+        text_columns = {
+            name: TextColumn.build([record.get(name) for record in records])
+            for name in TEXT_COLUMNS
+        }
+
+        display = TextColumn.build([_display_blob(record) for record in records])
+
+        return cls(fields, int_columns, text_columns, display)
+
+    @classmethod
+    def open(cls, directory: str) -> "MetadataStore":
+        path = store_path(directory)
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        int_columns = {name: IntColumn.open(path, name) for name in manifest["int_columns"]}
+        text_columns = {name: TextColumn.open(path, name) for name in manifest["text_columns"]}
+        display = TextColumn.open(path, DISPLAY_COLUMN)
+
+        return cls(manifest["fields"], int_columns, text_columns, display)
+
+    @classmethod
+    def write(cls, records: list, directory: str):
+        writer = MetadataWriter(directory)
+        writer.append(records)
+        writer.close()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def value(self, field: str, pos: int):
+        """One ranking/filter field of one record, without decoding the rest"""
+        column = self.text_columns.get(field) or self.int_columns[field]
+        return column.get(pos)
+
+    def column(self, field: str) -> list:
+        """All values of one ranking/filter field, in record order"""
+        column = self.text_columns.get(field) or self.int_columns[field]
+        return [column.get(pos) for pos in range(len(self))]
+
+    def record(self, pos: int) -> dict:
+        """Full record for one position, fields in their original order"""
+        pos = int(pos)
+        if pos < 0:
+            pos += len(self)
+        if not 0 <= pos < len(self):
+            raise IndexError(pos)
+
+        display = json.loads(self.display.get_bytes(pos))
+        record = {}
+        for field in self.fields:
+            if field in display:
+                record[field] = display[field]
+            elif field in self.text_columns:
+                record[field] = self.text_columns[field].get(pos)
+            elif field in self.int_columns:
+                record[field] = self.int_columns[field].get(pos)
+        return record
+
+    def __getitem__(self, pos) -> dict:
+        return self.record(pos)
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self.record(pos)
+
+    def id_positions(self) -> dict:
+        """faculty.id -> position, built on first use"""
+        if self._id_positions is None:
+            self._id_positions = dict(zip(self.ids.tolist(), range(len(self))))
+        return self._id_positions
+
+
+class _TextFileWriter:
+    """Streams one text column to disk; offsets and null flags stay in compact arrays"""
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self.file = open(os.path.join(directory, f"{name}.bin.tmp"), "wb")
+        self.offsets = array("q", [0])
+        self.nulls = array("b")
+
+    def write(self, value):
+        data = _text_bytes(value)
+        self.file.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+        self.nulls.append(value is None)
+
+    def close(self):
+        self.file.close()
+        os.replace(
+            os.path.join(self.directory, f"{self.name}.bin.tmp"),
+            os.path.join(self.directory, f"{self.name}.bin"),
+        )
+        _save_atomic(
+            os.path.join(self.directory, f"{self.name}.offsets.npy"),
+            lambda f: np.save(f, np.frombuffer(self.offsets, dtype="int64")),
+        )
+        _save_atomic(
+            os.path.join(self.directory, f"{self.name}.nulls.npy"),
+            lambda f: np.save(f, np.frombuffer(self.nulls, dtype="int8").astype(bool)),
+        )
+
+
+class MetadataWriter:
+    """
+    Writes a MetadataStore chunk by chunk, so the records never have to be
+    in memory all at once. Text columns stream to disk as they arrive; the
+    integer columns and the per-row offsets are kept in compact arrays
+    (a few bytes per row) until close(), which writes the manifest last.
+    """
+
+    def __init__(self, directory: str):
+        self.path = store_path(directory)
+        os.makedirs(self.path, exist_ok=True)
+
+        self.fields = []
+        self.count = 0
+        self._ints = {name: (array("q"), array("b")) for name in INT_COLUMNS}
+        self._texts = {name: _TextFileWriter(self.path, name) for name in TEXT_COLUMNS}
+        self._display = _TextFileWriter(self.path, DISPLAY_COLUMN)
+
+    def append(self, records: list):
+        _merge_fields(self.fields, records)
+
+        for record in records:
+            for name, (values, nulls) in self._ints.items():
+                value = record.get(name)
+                values.append(0 if value is None else int(value))
+                nulls.append(value is None)
+
+            for name, column in self._texts.items():
+                column.write(record.get(name))
+
+            self._display.write(_display_blob(record))
+
+        self.count += len(records)
+
+    def close(self):
+        for name, (values, nulls) in self._ints.items():
+            _save_atomic(
+                os.path.join(self.path, f"{name}.npy"),
+                lambda f, a=values: np.save(f, np.frombuffer(a, dtype="int64")),
+            )
+            _save_atomic(
+                os.path.join(self.path, f"{name}.nulls.npy"),
+                lambda f, a=nulls: np.save(f, np.frombuffer(a, dtype="int8").astype(bool)),
+            )
+
+        for column in self._texts.values():
+            column.close()
+        self._display.close()
+
+        # Written last: a store is only picked up once all columns are in place
+        manifest = {
+            "version": STORE_VERSION,
+            "count": self.count,
+            "fields": self.fields,
+            "int_columns": list(INT_COLUMNS),
+            "text_columns": list(TEXT_COLUMNS),
+        }
+        _save_atomic(
+            os.path.join(self.path, MANIFEST_FILE),
+            lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")),
+        )
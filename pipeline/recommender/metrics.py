@@ -0,0 +1,230 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from pipeline.recommender import settings
+
+# Histogram bucket upper bounds: stage latencies in seconds, candidate counts
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# name -> (Prometheus type, help text), in /metrics output order
+METRICS = {
+    "recommender_stage_seconds": (
+        "histogram", "Time spent in each search / load stage, per call (a batch for batched searches)"),
+    "recommender_candidates": (
+        "histogram", "Candidates per query, by source (dense = FAISS, sparse = BM25, fused)"),
+    "recommender_queries_total": (
+        "counter", "Queries by how they were answered"),
+    "recommender_fallbacks_total": (
+        "counter", "Database fallbacks and degraded searches, by reason"),
+    "recommender_cache_hits_total": ("counter", "Cache hits, by cache"),
+    "recommender_cache_misses_total": ("counter", "Cache misses, by cache"),
+    "recommender_cache_hit_ratio": ("gauge", "Hits / lookups since start, by cache"),
+    "recommender_cache_entries": ("gauge", "Entries held, by cache"),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics), thread-safe"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> tuple:
+        """(cumulative counts per bucket incl. +Inf, sum, count)"""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+
+        cumulative, running = [], 0
+        for value in counts:
+            running += value
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+_histograms = {}   # (name, labels) -> Histogram
+_counters = {}     # (name, labels) -> float
+_registry_lock = threading.Lock()
+
+# Stage timings of the request being served: {stage: seconds}, or None
+_request_timings = contextvars.ContextVar("recommender_request_timings", default=None)
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def observe(name: str, value: float, buckets: tuple = LATENCY_BUCKETS, **labels):
+    """Add `value` to histogram `name` with `labels`"""
+    if not settings.METRICS_ENABLED:
+        return
+
+    key = (name, _labels(labels))
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(key, Histogram(buckets))
+    histogram.observe(value)
+
+
+def increment(name: str, amount: float = 1, **labels):
+    """Add `amount` to counter `name` with `labels`"""
+    if not settings.METRICS_ENABLED:
+        return
+
+    key = (name, _labels(labels))
+    with _registry_lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe_candidates(source: str, count: int):
+    observe("recommender_candidates", count, COUNT_BUCKETS, source=source)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time the block as stage `name`: into the stage histogram, and into the
+    Server-Timing of the request being served, if any
+    """
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe("recommender_stage_seconds", seconds, stage=name)
+
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def request_timings():
+    """
+    Collect the stage timings of one request (the API middleware wraps each
+    request in this). Yields the {stage: seconds} dict being filled.
+    """
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+
+def current_timings():
+    """{stage: seconds} of the request being served in this context, None outside one"""
+    return _request_timings.get()
+
+
+def add_timings(timings: dict, extra: dict):
+    """Add stage timings measured elsewhere (e.g. the micro-batcher's thread)"""
+    if timings is None:
+        return
+    for name, seconds in extra.items():
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def server_timing(timings: dict, total: float = None) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in items)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + "}"
+
+
+def _cache_samples() -> dict:
+    """Cache statistics as (name, labels) -> value, read at scrape time"""
+    from pipeline.recommender.cache import embedding_cache, result_cache
+
+    samples = {}
+    for cache_name, cache in (("embedding", embedding_cache), ("result", result_cache)):
+        stats = cache.stats()
+        labels = (("cache", cache_name),)
+        samples[("recommender_cache_hits_total", labels)] = stats["hits"]
+        samples[("recommender_cache_misses_total", labels)] = stats["misses"]
+        samples[("recommender_cache_hit_ratio", labels)] = stats["hit_rate"]
+        samples[("recommender_cache_entries", labels)] = stats["size"]
+    return samples
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)"""
+    with _registry_lock:
+        histograms = dict(_histograms)
+        samples = dict(_counters)
+    samples.update(_cache_samples())
+
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+        if metric_type == "histogram":
+            for (metric, labels), histogram in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative, total, count = histogram.snapshot()
+                bounds = [repr(float(bound)) for bound in histogram.buckets] + ["+Inf"]
+                for bound, value in zip(bounds, cumulative):
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {value}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            for (metric, labels), value in sorted(samples.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def stage_summary() -> dict:
+    """{stage: {"count", "seconds", "mean_ms"}} from the stage histogram"""
+    with _registry_lock:
+        histograms = dict(_histograms)
+
+    summary = {}
+    for (name, labels), histogram in sorted(histograms.items()):
+        if name != "recommender_stage_seconds":
+            continue
+        _, total, count = histogram.snapshot()
+        summary[dict(labels)["stage"]] = {
+            "count": count,
+            "seconds": total,
+            "mean_ms": total / count * 1000 if count else 0.0,
+        }
+    return summary
+
+
+def reset():
+    """Drop every recorded value (benchmarks)"""
+    with _registry_lock:
+        _histograms.clear()
+        _counters.clear()
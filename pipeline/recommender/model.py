@@ -1,13 +1,60 @@
-from sentence_transformers import SentenceTransformer
-import torch
+import threading
+import time
 
-MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+from pipeline.recommender import settings
+from pipeline.recommender.encoders import MODEL_NAME, load_encoder
+from pipeline.recommender.log import get_logger
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+logger = get_logger(__name__)
 
-print(f"Loading model on {device}...")
+# One encoder per backend per process, created on first use. The API,
+# Streamlit and build_index.py all go through get_model(), so importing this
+# module (or anything that imports it) never loads a model by itself.
+_models = {}
+_lock = threading.Lock()
 
-model = SentenceTransformer(MODEL_NAME, device=device)
 
-def get_model():
+def resolve_device() -> str:
+    """settings.MODEL_DEVICE, with "auto" meaning cuda when available"""
+    if settings.MODEL_DEVICE != "auto":
+        return settings.MODEL_DEVICE
+
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _configure_torch():
+    import torch
+
+    if settings.TORCH_THREADS > 0:
+        torch.set_num_threads(settings.TORCH_THREADS)
+    logger.info("Torch configured", intra_op_threads=torch.get_num_threads())
+
+
+def get_model(backend: str = None):
+    """The shared encoder for `backend` (default settings.ENCODER_BACKEND), loaded once"""
+    backend = backend or settings.ENCODER_BACKEND
+
+    model = _models.get(backend)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(backend)
+        if model is None:
+            start = time.perf_counter()
+
+            if backend == "torch":
+                _configure_torch()
+                device = resolve_device()
+                logger.info("Loading model", model=MODEL_NAME, backend=backend, device=device)
+                model = load_encoder(backend, device=device)
+            else:
+                logger.info("Loading model", model=MODEL_NAME, backend=backend)
+                model = load_encoder(backend)
+
+            _models[backend] = model
+            logger.info("Model loaded", model=MODEL_NAME, backend=backend,
+                        seconds=round(time.perf_counter() - start, 3))
+
     return model
@@ -0,0 +1,120 @@
+import difflib
+from collections import defaultdict
+
+NGRAM_SIZE = 3
+
+# Share of the query's n-grams a name must contain before it is scored
+# with difflib. Names with less overlap than this are far below the 0.7 cutoff.
+MIN_GRAM_OVERLAP = 0.5
+
+# Upper bound on names handed to difflib per query (best overlap first)
+MAX_SHORTLIST = 50
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _ngrams(text: str, n: int = NGRAM_SIZE) -> set:
+    padded = f" {text} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class NameIndex:
+    """
+    Precomputed lookup structure over faculty names.
+
+    - exact: normalized name -> metadata positions (hash lookup)
+    - fuzzy: character trigram postings, used to shortlist names before
+      running difflib on the shortlist only
+
+    Built once when the recommender loads, so a name lookup no longer
+    scans every metadata entry.
+    """
+
+    def __init__(self, names: list):
+        self._exact = defaultdict(list)
+        self._by_name = defaultdict(list)
+        self._names = []
+        self._grams = []
+        self._postings = defaultdict(list)
+
+        for pos, name in enumerate(names):
+            if not name:
+                continue
+            self._exact[name.lower().strip()].append(pos)
+
+            if name not in self._by_name:
+                name_id = len(self._names)
+                self._names.append(name)
+                grams = _ngrams(normalize_name(name))
+                self._grams.append(grams)
+                for gram in grams:
+                    self._postings[gram].append(name_id)
+
+            self._by_name[name].append(pos)
+
+    @classmethod
+    def from_metadata(cls, metadata: list) -> "NameIndex":
+        return cls([f.get("name") for f in metadata])
+
+    def __len__(self):
+        return len(self._names)
+
+    def exact(self, query: str) -> list:
+        """Positions whose name equals the query (case-insensitive)."""
+        return list(self._exact.get(query.lower().strip(), ()))
+
+    def candidates(self, query: str) -> list:
+        """
+        Shortlist names sharing enough trigrams with the query.
+
+        Uses prefix filtering: a name that shares at least `min_shared`
+        of the query's grams must appear in one of the
+        (len(grams) - min_shared + 1) rarest posting lists, so only those
+        lists are scanned.
+        """
+        grams = _ngrams(normalize_name(query))
+        if not grams:
+            return []
+
+        min_shared = max(1, int(len(grams) * MIN_GRAM_OVERLAP))
+        ordered = sorted(grams, key=lambda g: len(self._postings.get(g, ())))
+        prefix = ordered[:len(grams) - min_shared + 1]
+
+        seen = set()
+        for gram in prefix:
+            seen.update(self._postings.get(gram, ()))
+
+        scored = []
+        for name_id in seen:
+            shared = len(grams & self._grams[name_id])
+            if shared >= min_shared:
+                scored.append((shared / len(grams | self._grams[name_id]), name_id))
+
+        scored.sort(reverse=True)
+        return [self._names[name_id] for _, name_id in scored[:MAX_SHORTLIST]]
+
+    def fuzzy(self, query: str, n: int = 3, cutoff: float = 0.7) -> list:
+        """
+        Same contract as difflib.get_close_matches over all names, but only
+        the trigram shortlist is scored. The best match is the same; weak
+        tail matches with little trigram overlap can be dropped.
+        """
+        return difflib.get_close_matches(query, self.candidates(query), n=n, cutoff=cutoff)
+
+    def lookup(self, query: str, n: int = 3, cutoff: float = 0.7) -> list:
+        """
+        Metadata positions for an exact name match, falling back to the
+        closest fuzzy name matches.
+        """
+        positions = self.exact(query)
+        if positions:
+            return positions
+
+        positions = []
+        for name in self.fuzzy(query, n=n, cutoff=cutoff):
+            positions.extend(self._by_name[name])
+        return sorted(positions)
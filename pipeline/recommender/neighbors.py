@@ -0,0 +1,208 @@
+import os
+
+import numpy as np
+
+from pipeline.recommender import settings
+from pipeline.recommender.index_factory import disable_reconstruct, enable_reconstruct
+
+NEIGHBORS_DIRNAME = "neighbors"
+NEIGHBOR_FILES = ("ids.npy", "neighbors.npy", "scores.npy")
+
+
+def neighbors_path(directory: str) -> str:
+    return os.path.join(directory, NEIGHBORS_DIRNAME)
+
+
+def neighbor_graph_exists(directory: str) -> bool:
+    path = neighbors_path(directory)
+    return all(os.path.exists(os.path.join(path, name)) for name in NEIGHBOR_FILES)
+
+
+def remove_neighbor_graph(directory: str):
+    """Drop a graph left by an earlier build, so it can't go stale"""
+    path = neighbors_path(directory)
+    for name in NEIGHBOR_FILES:
+        if os.path.exists(os.path.join(path, name)):
+            os.remove(os.path.join(path, name))
+
+
+def index_vectors(index, ids, block_size: int = None) -> np.ndarray:
+    """Vectors stored in the id-mapped index for `ids`, reconstructed in blocks"""
+    block_size = block_size or settings.NEIGHBORS_BLOCK_SIZE
+    ids = np.asarray(ids, dtype="int64")
+
+    enable_reconstruct(index)
+    try:
+        blocks = [
+            index.reconstruct_batch(np.ascontiguousarray(ids[start:start + block_size]))
+            for start in range(0, len(ids), block_size)
+        ]
+    finally:
+        disable_reconstruct(index)
+
+    if not blocks:
+        return np.empty((0, index.d), dtype="float32")
+    return np.ascontiguousarray(np.vstack(blocks), dtype="float32")
+
+
+def _merge_top_k(scores: np.ndarray, labels: np.ndarray, new_scores: np.ndarray,
+                 new_labels: np.ndarray, k: int) -> tuple:
+    """Best k of two (rows, *) candidate sets per row, unordered"""
+    scores = np.concatenate([scores, new_scores], axis=1)
+    labels = np.concatenate([labels, new_labels], axis=1)
+    if scores.shape[1] <= k:
+        return scores, labels
+
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, top, axis=1), np.take_along_axis(labels, top, axis=1)
+
+
+def _sorted_top_k(scores: np.ndarray, labels: np.ndarray, k: int) -> tuple:
+    """Rows sorted by descending score, padded to k with -inf / -1"""
+    order = np.argsort(-scores, axis=1, kind="stable")
+    scores = np.take_along_axis(scores, order, axis=1)
+    labels = np.take_along_axis(labels, order, axis=1)
+    labels[~np.isfinite(scores)] = -1
+
+    pad = k - scores.shape[1]
+    if pad > 0:
+        scores = np.pad(scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        labels = np.pad(labels, ((0, 0), (0, pad)), constant_values=-1)
+    return scores.astype("float32"), labels.astype("int64")
+
+
+def knn(query_ids: np.ndarray, query_vecs: np.ndarray, corpus_ids: np.ndarray,
+        corpus_vecs: np.ndarray, k: int, block_size: int = None) -> tuple:
+    """
+    Exact top-k corpus ids by inner product for every query row, leaving the
+    query's own id out. Similarities are computed one block_size x
+    block_size matrix product at a time and folded into a running top-k, so
+    memory stays at a block plus the (rows, k) result whatever the corpus
+    size. Returns (scores, ids), sorted, padded with -inf / -1.
+    """
+    block_size = block_size or settings.NEIGHBORS_BLOCK_SIZE
+    query_ids = np.asarray(query_ids, dtype="int64")
+    corpus_ids = np.asarray(corpus_ids, dtype="int64")
+    all_scores, all_labels = [], []
+
+    for q_start in range(0, len(query_ids), block_size):
+        q_ids = query_ids[q_start:q_start + block_size]
+        q_vecs = query_vecs[q_start:q_start + block_size]
+        scores = np.empty((len(q_ids), 0), dtype="float32")
+        labels = np.empty((len(q_ids), 0), dtype="int64")
+
+        for c_start in range(0, len(corpus_ids), block_size):
+            c_ids = corpus_ids[c_start:c_start + block_size]
+            similarities = q_vecs @ corpus_vecs[c_start:c_start + block_size].T
+            similarities[q_ids[:, None] == c_ids[None, :]] = -np.inf
+
+            block_labels = np.broadcast_to(c_ids, similarities.shape)
+            scores, labels = _merge_top_k(scores, labels, similarities, block_labels, k)
+
+        scores, labels = _sorted_top_k(scores, labels, k)
+        all_scores.append(scores)
+        all_labels.append(labels)
+
+    if not all_scores:
+        return np.empty((0, k), dtype="float32"), np.empty((0, k), dtype="int64")
+    return np.vstack(all_scores), np.vstack(all_labels)
+
+
+class NeighborGraph:
+    """
+    The top-k most similar faculty of every indexed faculty, by the vectors
+    stored in the FAISS index. Row i belongs to ids[i] (the build's row
+    order, i.e. the metadata store's), so "similar to X" is a row read.
+    """
+
+    def __init__(self, ids: np.ndarray, neighbors: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.neighbors = neighbors
+        self.scores = scores
+        self.k = neighbors.shape[1]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, vectors: np.ndarray, k: int = None, block_size: int = None):
+        """All-pairs graph over `vectors` (aligned with `ids`)"""
+        k = k or settings.NEIGHBORS_K
+        ids = np.asarray(ids, dtype="int64")
+        print(f"Computing {k}-NN graph over {len(ids)} vectors...")
+        scores, neighbors = knn(ids, vectors, ids, vectors, k, block_size)
+        return cls(ids, neighbors, scores)
+
+    def refresh(self, ids, vectors: np.ndarray, changed, deleted, block_size: int = None):
+        """
+        Graph over the patched rows `ids` / `vectors`, after the ids in
+        `changed` (new or re-encoded) and `deleted` were updated in the index.
+
+        Only rows whose neighbors may have moved are recomputed against the
+        whole corpus: the changed rows, and rows that listed a changed or
+        deleted faculty (their list lost an entry). Every other row can only
+        gain changed faculty as new neighbors, so it is merged with the
+        similarities to the changed vectors alone. The result is the same
+        graph a full build would give.
+        """
+        if not len(self.ids):
+            return NeighborGraph.build(ids, vectors, self.k, block_size)
+
+        ids = np.asarray(ids, dtype="int64")
+        changed = np.asarray(sorted(set(changed)), dtype="int64")
+        stale = np.union1d(changed, np.asarray(list(deleted), dtype="int64"))
+
+        old_order = np.argsort(self.ids)
+        old_sorted = self.ids[old_order]
+        slot = np.searchsorted(old_sorted, ids).clip(max=len(old_sorted) - 1)
+        known = old_sorted[slot] == ids
+        old_rows = old_order[slot]
+
+        neighbors = np.full((len(ids), self.k), -1, dtype="int64")
+        scores = np.full((len(ids), self.k), -np.inf, dtype="float32")
+        neighbors[known] = self.neighbors[old_rows[known]]
+        scores[known] = self.scores[old_rows[known]]
+
+        dirty = ~known | np.isin(ids, changed) | np.isin(neighbors, stale).any(axis=1)
+        clean = np.flatnonzero(~dirty)
+        dirty = np.flatnonzero(dirty)
+        print(f"Refreshing {self.k}-NN graph: {len(dirty)} rows recomputed, "
+              f"{len(clean)} merged with {len(changed)} changed vectors")
+
+        if len(dirty):
+            scores[dirty], neighbors[dirty] = knn(ids[dirty], vectors[dirty], ids, vectors, self.k, block_size)
+
+        if len(clean) and len(changed):
+            changed_rows = np.flatnonzero(np.isin(ids, changed))
+            new_scores, new_neighbors = knn(
+                ids[clean], vectors[clean], ids[changed_rows], vectors[changed_rows], self.k, block_size
+            )
+            merged = _merge_top_k(scores[clean], neighbors[clean], new_scores, new_neighbors, self.k)
+            scores[clean], neighbors[clean] = _sorted_top_k(*merged, self.k)
+
+        return NeighborGraph(ids, neighbors, scores)
+
+    def lookup(self, row: int, k: int) -> list:
+        """(faculty.id, similarity) of the k nearest neighbors of row `row`"""
+        return [
+            (int(fid), float(score))
+            for fid, score in zip(self.neighbors[row, :k], self.scores[row, :k])
+            if fid != -1
+        ]
+
+    def aligned_with(self, ids) -> bool:
+        """True if the rows follow `ids` (the loaded metadata order)"""
+        return len(ids) == len(self.ids) and np.array_equal(np.asarray(ids), self.ids)
+
+    def save(self, directory: str):
+        path = neighbors_path(directory)
+        os.makedirs(path, exist_ok=True)
+        for name, array in zip(NEIGHBOR_FILES, (self.ids, self.neighbors, self.scores)):
+            np.save(os.path.join(path, name), array)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = False):
+        """Load a saved graph, memory-mapped read-only with `mmap`"""
+        path = neighbors_path(directory)
+        arrays = [np.load(os.path.join(path, name), mmap_mode="r" if mmap else None) for name in NEIGHBOR_FILES]
+        return cls(*arrays)
@@ -0,0 +1,87 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from pipeline.recommender.log import get_logger
+
+logger = get_logger(__name__)
+
+# Recommender components loaded by loader.load_all(), in load order
+COMPONENTS = ("model", "index", "metadata")
+
+# pending -> loading -> ready | missing (no artifacts on disk) | failed
+_status = {name: {"state": "pending", "seconds": None, "error": None} for name in COMPONENTS}
+_status_lock = threading.Lock()
+
+_loaded = threading.Event()
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+
+
+def set_state(component: str, state: str, seconds: float = None, error: str = None):
+    with _status_lock:
+        _status[component] = {
+            "state": state,
+            "seconds": None if seconds is None else round(seconds, 3),
+            "error": error,
+        }
+
+
+@contextmanager
+def track(component: str):
+    """Mark `component` loading for the duration of the block, then ready or failed"""
+    set_state(component, "loading")
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        set_state(component, "failed", time.perf_counter() - start, str(e))
+        raise
+    set_state(component, "ready", time.perf_counter() - start)
+
+
+def mark_loaded():
+    """Called at the end of every load_all(), whatever the outcome"""
+    _loaded.set()
+
+
+def wait_loaded(timeout: float) -> bool:
+    return _loaded.wait(timeout) if timeout > 0 else _loaded.is_set()
+
+
+def status() -> dict:
+    with _status_lock:
+        return {name: dict(state) for name, state in _status.items()}
+
+
+def start_warmup():
+    """
+    Load the recommender in a background thread (once per process) and run
+    one throwaway encode, so the first real query doesn't pay for lazy
+    initialization inside the model.
+    """
+    global _warmup_thread
+
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return _warmup_thread
+
+        def warmup():
+            # Imported here so the ML stack loads in this thread, not at API import
+            from pipeline.recommender.loader import get_all, load_all
+
+            start = time.perf_counter()
+            load_all()
+
+            model, _, _ = get_all()
+            if model is not None:
+                try:
+                    model.encode(["warmup"], convert_to_numpy=True)
+                except Exception as e:
+                    logger.warning("Warmup encode failed", error=str(e))
+
+            logger.info("Recommender warmed up", seconds=round(time.perf_counter() - start, 3))
+
+        _warmup_thread = threading.Thread(target=warmup, name="recommender-warmup", daemon=True)
+        _warmup_thread.start()
+        return _warmup_thread
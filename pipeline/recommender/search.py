@@ -1,12 +1,29 @@
 import sqlite3
 import os
-import difflib
 import faiss
 import numpy as np
 
-from pipeline.recommender.loader import get_all
+from pipeline.recommender import fts, metrics, settings
+from pipeline.recommender.bm25 import reciprocal_rank_fusion
+from pipeline.recommender.filters import active_filter, filtered_search
+from pipeline.recommender.loader import (
+    get_all,
+    get_attribute_index,
+    get_bm25_index,
+    get_data_version,
+    get_field_index,
+    get_id_positions,
+    get_name_index,
+    get_neighbor_graph,
+    get_text_features,
+)
+from pipeline.recommender.cache import embedding_cache, result_cache, normalize_query, sync_version
+from pipeline.recommender.log import get_logger
 
-def hybrid_search_rerank(query: str, candidates: list, model) -> list:
+logger = get_logger(__name__)
+
+
+def hybrid_search_rerank(query: str, candidates: list, metadata, features) -> list:
     """
     Hybrid candidate filtering + semantic reranking
     
@@ -16,11 +33,19 @@ def hybrid_search_rerank(query: str, candidates: list, model) -> list:
     3. Keyword match in secondary fields (research, specializations) (score 0.78-0.85)
     4. Semantic similarity scores (from FAISS)
     
-    Returns candidates sorted by combined score, with deduplication
+    `candidates` are (metadata position, similarity score) pairs from FAISS,
+    fused with BM25 candidates.
+    Keyword checks run against the lowercased / tokenized fields in
+    `features` (TextFeatures, built on first use), so their cost doesn't grow
+    with field length.
+
+    Returns (position, similarity score, hybrid score, match type) tuples
+    sorted by combined score, with deduplication. Match type is None for
+    keyword matches.
     """
     
     if not query.strip() or not candidates:
-        return candidates
+        return [(pos, score, score, None) for pos, score in candidates]
     
     query_lower = query.lower().strip()
     query_terms = query_lower.split()
@@ -29,75 +54,54 @@ def hybrid_search_rerank(query: str, candidates: list, model) -> list:
     keyword_matches = []
     semantic_matches = []
     
-    for faculty in candidates:
-        match_type = None
-        relevance_score = 0
-        
+    for pos, similarity_score in candidates:
         # Priority 1: Exact name match
-        if faculty.get("name") and faculty["name"].lower() == query_lower:
-            faculty_copy = faculty.copy()
-            faculty_copy["_hybrid_score"] = 1.0
-            faculty_copy["_match_type"] = "exact_name"
-            exact_matches.append(faculty_copy)
+        if features.name_equals(pos, query_lower):
+            exact_matches.append((pos, similarity_score, 1.0, "exact_name"))
             continue
         
         # Priority 2: Keyword match in primary fields (name, topics)
-        primary_field_score = 0
         
         # Name contains query
-        if faculty.get("name") and query_lower in faculty["name"].lower():
-            primary_field_score = 0.95
-            keyword_matches.append({
-                "faculty": faculty.copy(),
-                "score": primary_field_score,
-                "field": "name"
-            })
+        if features.contains("name", pos, query_lower, query_terms):
+            keyword_matches.append((0.95, pos, similarity_score))
             continue
         
         # Multiple keywords in topics
-        if faculty.get("topics"):
-            topics_lower = faculty["topics"].lower()
-            terms_found = sum(1 for term in query_terms if term in topics_lower)
-            if terms_found > 0:
-                topics_score = 0.90 * (terms_found / len(query_terms)) if query_terms else 0.90
-                keyword_matches.append({
-                    "faculty": faculty.copy(),
-                    "score": topics_score,
-                    "field": "topics"
-                })
-                continue
+        terms_found = sum(1 for term in query_terms if features.has_term("topics", pos, term))
+        if terms_found > 0:
+            topics_score = 0.90 * (terms_found / len(query_terms)) if query_terms else 0.90
+            keyword_matches.append((topics_score, pos, similarity_score))
+            continue
         
         # Priority 3: Keyword match in secondary fields
         secondary_field_score = 0
         
-        if faculty.get("research") and query_lower in faculty["research"].lower():
+        if features.contains("research", pos, query_lower, query_terms):
             secondary_field_score = max(secondary_field_score, 0.85)
         
-        if faculty.get("specializations") and query_lower in faculty["specializations"].lower():
+        if features.contains("specializations", pos, query_lower, query_terms):
             secondary_field_score = max(secondary_field_score, 0.82)
         
-        if faculty.get("biography") and query_lower in faculty["biography"].lower():
+        if features.contains("biography", pos, query_lower, query_terms):
             secondary_field_score = max(secondary_field_score, 0.78)
         
         if secondary_field_score > 0:
-            keyword_matches.append({
-                "faculty": faculty.copy(),
-                "score": secondary_field_score,
-                "field": "secondary"
-            })
+            keyword_matches.append((secondary_field_score, pos, similarity_score))
             continue
         
         # Priority 4: Use semantic similarity score
-        if faculty.get("similarity_score") and faculty["similarity_score"] > 0.5:
-            faculty_copy = faculty.copy()
-            faculty_copy["_hybrid_score"] = faculty["similarity_score"]
-            faculty_copy["_match_type"] = "semantic"
-            semantic_matches.append(faculty_copy)
+        if similarity_score and similarity_score > 0.5:
+            semantic_matches.append((pos, similarity_score, similarity_score, "semantic"))
     
-    # Combine results in priority order
+    # Combine results in priority order. Keyword matches are ordered by
+    # keyword score but ranked below by their similarity score.
     combined_results = (
         exact_matches +
-        [m["faculty"] for m in sorted(keyword_matches, key=lambda x: x["score"], reverse=True)] +
+        [
+            (pos, similarity_score, similarity_score, None)
+            for _, pos, similarity_score in sorted(keyword_matches, key=lambda x: x[0], reverse=True)
+        ] +
         semantic_matches
     )
     
@@ -105,116 +109,491 @@ def hybrid_search_rerank(query: str, candidates: list, model) -> list:
     seen_ids = set()
     deduped = []
     
-    for faculty in combined_results:
-        fid = faculty.get("id")
+    for match in combined_results:
+        fid = metadata.value("id", match[0])
         if fid and fid not in seen_ids:
-            # Set hybrid score if not already set
-            if "_hybrid_score" not in faculty:
-                faculty["_hybrid_score"] = faculty.get("similarity_score", 0.5)
-            deduped.append(faculty)
+            deduped.append(match)
             seen_ids.add(fid)
     
     # Final sort by combined score
-    deduped.sort(
-        key=lambda x: x.get("_hybrid_score", x.get("similarity_score", 0)),
-        reverse=True
-    )
+    deduped.sort(key=lambda x: x[2], reverse=True)
     
     return deduped
 
 
-def search_faculty(query: str, k: int = 5):
+def _materialize(metadata, ranked: list) -> list:
+    """Build result dicts for the returned (position, score, hybrid, match type) tuples only"""
+    results = []
+
+    for pos, similarity_score, hybrid_score, match_type in ranked:
+        faculty = metadata.record(pos)
+        faculty["similarity_score"] = similarity_score
+        faculty["_hybrid_score"] = hybrid_score
+        if match_type:
+            faculty["_match_type"] = match_type
+        results.append(faculty)
+
+    return results
+
+
+def _name_matches(query: str, metadata) -> list:
     """
-    Hybrid faculty search with semantic reranking:
-    1. Load FAISS index and embeddings
-    2. Perform semantic search
-    3. Apply hybrid filtering + reranking
-    4. Return top-k results
+    Exact name match (highest priority), then fuzzy name matching,
+    both answered from the name index (built on first use)
     """
+    name_index = get_name_index()
+    return [metadata[pos] for pos in name_index.lookup(query)]
 
-    model, index, metadata = get_all()
 
-    print(f"\n🔍 Search query: '{query}'")
-    print(f"📊 Total metadata entries: {len(metadata) if metadata else 0}")
+def _encode_queries(queries: list, model) -> np.ndarray:
+    """
+    L2-normalized query embeddings. Queries seen before are served from the
+    embedding cache; the misses are encoded together in one forward pass.
+    """
+    keys = [normalize_query(q) for q in queries]
+    vectors = [embedding_cache.get(key) for key in keys]
 
-    if not query or not query.strip():
-        print("⚠️ Empty query received")
-        return []
+    missing = [pos for pos, vec in enumerate(vectors) if vec is None]
+    if missing:
+        encoded = model.encode([queries[pos] for pos in missing], convert_to_numpy=True)
+        encoded = np.ascontiguousarray(encoded, dtype="float32")
+        faiss.normalize_L2(encoded)
+        for pos, vec in zip(missing, encoded):
+            vectors[pos] = vec
+            embedding_cache.set(keys[pos], vec)
 
-    # If metadata is not loaded, try database fallback
-    if not metadata:
-        print("❌ No metadata loaded! Trying database fallback...")
-        return _search_database_fallback(query, k)
+    return np.vstack(vectors)
 
-    query_lower = query.lower().strip()
 
-    # Step 1: Exact name match (highest priority)
-    exact_matches = [
-        f for f in metadata
-        if f.get("name") and f["name"].lower().strip() == query_lower
-    ]
+def _search_k(k: int, metadata) -> int:
+    # Search more results for hybrid filtering. Fused per-field scores rank
+    # relevant faculty higher, so fewer candidates are needed with them.
+    factor = settings.FIELD_SEARCH_K_FACTOR if get_field_index() is not None else 10
+    return min(k * factor, len(metadata))
 
-    # Fuzzy name matching
-    if not exact_matches:
-        all_names = [f["name"] for f in metadata if f.get("name")]
-        close_names = difflib.get_close_matches(query, all_names, n=3, cutoff=0.7)
-        exact_matches = [
-            f for f in metadata
-            if f.get("name") in close_names
+
+def _dense_hits(query_vecs: np.ndarray, search_ks: list, mask, index, metadata) -> list:
+    """
+    One multi-row FAISS search over the per-field index when the build has
+    one, else the main index, restricted during the search to the metadata
+    positions in `mask` (None = no filter). Returns (score, label) hits per
+    query, best first.
+    """
+    field_index = get_field_index()
+
+    if field_index is not None:
+        # Fused field scores by faculty.id, in index.search row order
+        allowed_ids = metadata.ids[mask] if mask is not None else None
+        return [
+            [(score, fid) for fid, score in hits]
+            for hits in field_index.search(query_vecs, search_ks, allowed_ids)
         ]
 
-    if exact_matches:
-        print(f"✅ Found {len(exact_matches)} exact/fuzzy name matches")
-        for faculty in exact_matches:
-            faculty["similarity_score"] = 1.0
-        return exact_matches[:k]
+    if mask is None:
+        scores, indices = index.search(query_vecs, max(search_ks))
+    else:
+        # Id-mapped indexes store faculty.id, older ones list positions
+        labels = metadata.ids[mask] if get_id_positions() is not None else np.flatnonzero(mask)
+        scores, indices = filtered_search(index, query_vecs, max(search_ks), labels)
+
+    return [
+        list(zip(row_scores[:search_k], row_indices[:search_k]))
+        for row_scores, row_indices, search_k in zip(scores, indices, search_ks)
+    ]
 
-    # Step 2: Semantic search with FAISS
-    try:
-        query_vec = model.encode([query], convert_to_numpy=True)
-        faiss.normalize_L2(query_vec)
 
-        # Search more results for hybrid filtering
-        search_k = min(k * 10, len(metadata))
-        scores, indices = index.search(query_vec, search_k)
+def _semantic_candidates(queries: list, ks: list, masks: list, model, index, metadata) -> tuple:
+    """
+    Encode all queries in one forward pass and run one multi-row FAISS search
+    per distinct filter (`masks`, one per query, None = unfiltered).
+    Returns one list of (metadata position, similarity score) candidates per
+    query, in input order, and the query vectors.
+    """
+    with metrics.stage("encode"):
+        query_vecs = _encode_queries(queries, model)
 
+    search_ks = [_search_k(k, metadata) for k in ks]
+    id_positions = metadata.id_positions() if get_field_index() is not None else get_id_positions()
+
+    # Queries with the same filter share its mask object
+    groups = {}
+    for row, mask in enumerate(masks):
+        groups.setdefault(id(mask), (mask, []))[1].append(row)
+
+    hit_lists = [None] * len(queries)
+    with metrics.stage("dense_search"):
+        for mask, rows in groups.values():
+            group_hits = _dense_hits(query_vecs[rows], [search_ks[row] for row in rows], mask, index, metadata)
+            for row, hits in zip(rows, group_hits):
+                hit_lists[row] = hits
+
+    candidate_lists = []
+
+    for hits in hit_lists:
         semantic_candidates = []
 
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1 or idx >= len(metadata):
+        for score, idx in hits:
+            if idx == -1:
                 continue
 
-            faculty = metadata[idx].copy()
-            faculty["similarity_score"] = float(score)
+            # Id-mapped indexes return faculty.id, older ones a list position
+            if id_positions is not None:
+                idx = id_positions.get(int(idx), -1)
+                if idx == -1:
+                    continue
 
-            if not faculty.get("name"):
+            if idx >= len(metadata):
                 continue
 
-            semantic_candidates.append(faculty)
+            # Candidates stay (position, score) pairs; no record is decoded here
+            if not metadata.value("name", idx):
+                continue
 
-        print(f"🔎 Found {len(semantic_candidates)} semantic candidates")
+            semantic_candidates.append((int(idx), float(score)))
 
-    except Exception as e:
-        print(f"⚠️ Semantic search error: {e}")
-        semantic_candidates = []
+        metrics.observe_candidates("dense", len(semantic_candidates))
+        candidate_lists.append(semantic_candidates)
+
+    return candidate_lists, query_vecs
 
-    # If no semantic results, fallback
+
+def _bm25_mask(bm25, metadata, mask: np.ndarray) -> np.ndarray:
+    """A metadata position mask as a mask over the BM25 documents"""
+    if len(bm25.doc_ids) == len(metadata) and np.array_equal(bm25.doc_ids, metadata.ids):
+        return mask
+    return np.isin(bm25.doc_ids, metadata.ids[mask])
+
+
+def _sparse_candidates(query: str, search_k: int, metadata, mask=None) -> list:
+    """
+    (metadata position, BM25 score) candidates from the sparse index, best
+    first, restricted to the positions in `mask` if given
+    """
+    id_positions = metadata.id_positions()
+    bm25 = get_bm25_index()
+    allowed = _bm25_mask(bm25, metadata, mask) if mask is not None else None
+    sparse_candidates = []
+
+    for fid, score in bm25.search(query, search_k, allowed):
+        pos = id_positions.get(fid)
+        if pos is None or not metadata.value("name", pos):
+            continue
+        sparse_candidates.append((pos, score))
+
+    return sparse_candidates
+
+
+def _stored_similarities(index, query_vec: np.ndarray, positions: list, metadata) -> dict:
+    """
+    Similarity between the query and the indexed vectors of `positions`, for
+    candidates that only the sparse index returned. Empty if the index can't
+    reconstruct stored vectors.
+    """
+    field_index = get_field_index()
+    if field_index is not None:
+        # Same fused field score the semantic candidates have
+        fids = metadata.ids[positions].tolist()
+        by_id = field_index.similarities(query_vec, fids)
+        return {pos: by_id[fid] for pos, fid in zip(positions, fids) if fid in by_id}
+
+    labels = metadata.ids[positions] if get_id_positions() is not None else np.asarray(positions)
+    try:
+        vectors = index.reconstruct_batch(np.ascontiguousarray(labels, dtype="int64"))
+    except RuntimeError as e:
+        logger.warning("Cannot reconstruct vectors for sparse candidates", error=str(e))
+        return {}
+
+    return dict(zip(positions, (vectors @ query_vec).tolist()))
+
+
+def _fuse_candidates(dense: list, sparse: list, query_vec, index, metadata) -> list:
+    """
+    Reciprocal-rank fusion of the FAISS and BM25 candidate lists.
+
+    Returns (position, similarity score) pairs in fused order, so the rerank
+    sees the same kind of candidates as before. Candidates only BM25 found
+    get their similarity from the stored vectors (0.0 if unavailable).
+    """
+    if not sparse:
+        return dense
+
+    similarities = dict(dense)
+    fused = reciprocal_rank_fusion([[pos for pos, _ in dense], [pos for pos, _ in sparse]])
+
+    sparse_only = [pos for pos in fused if pos not in similarities]
+    if sparse_only and query_vec is not None and index is not None:
+        similarities.update(_stored_similarities(index, query_vec, sparse_only, metadata))
+
+    return [(pos, similarities.get(pos, 0.0)) for pos in fused]
+
+
+def _sparse_only_results(query: str, k: int, metadata, mask=None) -> list:
+    """
+    Results for a query that is exactly a known topic / research /
+    specialization entry, straight from BM25 (no encoder, no FAISS).
+    Scores are BM25 scores scaled so the best hit is 1.0.
+    """
+    if not get_bm25_index().is_known_phrase(query):
+        return None
+
+    hits = _sparse_candidates(query, k, metadata, mask)
+    if len(hits) < k:
+        return None
+
+    top_score = hits[0][1] or 1.0
+    ranked = [(pos, score / top_score, score / top_score, "lexical") for pos, score in hits]
+    return _materialize(metadata, ranked)
+
+
+def _rerank_candidates(query: str, semantic_candidates: list, k: int, metadata, search_filter=None) -> list:
+    # If neither FAISS nor BM25 found anything, fallback
     if not semantic_candidates:
-        print("📚 No semantic results, trying database fallback...")
-        return _search_database_fallback(query, k)
+        logger.debug("No semantic results, trying database fallback", query=query)
+        metrics.increment("recommender_fallbacks_total", reason="no_candidates")
+        with metrics.stage("db_fallback"):
+            return _search_database_fallback(query, k, search_filter)
 
     # Step 3: Apply hybrid filtering + semantic reranking
-    print(f"🎯 Applying hybrid filtering + semantic reranking...")
-    reranked_results = hybrid_search_rerank(query, semantic_candidates, model)
+    with metrics.stage("rerank"):
+        reranked_results = hybrid_search_rerank(query, semantic_candidates, metadata, get_text_features())
+        results = _materialize(metadata, reranked_results[:k])
+
+    logger.debug("Reranked candidates", query=query, candidates=len(semantic_candidates), returned=len(results))
+    return results
+
+
+def _result_key(query: str, k: int, search_filter) -> tuple:
+    # The query as it is searched: name matching and reranking keep its inner
+    # spacing, so "Data  Science" and "data science" can rank differently
+    return (query.strip(), k, search_filter.key() if search_filter else None)
 
-    print(f"✨ Returning top {min(k, len(reranked_results))} results")
-    
-    return reranked_results[:k]
 
+def _copy_results(results: list) -> list:
+    # Cached lists are shared between requests; callers get their own dicts
+    return [dict(faculty) for faculty in results]
 
-def _search_database_fallback(query: str, k: int = 5):
+
+def search_faculty(query: str, k: int = 5, search_filter=None):
+    """
+    Hybrid faculty search with semantic reranking:
+    1. Exact / fuzzy name match
+    2. Exact topic / research / specialization terms from BM25 alone
+    3. Perform semantic search with FAISS, fused with BM25 candidates
+    4. Apply hybrid filtering + reranking
+    5. Return top-k results
+
+    `search_filter` (filters.SearchFilter) restricts every step to faculty
+    of the given types / citation and works_count ranges; FAISS and BM25
+    apply it during the search. Repeated queries are answered from the
+    result cache.
+    """
+    logger.debug("Search query", query=query, k=k)
+    return search_faculty_many([query], [k], [search_filter])[0]
+
+
+def search_faculty_batch(queries: list, k: int = 5, search_filter=None) -> list:
+    """
+    Batched variant of search_faculty.
+
+    Name matches and fallbacks are resolved per query, but every query that
+    needs semantic search shares one model.encode call and one multi-row
+    FAISS search. Returns one result list per query, in request order.
     """
-    Fallback to direct database search when FAISS is unavailable or returns no results
+    logger.debug("Batch search", queries=len(queries), k=k)
+    return search_faculty_many(queries, [k] * len(queries), [search_filter] * len(queries))
+
+
+def search_faculty_many(queries: list, ks: list, filters: list = None) -> list:
+    """
+    search_faculty_batch with a separate k and filter per query (used by the
+    micro-batcher)
+    """
+
+    model, index, metadata = get_all()
+    sync_version(get_data_version())
+
+    filters = [active_filter(f) for f in filters] if filters else [None] * len(queries)
+    # Position mask per distinct filter, resolved from the posting lists
+    filter_masks = {None: None}
+
+    results = [[] for _ in queries]
+    pending = []
+    masks = []
+
+    for pos, (query, k, search_filter) in enumerate(zip(queries, ks, filters)):
+        if not query or not query.strip():
+            logger.debug("Empty query received")
+            metrics.increment("recommender_queries_total", outcome="empty")
+            continue
+
+        filter_key = search_filter.key() if search_filter else None
+        cache_key = _result_key(query, k, search_filter)
+
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            results[pos] = _copy_results(cached)
+            metrics.increment("recommender_queries_total", outcome="cached")
+            continue
+
+        # If metadata is not loaded, try database fallback
+        if not metadata:
+            logger.error("No metadata loaded, trying database fallback", query=query)
+            metrics.increment("recommender_fallbacks_total", reason="no_metadata")
+            metrics.increment("recommender_queries_total", outcome="db_fallback")
+            with metrics.stage("db_fallback"):
+                results[pos] = _search_database_fallback(query, k, search_filter)
+            result_cache.set(cache_key, _copy_results(results[pos]))
+            continue
+
+        if filter_key not in filter_masks:
+            with metrics.stage("filter"):
+                filter_masks[filter_key] = get_attribute_index().mask(search_filter)
+            logger.debug("Filter resolved", filter=repr(search_filter),
+                         matches=int(filter_masks[filter_key].sum()))
+        mask = filter_masks[filter_key]
+
+        # Step 1: Exact / fuzzy name match
+        with metrics.stage("name_match"):
+            exact_matches = _name_matches(query, metadata)
+            if search_filter:
+                exact_matches = [faculty for faculty in exact_matches if search_filter.matches(faculty)]
+        if exact_matches:
+            logger.debug("Exact / fuzzy name matches", query=query, matches=len(exact_matches))
+            metrics.increment("recommender_queries_total", outcome="name_match")
+            results[pos] = [{**faculty, "similarity_score": 1.0} for faculty in exact_matches[:k]]
+            result_cache.set(cache_key, _copy_results(results[pos]))
+            continue
+
+        # Exact-term queries can skip the transformer entirely
+        if settings.HYBRID_SPARSE and settings.SPARSE_SHORTCUT:
+            with metrics.stage("sparse_shortcut"):
+                sparse_results = _sparse_only_results(query, k, metadata, mask)
+            if sparse_results is not None:
+                logger.debug("Answered from the BM25 index", query=query, results=len(sparse_results))
+                metrics.increment("recommender_queries_total", outcome="sparse_shortcut")
+                results[pos] = sparse_results
+                result_cache.set(cache_key, _copy_results(results[pos]))
+                continue
+
+        pending.append(pos)
+        masks.append(mask)
+
+    if not pending:
+        return results
+
+    metrics.increment("recommender_queries_total", len(pending), outcome="semantic")
+
+    pending_queries = [queries[pos] for pos in pending]
+    pending_ks = [ks[pos] for pos in pending]
+    pending_filters = [filters[pos] for pos in pending]
+
+    # Step 2: Semantic search with FAISS, one encode + one search per filter for all pending queries
+    try:
+        candidate_lists, query_vecs = _semantic_candidates(
+            pending_queries, pending_ks, masks, model, index, metadata
+        )
+        logger.debug("Semantic candidates", queries=len(pending),
+                     candidates=sum(len(c) for c in candidate_lists))
+
+    except Exception as e:
+        logger.exception("Semantic search error", error=str(e))
+        metrics.increment("recommender_fallbacks_total", len(pending), reason="semantic_error")
+        candidate_lists = [[] for _ in pending]
+        query_vecs = [None for _ in pending]
+
+    # Step 2b: BM25 candidates, fused with the FAISS ones by reciprocal rank
+    if settings.HYBRID_SPARSE:
+        fused_lists = []
+        for query, k, mask, dense, query_vec in zip(
+            pending_queries, pending_ks, masks, candidate_lists, query_vecs
+        ):
+            with metrics.stage("sparse_search"):
+                sparse = _sparse_candidates(query, _search_k(k, metadata), metadata, mask)
+            with metrics.stage("fuse"):
+                fused = _fuse_candidates(dense, sparse, query_vec, index, metadata)
+            metrics.observe_candidates("sparse", len(sparse))
+            metrics.observe_candidates("fused", len(fused))
+            fused_lists.append(fused)
+        candidate_lists = fused_lists
+
+    for pos, query, k, search_filter, candidates in zip(
+        pending, pending_queries, pending_ks, pending_filters, candidate_lists
+    ):
+        results[pos] = _rerank_candidates(query, candidates, k, metadata, search_filter)
+        result_cache.set(_result_key(query, k, search_filter), _copy_results(results[pos]))
+
+    return results
+
+
+def _index_neighbors(index, label: int, k: int) -> list:
+    """
+    (label, similarity) of the k vectors nearest to the stored vector of
+    `label`, itself excluded: one index.search, no encoder involved
+    """
+    try:
+        vector = index.reconstruct_batch(np.asarray([label], dtype="int64"))
+    except RuntimeError as e:
+        logger.warning("Cannot reconstruct a stored vector", label=label, error=str(e))
+        return []
+
+    scores, labels = index.search(vector, k + 1)
+    return [
+        (int(found), float(score))
+        for score, found in zip(scores[0], labels[0])
+        if found != -1 and found != label
+    ][:k]
+
+
+def similar_faculty(faculty_id: int, k: int = 5):
+    """
+    The k faculty most similar to `faculty_id`, by the vector already stored
+    for it in the index: a row of the precomputed k-NN graph, or (no graph,
+    or k above its size) a search with the stored vector. Nothing is
+    encoded. Returns None if the faculty isn't indexed.
+    """
+    _, index, metadata = get_all()
+    if index is None:
+        return None
+
+    positions = metadata.id_positions()
+    pos = positions.get(faculty_id)
+    if pos is None:
+        return None
+
+    neighbor_graph = get_neighbor_graph()
+    with metrics.stage("similar"):
+        if neighbor_graph is not None and k <= neighbor_graph.k:
+            logger.debug("Similar faculty from the k-NN graph", faculty_id=faculty_id, k=k)
+            hits = neighbor_graph.lookup(pos, k)
+        else:
+            logger.debug("Similar faculty by index search", faculty_id=faculty_id, k=k)
+            if get_id_positions() is not None:
+                hits = _index_neighbors(index, faculty_id, k)
+            else:
+                # Positional index from an older build: labels are list positions
+                hits = [(int(metadata.ids[label]), score) for label, score in _index_neighbors(index, pos, k)]
+
+    results = []
+    for fid, score in hits:
+        faculty = metadata.record(positions[fid])
+        faculty["similarity_score"] = score
+        results.append(faculty)
+
+    return results
+
+
+_FALLBACK_COLUMNS = (
+    "id", "name", "faculty_type", "education", "research",
+    "specializations", "teaching", "email", "image_url",
+    "works_count", "topics", "phone", "address", "publications", "website_links",
+)
+
+
+def _search_database_fallback(query: str, k: int = 5, search_filter=None):
+    """
+    Fallback to direct database search when FAISS is unavailable or returns no results.
+    Uses the FTS5 index (fts.py) when the database has one: bm25-ranked, with
+    a snippet of the matching text.
     """
     try:
         # Try different possible database paths
@@ -231,59 +610,64 @@ def _search_database_fallback(query: str, k: int = 5):
                 break
         
         if not db_path:
-            print(" Database not found in any expected location")
+            logger.warning("Database not found in any expected location")
             return []
         
-        print(f"Using database: {db_path}")
+        logger.debug("Database fallback", database=db_path, query=query)
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
-        
-        query_lower = query.lower().strip()
-        
-        # Search in name, research, topics, specializations, faculty_type
-        cursor.execute("""
-            SELECT 
-                id, name, faculty_type, education, research, 
-                specializations, teaching, email, image_url, 
-                works_count, topics, phone, address, publications, website_links
-            FROM faculty
-            WHERE 
-                LOWER(name) LIKE ? OR
-                LOWER(research) LIKE ? OR
-                LOWER(topics) LIKE ? OR
-                LOWER(specializations) LIKE ? OR
-                LOWER(faculty_type) LIKE ?
-            LIMIT ?
-        """, (f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%", k))
-        
+
+        if fts.has_index(conn):
+            # The query as a phrase in the FTS5 index, best bm25 first, topped
+            # up with faculty matching any of its words. Phrase first: ranking
+            # every row with a common word costs far more than the phrase.
+            filter_sql, filter_params = search_filter.sql("faculty") if search_filter else ("", [])
+
+            rows = []
+            for any_term in (False, True):
+                seen = {row["id"] for row in rows}
+                rows.extend(row for row in fts.search(conn, query, any_term=any_term, select=_FALLBACK_COLUMNS,
+                                                      where=filter_sql, where_params=filter_params,
+                                                      limit=k + len(seen))
+                            if row["id"] not in seen)
+                if len(rows) >= k or len(fts.words(query)) < 2:
+                    break
+            rows = rows[:k]
+        else:
+            # Databases loaded before the FTS5 index existed: substring scan
+            query_lower = query.lower().strip()
+
+            # Filter conditions, if any, apply on top of the text match
+            filter_sql, filter_params = search_filter.sql() if search_filter else ("", [])
+            filter_clause = f"AND {filter_sql}" if filter_sql else ""
+
+            # Search in name, research, topics, specializations, faculty_type
+            cursor.execute(f"""
+                SELECT {", ".join(_FALLBACK_COLUMNS)}, NULL AS snippet
+                FROM faculty
+                WHERE
+                    (LOWER(name) LIKE ? OR
+                    LOWER(research) LIKE ? OR
+                    LOWER(topics) LIKE ? OR
+                    LOWER(specializations) LIKE ? OR
+                    LOWER(faculty_type) LIKE ?)
+                    {filter_clause}
+                LIMIT ?
+            """, (f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%", f"%{query_lower}%",
+                  *filter_params, k))
+            names = [description[0] for description in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+
         results = []
-        for row in cursor.fetchall():
-            faculty = {
-                "id": row[0],
-                "name": row[1],
-                "faculty_type": row[2],
-                "education": row[3],
-                "research": row[4],
-                "specializations": row[5],
-                "teaching": row[6],
-                "email": row[7],
-                "image_url": row[8],
-                "works_count": row[9],
-                "topics": row[10],
-                "phone": row[11],
-                "address": row[12],
-                "publications": row[13],
-                "website_links": row[14],
-                "similarity_score": 0.75 
-            }
+        for row in rows:
+            faculty = dict(row)
+            faculty["similarity_score"] = 0.75
             results.append(faculty)
         
         conn.close()
-        print(f"Database fallback returned {len(results)} results")
+        logger.debug("Database fallback results", query=query, results=len(results))
         return results
         
     except Exception as e:
-        print(f"Database fallback error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Database fallback error", error=str(e))
         return []
\ No newline at end of file
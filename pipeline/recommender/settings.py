@@ -0,0 +1,175 @@
+import os
+
+# Recommender settings. Each value can be overridden with the environment
+# variable of the same name, e.g. RECOMMENDER_BATCH_WINDOW_MS=10.
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_weights(name: str, default: str) -> dict:
+    """"field=weight,field=weight" -> {field: weight}"""
+    value = os.getenv(name) or default
+    weights = {}
+    for item in value.split(","):
+        field, _, weight = item.partition("=")
+        if field.strip():
+            weights[field.strip()] = float(weight)
+    return weights
+
+
+# Micro-batching of concurrent /recommend calls
+MICROBATCH_ENABLED = _env_bool("RECOMMENDER_MICROBATCH_ENABLED", True)
+BATCH_WINDOW_MS = float(os.getenv("RECOMMENDER_BATCH_WINDOW_MS", "5"))
+MAX_BATCH_SIZE = int(os.getenv("RECOMMENDER_MAX_BATCH_SIZE", "32"))
+
+# API request bounds: results per query (k of /recommend, /recommend/batch
+# and /faculty/{id}/similar) and queries per /recommend/batch request
+MAX_K = int(os.getenv("RECOMMENDER_MAX_K", "100"))
+MAX_BATCH_QUERIES = int(os.getenv("RECOMMENDER_MAX_BATCH_QUERIES", "64"))
+
+# Query embedding cache (normalized query -> vector) and result cache
+# ((normalized query, k) -> reranked results). TTLs are in seconds.
+EMBEDDING_CACHE_SIZE = int(os.getenv("RECOMMENDER_EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_TTL = float(os.getenv("RECOMMENDER_EMBEDDING_CACHE_TTL", "3600"))
+RESULT_CACHE_SIZE = int(os.getenv("RECOMMENDER_RESULT_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL = float(os.getenv("RECOMMENDER_RESULT_CACHE_TTL", "600"))
+
+# FAISS index built by build_index.py: flat | ivf_flat | hnsw | ivf_pq.
+# Search-time parameters (nprobe / efSearch) are saved with the index and
+# restored by loader.py.
+INDEX_TYPE = os.getenv("RECOMMENDER_INDEX_TYPE", "flat")
+IVF_NLIST = int(os.getenv("RECOMMENDER_IVF_NLIST", "1024"))
+IVF_NPROBE = int(os.getenv("RECOMMENDER_IVF_NPROBE", "16"))
+HNSW_M = int(os.getenv("RECOMMENDER_HNSW_M", "32"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("RECOMMENDER_HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("RECOMMENDER_HNSW_EF_SEARCH", "128"))
+PQ_M = int(os.getenv("RECOMMENDER_PQ_M", "64"))
+PQ_NBITS = int(os.getenv("RECOMMENDER_PQ_NBITS", "8"))
+TRAIN_SAMPLE_SIZE = int(os.getenv("RECOMMENDER_TRAIN_SAMPLE_SIZE", "100000"))
+
+# Persistent embedding cache used by build_index.py (keyed by model name and
+# normalized text hash). float16 halves the disk/page-cache footprint.
+EMBEDDING_STORE_DIR = os.getenv("RECOMMENDER_EMBEDDING_STORE_DIR", "pipeline/recommender/data/embedding_cache")
+EMBEDDING_STORE_DTYPE = os.getenv("RECOMMENDER_EMBEDDING_STORE_DTYPE", "float32")
+
+# Build directory the API / loader reads (faiss.index, metadata, ...). Unset,
+# it looks in pipeline/recommender/data (next to loader.py, then relative to
+# the working directory) and ./data.
+DATA_DIR = os.getenv("RECOMMENDER_DATA_DIR") or None
+
+# Memory-map the FAISS index read-only instead of reading it into the heap
+INDEX_MMAP = _env_bool("RECOMMENDER_INDEX_MMAP", True)
+
+# Sparse (BM25) retrieval over name / topics / research / specializations,
+# fused with the FAISS candidates by reciprocal-rank fusion. With the
+# shortcut on, queries that are exactly a known topic / research /
+# specialization entry are answered from BM25 alone, without the encoder.
+HYBRID_SPARSE = _env_bool("RECOMMENDER_HYBRID_SPARSE", True)
+SPARSE_SHORTCUT = _env_bool("RECOMMENDER_SPARSE_SHORTCUT", True)
+BM25_K1 = float(os.getenv("RECOMMENDER_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("RECOMMENDER_BM25_B", "0.75"))
+RRF_K = int(os.getenv("RECOMMENDER_RRF_K", "60"))
+
+# SQLite FTS5 index (faculty_fts) behind the keyword endpoint and the
+# database fallback: bm25 weight per column, words of context per snippet
+# and the shortest last word matched as a prefix (shorter ones like "ai"
+# would match every word starting with those letters)
+FTS_WEIGHTS = _env_weights(
+    "RECOMMENDER_FTS_WEIGHTS",
+    "name=10,research=4,specializations=4,topics=4,teaching=2,faculty_type=2,biography=1",
+)
+FTS_SNIPPET_TOKENS = int(os.getenv("RECOMMENDER_FTS_SNIPPET_TOKENS", "12"))
+FTS_MIN_PREFIX = int(os.getenv("RECOMMENDER_FTS_MIN_PREFIX", "3"))
+
+# Encoder backend for queries and build_index.py: torch (fp32
+# SentenceTransformer) | onnx-int8 (ONNX export with int8 weights, run with
+# onnxruntime on CPU; exported on first use). Threads 0 = onnxruntime default.
+ENCODER_BACKEND = os.getenv("RECOMMENDER_ENCODER_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("RECOMMENDER_ONNX_MODEL_DIR", "pipeline/recommender/data/onnx")
+ONNX_THREADS = int(os.getenv("RECOMMENDER_ONNX_THREADS", "0"))
+# Minimum mean top-k overlap with the fp32 model (bench_encoder.py)
+ONNX_MIN_OVERLAP = float(os.getenv("RECOMMENDER_ONNX_MIN_OVERLAP", "0.9"))
+
+# Device for the torch backend (auto | cpu | cuda) and torch intra-op threads
+# (0 = torch default). One model instance per process is shared by every user.
+MODEL_DEVICE = os.getenv("RECOMMENDER_MODEL_DEVICE", "auto")
+TORCH_THREADS = int(os.getenv("RECOMMENDER_TORCH_THREADS", "0"))
+
+# API fast start: serve the SQLite endpoints immediately and load the
+# recommender in a background thread. Until it is loaded, /recommend waits up
+# to WARMUP_WAIT_S seconds, then answers 503 {"status": "warming"}.
+FAST_START = _env_bool("RECOMMENDER_FAST_START", False)
+WARMUP_WAIT_S = float(os.getenv("RECOMMENDER_WARMUP_WAIT_S", "2"))
+
+# API read endpoints (/faculty, /faculty/{id}, /faculty/name/...,
+# /faculty/type/...) served from an immutable in-memory snapshot of the
+# faculty table instead of SQLite. The database file is checked for changes
+# at most every SNAPSHOT_CHECK_S seconds; a changed file is loaded in the
+# background and swapped in whole.
+SNAPSHOT = _env_bool("RECOMMENDER_SNAPSHOT", False)
+SNAPSHOT_CHECK_S = float(os.getenv("RECOMMENDER_SNAPSHOT_CHECK_S", "1"))
+
+# Opt-in: the database endpoints encode their rows with orjson (pip install
+# orjson) instead of validating each one through FacultyOut / FacultyMatchOut
+# first; the rows come from our own cleaned table. The OpenAPI schema is the same.
+FAST_JSON = _env_bool("RECOMMENDER_FAST_JSON", False)
+
+# Pre-encoded (and gzipped) bodies of /faculty, /faculty/type/... and
+# /faculty/{id}, keyed by path and query, with ETag / If-None-Match (304).
+# Entries belong to a data version: DATA_VERSION when set (e.g. the pipeline
+# run id, set at deploy), else the database file or snapshot being served.
+# At most RESPONSE_CACHE_SIZE entries and RESPONSE_CACHE_MAX_MB of bodies.
+RESPONSE_CACHE = _env_bool("RECOMMENDER_RESPONSE_CACHE", True)
+RESPONSE_CACHE_SIZE = int(os.getenv("RECOMMENDER_RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_MAX_MB = float(os.getenv("RECOMMENDER_RESPONSE_CACHE_MAX_MB", "64"))
+RESPONSE_CACHE_GZIP = _env_bool("RECOMMENDER_RESPONSE_CACHE_GZIP", True)
+DATA_VERSION = os.getenv("RECOMMENDER_DATA_VERSION", "")
+
+# build_index.py streams the faculty table in chunks of BUILD_CHUNK_SIZE rows
+# and encodes them on ENCODE_WORKERS processes (0 = one per core, 1 = in
+# this process, e.g. on GPU), ENCODE_BATCH_SIZE texts per forward pass.
+BUILD_CHUNK_SIZE = int(os.getenv("RECOMMENDER_BUILD_CHUNK_SIZE", "2048"))
+ENCODE_WORKERS = int(os.getenv("RECOMMENDER_ENCODE_WORKERS", "1"))
+ENCODE_BATCH_SIZE = int(os.getenv("RECOMMENDER_ENCODE_BATCH_SIZE", "64"))
+
+# Per-field embeddings (name, topics, research, teaching, specializations,
+# biography) in a second, field-tagged index built next to the main one.
+# Search fuses the fields of each candidate with FIELD_WEIGHTS (weighted mean
+# over the fields a faculty has) and only fetches k * FIELD_SEARCH_K_FACTOR
+# candidates for reranking instead of k * 10.
+FIELD_INDEX = _env_bool("RECOMMENDER_FIELD_INDEX", True)
+FIELD_SEARCH = _env_bool("RECOMMENDER_FIELD_SEARCH", True)
+FIELD_WEIGHTS = _env_weights(
+    "RECOMMENDER_FIELD_WEIGHTS",
+    "research=1.0,topics=1.0,specializations=0.8,teaching=0.5,biography=0.4,name=0.2",
+)
+FIELD_SEARCH_K_FACTOR = int(os.getenv("RECOMMENDER_FIELD_SEARCH_K_FACTOR", "3"))
+
+# Filtered search (faculty_type, citations / works_count ranges). Filters
+# matching at most FILTER_EXACT_MAX faculty score only those vectors exactly;
+# broader ones are pushed into the FAISS search as an ID selector.
+FILTER_EXACT_MAX = int(os.getenv("RECOMMENDER_FILTER_EXACT_MAX", "4096"))
+
+# "Similar faculty" graph: the NEIGHBORS_K nearest faculty of every indexed
+# faculty by their stored vectors, computed by build_index.py in
+# NEIGHBORS_BLOCK_SIZE x NEIGHBORS_BLOCK_SIZE similarity blocks and patched
+# by incremental builds. Larger k at query time falls back to an index search.
+NEIGHBOR_GRAPH = _env_bool("RECOMMENDER_NEIGHBOR_GRAPH", True)
+NEIGHBORS_K = int(os.getenv("RECOMMENDER_NEIGHBORS_K", "20"))
+NEIGHBORS_BLOCK_SIZE = int(os.getenv("RECOMMENDER_NEIGHBORS_BLOCK_SIZE", "2048"))
+
+# Logging of the search path and loader: level (per-query messages are
+# DEBUG, load messages INFO) and format (text = "time level logger message
+# key=value ...", json = one object per line).
+LOG_LEVEL = os.getenv("RECOMMENDER_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("RECOMMENDER_LOG_FORMAT", "text")
+
+# Per-stage latency histograms, candidate counts and fallback / cache
+# counters, exposed by the API on /metrics (Prometheus text format) and per
+# response in a Server-Timing header.
+METRICS_ENABLED = _env_bool("RECOMMENDER_METRICS", True)
@@ -0,0 +1,58 @@
+import os
+import time
+
+_IMPORTED_AT = time.perf_counter()
+
+
+def _process_age():
+    """Seconds since this process started (Linux /proc), None if unknown"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def process_start() -> float:
+    """perf_counter() value at process start (or when this module was first imported)"""
+    age = _process_age()
+    if age is None:
+        return _IMPORTED_AT
+    return time.perf_counter() - age
+
+
+class StartupTimer:
+    """
+    Wall-clock time from an entry point's start to ready, split into
+    stages. Starts at process start unless given `start`, so the first stage
+    includes interpreter startup and imports, e.g.
+
+        timer = StartupTimer("api")
+        ...imports...
+        timer.mark("imports")
+        load_all()
+        timer.mark("load_all")
+        timer.report()
+    """
+
+    def __init__(self, entry_point: str, start: float = None):
+        self.entry_point = entry_point
+        self.start = process_start() if start is None else start
+        self._last = self.start
+        self.stages = {}
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.stages[stage] = now - self._last
+        self._last = now
+
+    def report(self) -> dict:
+        total = self._last - self.start
+        report = {"total_s": round(total, 3), "stages": {k: round(v, 3) for k, v in self.stages.items()}}
+
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stages.items())
+        print(f"⏱️ {self.entry_point} startup: {total:.2f}s ({stages})")
+        return report
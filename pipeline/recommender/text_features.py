@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+# Fields hybrid_search_rerank matches query text against
+RERANK_FIELDS = ("name", "topics", "research", "specializations", "biography")
+
+# Upper bound on memoized term -> matching vocabulary ids entries
+MAX_MEMO_TERMS = 10000
+
+_EMPTY = frozenset()
+
+
+class TextFeatures:
+    """
+    Tokenized forms of the rerank fields, built once per loaded metadata.
+
+    Every lowercased field value is split on whitespace into a set of
+    vocabulary ids. A query term (which never contains whitespace) occurs in
+    a field iff it is a substring of one of the field's tokens, so
+    "term in field.lower()" becomes a set intersection between the field's
+    token ids and the vocabulary ids containing the term. Those are looked up
+    once per term through a trigram index over the vocabulary, not once per
+    candidate. Multi-term phrases are pre-filtered the same way and only
+    confirmed with a substring check when every term is present; that check
+    reads and lowercases the field value from `metadata` then, no lowercased
+    copy of the text is kept.
+
+    Results are identical to substring matching on the lowercased text.
+    """
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self.tokens = {}
+        self._vocab = {}
+        self._vocab_list = []
+        self._grams = defaultdict(set)
+        self._memo = {}
+
+        count = len(metadata)
+        for field in RERANK_FIELDS:
+            values = metadata.column(field) if field in metadata.text_columns else [None] * count
+            self.tokens[field] = [
+                frozenset(self._token_id(token) for token in value.lower().split()) if value else _EMPTY
+                for value in values
+            ]
+
+    def _token_id(self, token: str) -> int:
+        token_id = self._vocab.get(token)
+        if token_id is None:
+            token_id = len(self._vocab_list)
+            self._vocab[token] = token_id
+            self._vocab_list.append(token)
+            for i in range(len(token) - 2):
+                self._grams[token[i:i + 3]].add(token_id)
+        return token_id
+
+    def matching_tokens(self, term: str) -> frozenset:
+        """Vocabulary ids of every token that contains `term`"""
+        matches = self._memo.get(term)
+        if matches is not None:
+            return matches
+
+        if len(term) >= 3:
+            postings = sorted(
+                (self._grams.get(term[i:i + 3], _EMPTY) for i in range(len(term) - 2)),
+                key=len,
+            )
+            shortlist = postings[0].intersection(*postings[1:]) if postings[0] else ()
+            matches = frozenset(tid for tid in shortlist if term in self._vocab_list[tid])
+        else:
+            # Too short for trigrams; scan the vocabulary once for this term
+            matches = frozenset(tid for tid, token in enumerate(self._vocab_list) if term in token)
+
+        if len(self._memo) >= MAX_MEMO_TERMS:
+            self._memo.clear()
+        self._memo[term] = matches
+        return matches
+
+    def has_term(self, field: str, pos: int, term: str) -> bool:
+        """term in field.lower(), for a term without whitespace"""
+        tokens = self.tokens[field][pos]
+        return bool(tokens) and not tokens.isdisjoint(self.matching_tokens(term))
+
+    def contains(self, field: str, pos: int, query_lower: str, query_terms: list) -> bool:
+        """query_lower in field.lower()"""
+        if not self.tokens[field][pos]:
+            return False
+
+        if len(query_terms) == 1 and query_terms[0] == query_lower:
+            return self.has_term(field, pos, query_lower)
+
+        # Every term of the phrase has to occur before the phrase can
+        if not all(self.has_term(field, pos, term) for term in query_terms):
+            return False
+
+        return query_lower in self.metadata.value(field, pos).lower()
+
+    def name_equals(self, pos: int, query_lower: str) -> bool:
+        """name.lower() == query_lower"""
+        if not self.tokens["name"][pos]:
+            return False
+        return self.metadata.value("name", pos).lower() == query_lower
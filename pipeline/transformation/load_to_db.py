@@ -1,9 +1,16 @@
 import pandas as pd
 import json
+import os
 import sqlite3
+import sys
 from sqlalchemy import create_engine
 from collections import defaultdict
 
+# Add project root to sys.path to allow imports from pipeline
+sys.path.append(os.getcwd())
+
+from pipeline.recommender.fts import create_index as create_fts_index
+
 
 df = pd.read_csv("pipeline/data/processed/faculty_cleaned.csv")
 
@@ -92,6 +99,18 @@ except Exception as e:
     print(f"Error inserting data into database: {e}")
 
 
+# %%
+# Full-text index (faculty_fts) for keyword search; its triggers keep it in
+# sync with later row-by-row updates
+try:
+    conn = sqlite3.connect(DB_PATH)
+    create_fts_index(conn)
+    conn.close()
+    print("Full-text index built.")
+except Exception as e:
+    print(f"Error building full-text index: {e}")
+
+
 # %%
 try:
     conn = sqlite3.connect(DB_PATH)
@@ -1,7 +1,10 @@
 import streamlit as st
 from pathlib import Path
 import json
+import time
+from pipeline.recommender.loader import load_all
 from pipeline.recommender.search import search_faculty
+from pipeline.recommender.startup import StartupTimer
 from sqlalchemy import text
 from app.db import SessionLocal
 
@@ -24,6 +27,17 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def load_recommender():
+    """Load the model, index and metadata once per Streamlit server process"""
+    timer = StartupTimer("streamlit", start=time.perf_counter())
+    load_all()
+    timer.mark("load_all")
+    return timer.report()
+
+
+load_recommender()
+
 db = SessionLocal()
 
 def parse_faculty_json(f):